@@ -1,12 +1,8 @@
-import string
 from collections import Counter
 import matplotlib.pyplot as plt
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from nltk.stem import WordNetLemmatizer
 import tkinter as tk
 from tkinter import messagebox
+from review_analyzer import ReviewAnalyzer
 
 def analyze_review():
     reviewText = review_input.get("1.0", tk.END).strip()
@@ -14,42 +10,17 @@ def analyze_review():
         messagebox.showerror("Error", "Please enter a review.")
         return
 
-    lower_case = reviewText.lower()
-    clean_text = lower_case.translate(str.maketrans('', '', string.punctuation))
-
-    token_text = word_tokenize(clean_text, "english")
-
-    # Remove stop words from tokenized text
-    deter_text = [word for word in token_text if word not in stopwords.words('english')]
-
-    # Lemmatization
-    lemma_words = [WordNetLemmatizer().lemmatize(word) for word in deter_text]
-
-    # Sentiment analysis
-    score = SentimentIntensityAnalyzer().polarity_scores(clean_text)
-    neg = score['neg']
-    pos = score['pos']
-    neu = score['neu']
-
-    # Determine sentiment
-    sentiment = "Neutral Sentiment"
-    if neg > pos:
-        sentiment = "Negative Sentiment"
-    elif pos > neg:
-        sentiment = "Positive Sentiment"
-
-    # Map sentiment to basic emotions
-    if pos > 0.5:
-        emotion = "Overall Satisfied"
-    elif neg > 0.5:
-        emotion = "Overall Dissatisfied"
-    elif neu > 0.5:
-        emotion = "Calm Emotions"
-    else:
-        emotion = "Mixed Emotions"
+    result = analyzer.analyze(reviewText)
 
     # Display results
-    result_text.set(f"Sentiment: {sentiment}\n\nEmotion: {emotion}")
+    display = f"Sentiment: {result['sentiment']}\n\nEmotion: {result['emotion']}"
+    if result['emotions']:
+        feelings = ", ".join(f"{emotion} ({share:.0%})" for emotion, share in result['emotions'].items())
+        display += f"\n\nFeelings: {feelings}"
+    result_text.set(display)
+
+# Load the NLTK resources and the emotion lexicon once instead of on every click
+analyzer = ReviewAnalyzer(emotions=True)
 
 # GUI setup
 root = tk.Tk()
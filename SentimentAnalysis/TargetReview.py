@@ -1,8 +1,13 @@
+from functools import lru_cache
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
 from nltk.tokenize import word_tokenize
 import tkinter as tk
 from tkinter import messagebox
+from analysis_cache import AnalysisCache
+from score_cache import ScoreCache
+import profiling
+import fast_tokenize
 
 def ensure_nltk_resources():
     """
@@ -14,63 +19,338 @@ def ensure_nltk_resources():
     except Exception as e:
         messagebox.showerror("NLTK Error", f"Failed to download NLTK resources: {e}")
 
-# Call this function at the start of the program
-ensure_nltk_resources()
+# Shared VADER analyzer, loaded on first use instead of on every call
+_sia = None
+# Optional memoization layer, see enable_cache()
+_cache = None
+# Optional persistent score cache, see enable_score_cache()
+_score_cache = None
+# Tokenizer backend, see set_tokenizer()
+_tokenizer = "nltk"
+TOKENIZERS = ("nltk", "regex")
+
+def get_analyzer():
+    """
+    Return the shared SentimentIntensityAnalyzer, loading it on first use.
+    """
+    global _sia
+    if _sia is None:
+        _sia = SentimentIntensityAnalyzer()
+    return _sia
+
+def enable_cache(cache=None):
+    """
+    Memoize word tokenization, sentence splitting and VADER scores.
+
+    Pass an AnalysisCache to share it with a ReviewAnalyzer, otherwise a new
+    one is created. Returns the cache so its stats() can be inspected.
+    """
+    global _cache
+    _cache = cache or AnalysisCache()
+    return _cache
+
+def disable_cache():
+    """
+    Stop memoizing, every call tokenizes and scores from scratch again.
+    """
+    global _cache
+    _cache = None
+
+def enable_score_cache(score_cache):
+    """
+    Reuse target results stored in a ScoreCache (or a path to one) by earlier runs.
+    """
+    global _score_cache
+    _score_cache = score_cache if isinstance(score_cache, ScoreCache) else ScoreCache(score_cache)
+    return _score_cache
+
+def disable_score_cache():
+    """
+    Stop consulting the persistent score cache.
+    """
+    global _score_cache
+    _score_cache = None
+
+def set_tokenizer(name):
+    """
+    Choose the tokenizer backend: "nltk" (punkt and NLTK's word tokenizer) or
+    "regex" (fast_tokenize, the same tokens on review text at a fraction of the cost).
+
+    Clears the memoization cache, if enabled, since it holds tokens of the previous backend.
+    """
+    global _tokenizer
+    if name not in TOKENIZERS:
+        raise ValueError(f"Unknown tokenizer '{name}', expected one of {', '.join(TOKENIZERS)}")
+    if name != _tokenizer and _cache is not None:
+        _cache.clear()
+    _tokenizer = name
+
+def get_tokenizer():
+    return _tokenizer
+
+def _word_tokenize(text):
+    return fast_tokenize.word_tokenize(text) if _tokenizer == "regex" else word_tokenize(text)
+
+def _sent_tokenize(text):
+    return fast_tokenize.sent_tokenize(text) if _tokenizer == "regex" else nltk.sent_tokenize(text)
+
+def tokenize_words(text):
+    """
+    Word tokenize text, through the cache when it is enabled.
+    """
+    with profiling.stage("target.word_tokenize"):
+        if _cache is None:
+            return _word_tokenize(text)
+        return _cache.tokens.get_or_compute(text, lambda t: tuple(_word_tokenize(t)))
+
+def split_sentences(text):
+    """
+    Sentence tokenize text, through the cache when it is enabled.
+    """
+    with profiling.stage("target.sent_tokenize"):
+        if _cache is None:
+            return _sent_tokenize(text)
+        return _cache.sentences.get_or_compute(text, lambda t: tuple(_sent_tokenize(t)))
+
+def polarity_scores(text):
+    """
+    VADER scores of text, through the cache when it is enabled.
+    """
+    with profiling.stage("target.vader"):
+        if _cache is None:
+            return get_analyzer().polarity_scores(text)
+        return _cache.scores.get_or_compute(text, get_analyzer().polarity_scores)
 
 def preprocess_review(review):
     """
     Preprocess the review text by tokenizing and cleaning it.
     """
-    # Tokenize the review
-    tokens = word_tokenize(review)
-    # Convert to lowercase and remove non-alphanumeric tokens
-    tokens = [token.lower() for token in tokens if token.isalnum()]
-    return tokens
+    with profiling.stage("target.preprocess"):
+        # Tokenize the review
+        tokens = tokenize_words(review)
+        # Convert to lowercase and remove non-alphanumeric tokens
+        tokens = [token.lower() for token in tokens if token.isalnum()]
+        return tokens
+
+def sentence_words(review, needles, sentences=None):
+    """
+    Word lists of the sentences of a review that mention one of `needles`.
+
+    Only sentences containing a needle are tokenized. Pass `sentences`, the
+    review already split into word lists (see segmentation.py), to skip
+    tokenization; they are then all returned and the word comparison of the
+    caller does the filtering.
+    """
+    if sentences is not None:
+        return sentences
+    return (
+        tokenize_words(sentence) for sentence in split_sentences(review)
+        if any(needle in sentence.lower() for needle in needles)
+    )
 
-def extract_target_context(target, review):
+def extract_target_context(target, review, sentences=None):
     """
     Extract sentences or phrases containing the target from the review.
     """
-    sentences = nltk.sent_tokenize(review)
-    target_context = []
-    
-    for sentence in sentences:
-        if target.lower() in sentence.lower():
-            # Tokenize the sentence and extract words around the target
-            words = word_tokenize(sentence)
+    with profiling.stage("target.extract_context"):
+        target_context = []
+        
+        for words in sentence_words(review, [target.lower()], sentences):
+            # Find the target among the words of the sentence
             target_index = next((i for i, word in enumerate(words) if word.lower() == target.lower()), None)
             if target_index is not None:
                 # Extract a window of words around the target (e.g., 3 words before and after)
                 start = max(0, target_index - 3)
                 end = min(len(words), target_index + 4)
                 target_context.append(" ".join(words[start:end]))
-    
-    return " ".join(target_context)
+        
+        return " ".join(target_context)
+
+def label_sentiment(sentiment_scores):
+    """
+    Turn VADER scores into a positive, negative or neutral label.
+    """
+    if sentiment_scores['compound'] > 0:
+        return "positive"
+    elif sentiment_scores['compound'] < 0:
+        return "negative"
+    return "neutral"
+
+def _cache_options(kind, target):
+    # Results can differ slightly between tokenizers, so they are cached separately
+    options = f"{kind}:{target.lower()}"
+    return options if _tokenizer == "nltk" else f"{options}:{_tokenizer}"
+
+def _target_key(target, review):
+    return _score_cache.make_key(review, _cache_options("target", target))
+
+def _analyze_target(target, review, sentences=None):
+    # Extract context related to the target
+    target_context = extract_target_context(target, review, sentences)
+
+    if not target_context:
+        return None
+
+    # Perform sentiment analysis on the extracted context
+    result = dict(polarity_scores(target_context))
+    result['sentiment'] = label_sentiment(result)
+    result['context'] = target_context
+    return result
+
+def analyze_target(target, review, sentences=None):
+    """
+    Sentiment towards a target in a review.
+
+    Returns the VADER scores of the target's context with its 'sentiment'
+    label and the 'context' itself, or None when the target is not mentioned.
+    With pre-tokenized `sentences` the review text is not needed and the
+    score cache is not consulted.
+    """
+    if sentences is not None:
+        return _analyze_target(target, review, sentences)
+    return analyze_target_batch(target, [review])[0]
+
+def analyze_target_batch(target, reviews):
+    """
+    analyze_target() for one target over many reviews, with a single bulk score cache lookup.
+    """
+    if _score_cache is None:
+        return [_analyze_target(target, review) for review in reviews]
+
+    keys = [_target_key(target, review) for review in reviews]
+    cached = _score_cache.get_many(keys)
+    results = []
+    fresh = {}
+    for key, review in zip(keys, reviews):
+        if key in cached:
+            result = cached[key]
+        elif key in fresh:
+            result = fresh[key]
+        else:
+            result = fresh[key] = _analyze_target(target, review)
+        results.append(dict(result) if result is not None else None)
+    _score_cache.put_many(fresh)
+    return results
+
+def parse_targets(text):
+    """
+    Split comma separated targets, dropping blanks and repeats (case-insensitive).
+    """
+    targets = {}
+    for target in text.split(','):
+        target = target.strip()
+        if target and target.lower() not in targets:
+            targets[target.lower()] = target
+    return list(targets.values())
+
+def _target_tokens(target):
+    return _pattern_tokens(target, _tokenizer)
+
+@lru_cache(maxsize=4096)
+def _pattern_tokens(target, tokenizer):
+    # Multi-word targets such as "room service" are matched as a token sequence
+    tokens = fast_tokenize.word_tokenize(target) if tokenizer == "regex" else word_tokenize(target)
+    return tuple(token.lower() for token in tokens) or (target.lower(),)
+
+def extract_targets_context(targets, review, sentences=None):
+    """
+    Context windows of several targets, tokenizing the review once.
+
+    Unlike extract_target_context(), every occurrence of a target is used,
+    not only the first one in each sentence. Each occurrence contributes the
+    same window of 3 words before and after it; windows overlapping within a
+    sentence are merged. Returns a dict of target -> (context, mentions),
+    with an empty context for targets that are not mentioned.
+    """
+    with profiling.stage("target.extract_targets_context"):
+        patterns = {target: _target_tokens(target) for target in targets}
+        # Targets grouped by their first token, so each review token needs one dict lookup
+        by_first = {}
+        for target, pattern in patterns.items():
+            by_first.setdefault(pattern[0], []).append(target)
+
+        spans = {target: [] for target in targets}
+        mentions = dict.fromkeys(targets, 0)
+        needles = [target.lower() for target in targets]
+        for words in sentence_words(review, needles, sentences):
+            lowered = [word.lower() for word in words]
+            sentence_spans = {}
+            for i, word in enumerate(lowered):
+                for target in by_first.get(word, ()):
+                    pattern = patterns[target]
+                    if tuple(lowered[i:i + len(pattern)]) == pattern:
+                        mentions[target] += 1
+                        sentence_spans.setdefault(target, []).append(
+                            (max(0, i - 3), min(len(words), i + len(pattern) + 3))
+                        )
+            for target, target_spans in sentence_spans.items():
+                merged = [list(target_spans[0])]
+                for start, end in target_spans[1:]:
+                    if start <= merged[-1][1]:
+                        merged[-1][1] = max(merged[-1][1], end)
+                    else:
+                        merged.append([start, end])
+                spans[target].extend(" ".join(words[start:end]) for start, end in merged)
+
+        return {target: (" ".join(spans[target]), mentions[target]) for target in targets}
+
+def _analyze_targets(targets, review, sentences=None):
+    results = {}
+    for target, (context, mentions) in extract_targets_context(targets, review, sentences).items():
+        if not context:
+            results[target] = None
+            continue
+        result = dict(polarity_scores(context))
+        result['sentiment'] = label_sentiment(result)
+        result['context'] = context
+        result['mentions'] = mentions
+        results[target] = result
+    return results
+
+def analyze_targets(targets, review, sentences=None):
+    """
+    Sentiment towards several targets in a review, in a single pass over it.
+
+    `targets` is a list of targets or a comma separated string such as
+    "iPhone, battery, screen". Returns a dict keyed by target, in the given
+    order, holding the same result as analyze_target() plus the number of
+    'mentions', or None for targets that are not mentioned. `sentences` works
+    as for analyze_target().
+    """
+    if isinstance(targets, str):
+        targets = parse_targets(targets)
+    if _score_cache is None or sentences is not None:
+        return _analyze_targets(targets, review, sentences)
+
+    keys = {target: _score_cache.make_key(review, _cache_options("targets", target)) for target in targets}
+    cached = _score_cache.get_many(keys.values())
+    missing = [target for target in targets if keys[target] not in cached]
+    fresh = _analyze_targets(missing, review) if missing else {}
+    _score_cache.put_many({keys[target]: result for target, result in fresh.items()})
+
+    results = {}
+    for target in targets:
+        result = fresh[target] if target in fresh else cached[keys[target]]
+        results[target] = dict(result) if result is not None else None
+    return results
+
+def describe_target_result(target, result):
+    """
+    The sentence shown to the user for the result of one target.
+    """
+    if result is None:
+        return f"The target '{target}' is not mentioned in the review."
+    return f"The sentiment towards '{target}' is {result['sentiment']}."
 
 def determine_sentiment(target, review):
     """
     Determine the sentiment towards a specific target in a review.
     """
     try:
-        # Extract context related to the target
-        target_context = extract_target_context(target, review)
-        
-        if not target_context:
-            return f"The target '{target}' is not mentioned in the review."
-        
-        # Perform sentiment analysis on the extracted context
-        sia = SentimentIntensityAnalyzer()
-        sentiment_scores = sia.polarity_scores(target_context)
-        
-        # Determine overall sentiment
-        if sentiment_scores['compound'] > 0:
-            sentiment = "positive"
-        elif sentiment_scores['compound'] < 0:
-            sentiment = "negative"
-        else:
-            sentiment = "neutral"
+        with profiling.stage("target.determine_sentiment"):
+            result = analyze_target(target, review)
         
-        return f"The sentiment towards '{target}' is {sentiment}."
+        return describe_target_result(target, result)
     except Exception as e:
         return f"Error during sentiment analysis: {e}"
 
@@ -78,66 +358,74 @@ def analyze_sentiment():
     """
     Analyze sentiment based on user input from the GUI.
     """
-    target = target_entry.get()
+    targets = parse_targets(target_entry.get())
     review = review_entry.get("1.0", tk.END).strip()
     
-    if not target or not review:
+    if not targets or not review:
         messagebox.showerror("Input Error", "Please provide both target and review.")
         return
     
-    result = determine_sentiment(target, review)
+    try:
+        results = analyze_targets(targets, review)
+        result = "\n".join(describe_target_result(target, results[target]) for target in targets)
+    except Exception as e:
+        result = f"Error during sentiment analysis: {e}"
     result_label.config(text=result)
 
-# GUI setup
-root = tk.Tk()
-root.title("Target Review Analyzer")
-root.geometry("600x500")
-
-# Styles
-title_font = ("Helvetica", 16, "bold")
-label_font = ("Helvetica", 12)
-button_font = ("Helvetica", 12, "bold")
-result_font = ("Helvetica", 12)
-bg_color = "#f0f0f0"
-button_color = "#4CAF50"
-button_text_color = "white"
-
-root.configure(bg=bg_color)
-
-# Title
-tk.Label(root, text="Target Review Analyzer", font=title_font, bg=bg_color).pack(pady=10)
-
-# Target input
-tk.Label(root, text="Target:", font=label_font, bg=bg_color).pack(pady=5)
-target_entry = tk.Entry(root, width=50, font=("Helvetica", 10))
-target_entry.pack(pady=5)
-
-# Review input
-tk.Label(root, text="Review:", font=label_font, bg=bg_color).pack(pady=5)
-review_entry = tk.Text(root, width=60, height=10, font=("Helvetica", 10))
-review_entry.pack(pady=10)
-
-# Analyze button
-analyze_button = tk.Button(
-    root,
-    text="Analyze Sentiment",
-    command=analyze_sentiment,
-    font=button_font,
-    bg=button_color,
-    fg=button_text_color
-)
-analyze_button.pack(pady=10)
-
-# Result display
-result_label = tk.Label(
-    root,
-    text="",
-    font=result_font,
-    wraplength=500,
-    justify="left",
-    bg=bg_color
-)
-result_label.pack(pady=20)
-
-# Run the application
-root.mainloop()
+if __name__ == "__main__":
+    # Call this function at the start of the program
+    ensure_nltk_resources()
+
+    # GUI setup
+    root = tk.Tk()
+    root.title("Target Review Analyzer")
+    root.geometry("600x500")
+
+    # Styles
+    title_font = ("Helvetica", 16, "bold")
+    label_font = ("Helvetica", 12)
+    button_font = ("Helvetica", 12, "bold")
+    result_font = ("Helvetica", 12)
+    bg_color = "#f0f0f0"
+    button_color = "#4CAF50"
+    button_text_color = "white"
+
+    root.configure(bg=bg_color)
+
+    # Title
+    tk.Label(root, text="Target Review Analyzer", font=title_font, bg=bg_color).pack(pady=10)
+
+    # Target input
+    tk.Label(root, text="Target (comma separated):", font=label_font, bg=bg_color).pack(pady=5)
+    target_entry = tk.Entry(root, width=50, font=("Helvetica", 10))
+    target_entry.pack(pady=5)
+
+    # Review input
+    tk.Label(root, text="Review:", font=label_font, bg=bg_color).pack(pady=5)
+    review_entry = tk.Text(root, width=60, height=10, font=("Helvetica", 10))
+    review_entry.pack(pady=10)
+
+    # Analyze button
+    analyze_button = tk.Button(
+        root,
+        text="Analyze Sentiment",
+        command=analyze_sentiment,
+        font=button_font,
+        bg=button_color,
+        fg=button_text_color
+    )
+    analyze_button.pack(pady=10)
+
+    # Result display
+    result_label = tk.Label(
+        root,
+        text="",
+        font=result_font,
+        wraplength=500,
+        justify="left",
+        bg=bg_color
+    )
+    result_label.pack(pady=20)
+
+    # Run the application
+    root.mainloop()
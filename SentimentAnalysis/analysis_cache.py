@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from threading import Lock
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded cache that evicts the least recently used entry.
+
+    Hits, misses and evictions are counted so the hit rate can be checked on
+    real data before choosing a size.
+    """
+
+    def __init__(self, maxsize=100000):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, func):
+        """
+        Return the cached value for `key`, computing and storing it with func(key) on a miss.
+
+        The value is computed outside the lock, so two threads missing on the
+        same key at once may both compute it.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+        value = func(key)
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+class AnalysisCache:
+    """
+    Shared memoization layer for the review and target analyzers.
+
+    Holds separate LRU caches for word lemmas, word tokenization, sentence
+    splitting and VADER scores of a piece of text. Cached token lists are stored
+    as tuples so callers cannot change them by accident.
+    """
+
+    def __init__(self, maxsize=100000, lemma_maxsize=None):
+        self.lemmas = LRUCache(lemma_maxsize or maxsize)
+        self.tokens = LRUCache(maxsize)
+        self.sentences = LRUCache(maxsize)
+        self.scores = LRUCache(maxsize)
+
+    def caches(self):
+        return {'lemmas': self.lemmas, 'tokens': self.tokens, 'sentences': self.sentences, 'scores': self.scores}
+
+    def clear(self):
+        for cache in self.caches().values():
+            cache.clear()
+
+    def stats(self):
+        """
+        Hit, miss and eviction counters for each cache.
+        """
+        return {name: cache.stats() for name, cache in self.caches().items()}
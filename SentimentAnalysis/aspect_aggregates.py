@@ -0,0 +1,250 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import heapq
+import json
+import os
+import TargetReview
+
+# Aspects tracked when none are given
+DEFAULT_ASPECTS = ['staff', 'breakfast', 'room', 'location', 'cleanliness', 'bed', 'bathroom', 'service', 'food', 'pool']
+
+class AspectStats:
+    """
+    Running sentiment summary of one aspect of one hotel.
+
+    Holds the number of reviews mentioning the aspect, the sum of their
+    compound scores and how many were labelled positive, negative and
+    neutral by TargetReview.label_sentiment(). Two summaries of disjoint
+    sets of reviews merge into the summary of their union.
+    """
+
+    __slots__ = ('count', 'compound_sum', 'positive', 'negative', 'neutral')
+
+    def __init__(self, count=0, compound_sum=0.0, positive=0, negative=0, neutral=0):
+        self.count = count
+        self.compound_sum = compound_sum
+        self.positive = positive
+        self.negative = negative
+        self.neutral = neutral
+
+    def add(self, result):
+        """
+        Count one target result, as returned by TargetReview.analyze_target().
+        """
+        self.count += 1
+        self.compound_sum += result['compound']
+        sentiment = result['sentiment']
+        setattr(self, sentiment, getattr(self, sentiment) + 1)
+
+    def merge(self, other):
+        self.count += other.count
+        self.compound_sum += other.compound_sum
+        self.positive += other.positive
+        self.negative += other.negative
+        self.neutral += other.neutral
+        return self
+
+    @property
+    def mean_compound(self):
+        return self.compound_sum / self.count if self.count else None
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'compound_sum': self.compound_sum,
+            'positive': self.positive,
+            'negative': self.negative,
+            'neutral': self.neutral,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+class AspectAggregates:
+    """
+    Per-hotel, per-aspect sentiment aggregates that update as reviews arrive.
+
+    Adding a review only touches the aggregates of the aspects it mentions,
+    so history is never recomputed. Partial aggregates built by separate
+    workers combine with merge(), and the store saves to a small JSON file.
+    """
+
+    def __init__(self):
+        # (hotel, aspect) -> AspectStats
+        self.stats = {}
+
+    def __len__(self):
+        return len(self.stats)
+
+    def _stats(self, hotel, aspect):
+        key = (hotel, aspect)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = AspectStats()
+        return stats
+
+    def add_result(self, hotel, aspect, result):
+        """
+        Count a target result for a hotel's aspect. None (aspect not mentioned) is ignored.
+        """
+        if result is not None:
+            self._stats(hotel, aspect).add(result)
+
+    def add_review(self, hotel, review, aspects=DEFAULT_ASPECTS):
+        """
+        Analyze a review for all aspects in one pass and add the mentioned ones.
+        """
+        for aspect, result in TargetReview.analyze_targets(aspects, review).items():
+            self.add_result(hotel, aspect.lower(), result)
+
+    def add_reviews(self, rows, aspects=DEFAULT_ASPECTS):
+        """
+        Add an iterable of (hotel, review) pairs.
+        """
+        for hotel, review in rows:
+            self.add_review(hotel, review, aspects)
+        return self
+
+    def merge(self, other):
+        """
+        Fold another store's aggregates into this one.
+        """
+        for key, stats in other.stats.items():
+            mine = self.stats.get(key)
+            if mine is None:
+                self.stats[key] = AspectStats().merge(stats)
+            else:
+                mine.merge(stats)
+        return self
+
+    def get(self, hotel, aspect):
+        return self.stats.get((hotel, aspect.lower()))
+
+    def hotels(self):
+        return sorted({hotel for hotel, _ in self.stats})
+
+    def aspects(self):
+        return sorted({aspect for _, aspect in self.stats})
+
+    def top_k(self, aspect, k=10, worst=True, min_count=1):
+        """
+        The k hotels with the lowest (or, with worst=False, highest) mean compound for an aspect.
+
+        Hotels with fewer than `min_count` mentions of the aspect are left out.
+        Returns (hotel, AspectStats) pairs, best or worst first.
+        """
+        aspect = aspect.lower()
+        candidates = (
+            (hotel, stats) for (hotel, name), stats in self.stats.items()
+            if name == aspect and stats.count >= min_count
+        )
+        select = heapq.nsmallest if worst else heapq.nlargest
+        return select(k, candidates, key=lambda item: item[1].mean_compound)
+
+    def to_dict(self):
+        hotels = {}
+        for (hotel, aspect), stats in self.stats.items():
+            hotels.setdefault(str(hotel), {})[aspect] = stats.to_dict()
+        return hotels
+
+    @classmethod
+    def from_dict(cls, data):
+        store = cls()
+        for hotel, aspects in data.items():
+            for aspect, stats in aspects.items():
+                store.stats[(hotel, aspect)] = AspectStats.from_dict(stats)
+        return store
+
+    def save(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+def aggregate_chunk(rows, aspects=DEFAULT_ASPECTS):
+    """
+    Reduce a chunk of (hotel, review) pairs to partial aggregates, run in a worker process.
+    """
+    return AspectAggregates().add_reviews(rows, aspects)
+
+def aggregate_reviews(rows, aspects=DEFAULT_ASPECTS, workers=None, chunksize=1000, store=None):
+    """
+    Aggregate (hotel, review) pairs across a process pool and merge the partial results.
+
+    The partial aggregates are merged into `store` when one is given, so a
+    new batch of reviews updates an existing store.
+    """
+    store = store if store is not None else AspectAggregates()
+    rows = list(rows)
+    chunks = [rows[i:i + chunksize] for i in range(0, len(rows), chunksize)]
+    if workers == 1:
+        for chunk in chunks:
+            store.merge(aggregate_chunk(chunk, aspects))
+        return store
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(aggregate_chunk, chunks, [aspects] * len(chunks)):
+            store.merge(partial)
+    return store
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script keeps running per-hotel, per-aspect sentiment aggregates.\n"
+            "'update' adds the reviews of a file to the store without recomputing earlier ones,\n"
+            "'top' lists the worst (or best) hotels for an aspect."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "aspect_aggregates.py update --input reviews.xlsx --store aspects.json --workers 4\n"
+            "aspect_aggregates.py top --store aspects.json --aspect cleanliness --k 10"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("mode", choices = ["update", "top"], help = "Add reviews to the store, or query it.")
+    parser.add_argument("--store", required = True, help = "JSON aggregate store, created when missing.", metavar = "aspects.json")
+    parser.add_argument("--input", default = None, help = "Update: Excel, CSV or JSONL review file.", metavar = "reviews.xlsx")
+    parser.add_argument("--column", default = "Review", help = "Update: name of the column holding the review text.", metavar = "Review")
+    parser.add_argument("--hotel-column", default = "Hotel", help = "Update: name of the column holding the hotel name.", metavar = "Hotel")
+    parser.add_argument("--aspects", default = ",".join(DEFAULT_ASPECTS), help = "Update: comma separated aspects to track.", metavar = "staff,breakfast")
+    parser.add_argument("--aspects-file", default = None, help = "Update: track the aspects listed by aspect_discovery.py instead.", metavar = "aspects.csv")
+    parser.add_argument("--workers", type = int, default = None, help = "Update: worker processes (default: all CPUs).", metavar = "4")
+    parser.add_argument("--chunksize", type = int, default = 1000, help = "Update: reviews per worker task.", metavar = "1000")
+    parser.add_argument("--aspect", default = None, help = "Top: aspect to rank hotels by.", metavar = "cleanliness")
+    parser.add_argument("--k", type = int, default = 10, help = "Top: number of hotels to list.", metavar = "10")
+    parser.add_argument("--min-count", type = int, default = 1, help = "Top: ignore hotels with fewer mentions of the aspect.", metavar = "5")
+    parser.add_argument("--best", action = "store_true", help = "Top: list the best hotels instead of the worst.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    store = AspectAggregates.load(args.store) if os.path.exists(args.store) else AspectAggregates()
+
+    if args.mode == "update":
+        from batch_score import read_reviews
+        if not args.input:
+            raise SystemExit("update needs --input")
+        df = read_reviews(args.input)
+        rows = zip(df[args.hotel_column].astype(str), df[args.column].fillna("").astype(str))
+        if args.aspects_file:
+            from aspect_discovery import load_aspects
+            aspects = load_aspects(args.aspects_file)
+        else:
+            aspects = TargetReview.parse_targets(args.aspects)
+        aggregate_reviews(rows, aspects, args.workers, args.chunksize, store)
+        store.save(args.store)
+        print(f"Added {len(df)} reviews, {len(store)} hotel aspects in {args.store}")
+        return
+
+    if not args.aspect:
+        raise SystemExit("top needs --aspect")
+    for hotel, stats in store.top_k(args.aspect, args.k, worst=not args.best, min_count=args.min_count):
+        print(f"{stats.mean_compound:+.3f}  {hotel}  ({stats.count} mentions: {stats.positive} positive, {stats.negative} negative, {stats.neutral} neutral)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import argparse
+import csv
+import json
+import sys
+import nltk
+from nltk.corpus import stopwords
+import TargetReview
+from vader_numpy import VectorizedVader
+from batch_score import chunked
+
+# Candidate aspects must sit within this many words of an opinion word
+OPINION_WINDOW = 3
+
+# Longest noun phrase kept as one aspect, e.g. "room service"
+MAX_PHRASE_WORDS = 3
+
+# One warm extractor per worker process, created by init_worker
+_extractor = None
+
+class AspectCounts:
+    """
+    Partial result of aspect discovery: how many sentences mention each
+    aspect and the sum of those sentences' compound scores.
+
+    Counts of disjoint chunks of reviews merge into the counts of their union.
+    """
+
+    def __init__(self):
+        self.mentions = Counter()
+        self.compound_sums = Counter()
+        self.reviews = 0
+
+    def merge(self, other):
+        self.mentions.update(other.mentions)
+        self.compound_sums.update(other.compound_sums)
+        self.reviews += other.reviews
+        return self
+
+    def ranked(self, min_count=1, top=None):
+        """
+        Aspects ordered by number of mentions, as dicts with 'aspect', 'mentions' and 'mean_compound'.
+        """
+        ranked = [
+            {'aspect': aspect, 'mentions': count, 'mean_compound': self.compound_sums[aspect] / count}
+            for aspect, count in self.mentions.most_common() if count >= min_count
+        ]
+        return ranked[:top] if top else ranked
+
+class AspectExtractor:
+    """
+    Finds candidate aspect terms in reviews: nouns and noun phrases near opinion words.
+
+    Sentences are split and tokenized like TargetReview does. Opinion words
+    are the words of the VADER lexicon. With use_tagger=True nouns come from
+    nltk.pos_tag and runs of consecutive nouns become phrases; without the
+    tagger every content word near an opinion word counts, which is much
+    faster but noisier. Each sentence mentioning an aspect contributes its
+    VADER compound score, scored for a whole chunk at once.
+    """
+
+    def __init__(self, use_tagger=True, window=OPINION_WINDOW):
+        self.use_tagger = use_tagger
+        self.window = window
+        self.vader = VectorizedVader(TargetReview.get_analyzer())
+        self.opinion_words = frozenset(TargetReview.get_analyzer().lexicon)
+        self.stop_words = frozenset(stopwords.words('english'))
+
+    def _is_content_word(self, word):
+        return len(word) > 2 and word.isalpha() and word not in self.stop_words and word not in self.opinion_words
+
+    def _phrases(self, words, lowered):
+        """
+        (start, end) spans of candidate nouns and noun phrases in a tokenized sentence.
+        """
+        if not self.use_tagger:
+            return [(i, i + 1) for i, word in enumerate(lowered) if self._is_content_word(word)]
+
+        # The tagger works best on the original casing
+        nouns = [tag.startswith('NN') and self._is_content_word(word) for word, (_, tag) in zip(lowered, nltk.pos_tag(words))]
+        spans = []
+        start = None
+        for i, noun in enumerate(nouns + [False]):
+            if noun and start is not None and i - start < MAX_PHRASE_WORDS:
+                continue
+            if start is not None:
+                spans.append((start, i))
+                start = None
+            if noun:
+                start = i
+        return spans
+
+    def sentence_aspects(self, words):
+        """
+        Aspects of one tokenized sentence that have an opinion word within the window.
+        """
+        lowered = [word.lower() for word in words]
+        opinions = [i for i, word in enumerate(lowered) if word in self.opinion_words]
+        if not opinions:
+            return set()
+        aspects = set()
+        for start, end in self._phrases(list(words), lowered):
+            if any(start - self.window <= i < end + self.window for i in opinions):
+                aspects.add(" ".join(lowered[start:end]))
+        return aspects
+
+    def count(self, reviews):
+        """
+        Aspect mentions and sentiment of a chunk of reviews.
+        """
+        counts = AspectCounts()
+        sentences = []
+        sentence_aspects = []
+        for review in reviews:
+            counts.reviews += 1
+            for sentence in TargetReview.split_sentences(review):
+                aspects = self.sentence_aspects(TargetReview.tokenize_words(sentence))
+                if aspects:
+                    sentences.append(sentence)
+                    sentence_aspects.append(aspects)
+
+        for aspects, scores in zip(sentence_aspects, self.vader.polarity_scores_batch(sentences)):
+            for aspect in aspects:
+                counts.mentions[aspect] += 1
+                counts.compound_sums[aspect] += scores['compound']
+        return counts
+
+def init_worker(use_tagger=True, window=OPINION_WINDOW):
+    """
+    Load the lexicons once per worker process.
+    """
+    global _extractor
+    _extractor = AspectExtractor(use_tagger, window)
+
+def count_chunk(reviews):
+    """
+    Map step: count the aspects of a chunk of reviews in a worker process.
+    """
+    return _extractor.count(reviews)
+
+def discover_aspects(reviews, workers=None, chunksize=2000, use_tagger=True, window=OPINION_WINDOW, progress=False):
+    """
+    Count candidate aspects over a process pool and merge the partial counts.
+
+    Returns the merged AspectCounts; use its ranked() for the aspect list.
+    """
+    reviews = list(reviews)
+    total = AspectCounts()
+    start = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(use_tagger, window)) as executor:
+        # Chunks are independent, so their counts can be merged in any order
+        for counts in executor.map(count_chunk, chunked(reviews, chunksize)):
+            total.merge(counts)
+            if progress:
+                elapsed = perf_counter() - start
+                rate = total.reviews / elapsed if elapsed else 0.0
+                print(f"Counted {total.reviews}/{len(reviews)} reviews ({rate:.0f} reviews/s)", file=sys.stderr, flush=True)
+    return total
+
+def write_aspects(ranked, path):
+    """
+    Save the ranked aspects as CSV or JSON, chosen by the file extension.
+    """
+    if path.lower().endswith('.json'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(ranked, f, indent=2, ensure_ascii=False)
+        return
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['aspect', 'mentions', 'mean_compound'])
+        writer.writeheader()
+        writer.writerows(ranked)
+
+def load_aspects(path, top=None):
+    """
+    Aspect names from a file written by write_aspects(), ready for TargetReview.analyze_targets().
+    """
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            aspects = [row['aspect'] for row in json.load(f)]
+    else:
+        with open(path, encoding='utf-8', newline='') as f:
+            aspects = [row['aspect'] for row in csv.DictReader(f)]
+    return aspects[:top] if top else aspects
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script discovers the aspects guests talk about in a review file.\n"
+            "Nouns and noun phrases near opinion words are counted across a process pool and\n"
+            "ranked by mentions, with the mean sentiment of the sentences mentioning them."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "aspect_discovery.py --input reviews.xlsx --column Review --workers 8 --top 30 --output aspects.csv\n"
+            "Pass the aspect list on to the Target Review Analyzer with --targets."
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--input", required = True, help = "Excel, CSV or JSONL review file.", metavar = "reviews.xlsx")
+    parser.add_argument("--column", default = "Review", help = "Name of the column holding the review text.", metavar = "Review")
+    parser.add_argument("--output", default = None, help = "Save the ranked aspects as CSV or JSON.", metavar = "aspects.csv")
+    parser.add_argument("--workers", type = int, default = None, help = "Worker processes (default: all CPUs).", metavar = "8")
+    parser.add_argument("--chunksize", type = int, default = 2000, help = "Reviews per worker task.", metavar = "2000")
+    parser.add_argument("--top", type = int, default = 30, help = "Number of aspects to keep.", metavar = "30")
+    parser.add_argument("--min-count", type = int, default = 5, help = "Ignore aspects mentioned fewer times.", metavar = "5")
+    parser.add_argument("--window", type = int, default = OPINION_WINDOW, help = "Words between an aspect and an opinion word.", metavar = "3")
+    parser.add_argument("--no-tagger", action = "store_true", help = "Skip part-of-speech tagging: faster, but every content word is a candidate.")
+    parser.add_argument("--targets", action = "store_true", help = "Also print the aspects as a comma separated target list.")
+    parser.add_argument("--progress", action = "store_true", help = "Print progress after every chunk.")
+    return parser
+
+def main():
+    from batch_score import read_reviews
+    args = build_parser().parse_args()
+    if not args.no_tagger:
+        nltk.download('averaged_perceptron_tagger_eng', quiet=True)
+    reviews = read_reviews(args.input)[args.column].fillna("").astype(str).tolist()
+
+    start = perf_counter()
+    counts = discover_aspects(reviews, args.workers, args.chunksize, not args.no_tagger, args.window, args.progress)
+    ranked = counts.ranked(args.min_count, args.top)
+    elapsed = perf_counter() - start
+
+    for row in ranked:
+        print(f"{row['aspect']:<24} {row['mentions']:>9} mentions  mean compound {row['mean_compound']:+.3f}")
+    if args.targets:
+        print(", ".join(row['aspect'] for row in ranked))
+    if args.output:
+        write_aspects(ranked, args.output)
+        print(f"Aspects saved to {args.output}")
+    print(f"Counted {counts.reviews} reviews in {elapsed:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
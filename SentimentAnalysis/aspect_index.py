@@ -0,0 +1,237 @@
+from array import array
+from time import perf_counter
+import argparse
+import os
+import pickle
+import TargetReview
+from vader_numpy import VectorizedVader
+
+# Bump when the on-disk layout changes
+INDEX_VERSION = 1
+
+class AspectIndex:
+    """
+    Inverted positional index over a review corpus for aspect queries.
+
+    Every review is sentence split and word tokenized once, with the same
+    tokenizers as TargetReview. Token ids of the whole corpus are kept in one
+    flat array, with offset arrays marking where each sentence and each review
+    starts. The posting list of a lowercased token holds a flat run of
+    (review, sentence, position) triples, so an aspect query jumps straight to
+    the sentences mentioning it instead of scanning every review.
+
+    Reviews can be added at any time; the index is saved to and loaded from a
+    single pickle file, which must only be loaded from trusted sources.
+    """
+
+    def __init__(self):
+        self.vocabulary = []
+        self.token_ids = {}
+        self.tokens = array('i')
+        # Offsets into `tokens` (sentences) and into the sentences (reviews), with an end sentinel
+        self.sentence_starts = array('q', [0])
+        self.review_starts = array('q', [0])
+        self.keys = []
+        self.postings = {}
+        self._vader = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _token_id(self, token):
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            token_id = self.token_ids[token] = len(self.vocabulary)
+            self.vocabulary.append(token)
+        return token_id
+
+    def add(self, review, key=None):
+        """
+        Index one review. `key` identifies it in query results and defaults to its number.
+        """
+        review_id = len(self.keys)
+        self.keys.append(review_id if key is None else key)
+        for sentence in TargetReview.split_sentences(review):
+            sentence_id = len(self.sentence_starts) - 1
+            for position, word in enumerate(TargetReview.tokenize_words(sentence)):
+                self.tokens.append(self._token_id(word))
+                posting = self.postings.get(word.lower())
+                if posting is None:
+                    posting = self.postings[word.lower()] = array('i')
+                posting.extend((review_id, sentence_id, position))
+            self.sentence_starts.append(len(self.tokens))
+        self.review_starts.append(len(self.sentence_starts) - 1)
+        return review_id
+
+    def add_many(self, reviews, keys=None):
+        """
+        Index an iterable of reviews, optionally paired with their keys.
+        """
+        if keys is None:
+            for review in reviews:
+                self.add(review)
+        else:
+            for review, key in zip(reviews, keys):
+                self.add(review, key)
+
+    def sentence_words(self, sentence_id):
+        start, end = self.sentence_starts[sentence_id], self.sentence_starts[sentence_id + 1]
+        return [self.vocabulary[token_id] for token_id in self.tokens[start:end]]
+
+    def _matches(self, pattern, sentence_id, position):
+        if len(pattern) == 1:
+            return True
+        end = self.sentence_starts[sentence_id] + position + len(pattern)
+        if end > self.sentence_starts[sentence_id + 1]:
+            return False
+        start = self.sentence_starts[sentence_id] + position
+        return tuple(self.vocabulary[t].lower() for t in self.tokens[start:end]) == pattern
+
+    def contexts(self, target):
+        """
+        Context of `target` in every review mentioning it, as a dict of review id -> context.
+
+        The context matches TargetReview.extract_target_context(): in each
+        sentence the first mention of the target with 3 words on either side,
+        joined over the sentences of the review. Multi-word targets match
+        their token sequence.
+        """
+        pattern = TargetReview._target_tokens(target)
+        posting = self.postings.get(pattern[0], ())
+        first_mentions = {}
+        for i in range(0, len(posting), 3):
+            review_id, sentence_id, position = posting[i], posting[i + 1], posting[i + 2]
+            if sentence_id not in first_mentions and self._matches(pattern, sentence_id, position):
+                first_mentions[sentence_id] = (review_id, position)
+
+        contexts = {}
+        for sentence_id, (review_id, position) in first_mentions.items():
+            words = self.sentence_words(sentence_id)
+            window = " ".join(words[max(0, position - 3):position + len(pattern) + 3])
+            contexts.setdefault(review_id, []).append(window)
+        return {review_id: " ".join(windows) for review_id, windows in contexts.items()}
+
+    def query(self, target, engine="nltk"):
+        """
+        Sentiment towards `target` in every review mentioning it.
+
+        Returns a dict of review id -> result shaped like TargetReview.analyze_target(),
+        with the review's 'key' added. Review ids number the reviews in the order they were added.
+        Only the matching contexts are scored; engine="numpy" scores them in one vectorized batch.
+        """
+        contexts = self.contexts(target)
+        # Short windows repeat a lot across reviews, each distinct one is scored once
+        unique = list(dict.fromkeys(contexts.values()))
+        if engine == "numpy":
+            if self._vader is None:
+                self._vader = VectorizedVader(TargetReview.get_analyzer())
+            scores = dict(zip(unique, self._vader.polarity_scores_batch(unique)))
+        else:
+            scores = {context: TargetReview.polarity_scores(context) for context in unique}
+
+        results = {}
+        for review_id, context in contexts.items():
+            result = dict(scores[context])
+            result['sentiment'] = TargetReview.label_sentiment(result)
+            result['context'] = context
+            result['key'] = self.keys[review_id]
+            results[review_id] = result
+        return results
+
+    def summary(self, target, engine="nltk"):
+        """
+        Number of reviews mentioning `target`, their mean compound score and the label split.
+        """
+        results = self.query(target, engine).values()
+        counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+        for result in results:
+            counts[result['sentiment']] += 1
+        mentions = len(results)
+        return {
+            'target': target,
+            'reviews': mentions,
+            'mean_compound': sum(r['compound'] for r in results) / mentions if mentions else None,
+            **counts,
+        }
+
+    def save(self, path):
+        state = {
+            'version': INDEX_VERSION,
+            'vocabulary': self.vocabulary,
+            'tokens': self.tokens,
+            'sentence_starts': self.sentence_starts,
+            'review_starts': self.review_starts,
+            'keys': self.keys,
+            'postings': self.postings,
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != INDEX_VERSION:
+            raise ValueError(f"Index {path} has version {state.get('version')}, expected {INDEX_VERSION}; rebuild it")
+        index = cls()
+        index.vocabulary = state['vocabulary']
+        index.token_ids = {token: i for i, token in enumerate(index.vocabulary)}
+        index.tokens = state['tokens']
+        index.sentence_starts = state['sentence_starts']
+        index.review_starts = state['review_starts']
+        index.keys = state['keys']
+        index.postings = state['postings']
+        return index
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script builds an inverted index over a review file and answers aspect queries from it.\n"
+            "Reviews are tokenized once when indexed; a query only scores the sentences mentioning the aspect."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "aspect_index.py build --input reviews.xlsx --column Review --index reviews.idx\n"
+            "aspect_index.py query --index reviews.idx --target breakfast --target staff"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("mode", choices = ["build", "query"], help = "Build (or extend) an index, or query one.")
+    parser.add_argument("--index", required = True, help = "Index file.", metavar = "reviews.idx")
+    parser.add_argument("--input", default = None, help = "Build: Excel, CSV or JSONL review file to add.", metavar = "reviews.xlsx")
+    parser.add_argument("--column", default = "Review", help = "Build: name of the column holding the review text.", metavar = "Review")
+    parser.add_argument("--key-column", default = None, help = "Build: column identifying each review in query results, such as Hotel.", metavar = "Hotel")
+    parser.add_argument("--target", action = "append", default = [], help = "Query: aspect to look up, can be repeated.", metavar = "breakfast")
+    parser.add_argument("--engine", choices = ["nltk", "numpy"], default = "nltk", help = "Query: VADER implementation used to score the contexts.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    if args.mode == "build":
+        from batch_score import read_reviews
+        if not args.input:
+            raise SystemExit("build needs --input")
+        index = AspectIndex.load(args.index) if os.path.exists(args.index) else AspectIndex()
+        df = read_reviews(args.input)
+        reviews = df[args.column].fillna("").astype(str)
+        keys = df[args.key_column].tolist() if args.key_column else None
+        start = perf_counter()
+        before = len(index)
+        index.add_many(reviews, keys)
+        index.save(args.index)
+        print(f"Indexed {len(index) - before} reviews in {perf_counter() - start:.1f}s ({len(index)} in {args.index})")
+        return
+
+    index = AspectIndex.load(args.index)
+    for target in args.target:
+        start = perf_counter()
+        summary = index.summary(target, args.engine)
+        elapsed = (perf_counter() - start) * 1000
+        mean = f"{summary['mean_compound']:+.3f}" if summary['mean_compound'] is not None else "-"
+        print(f"{target}: {summary['reviews']} reviews, mean compound {mean}, "
+              f"{summary['positive']} positive / {summary['negative']} negative / {summary['neutral']} neutral ({elapsed:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from time import perf_counter
+import asyncio
+import argparse
+import itertools
+import sys
+import os
+from hotel_extraction import CARD_SELECTOR, EXTRACT_CARDS_JS, SEARCH_FIELDS, IncrementalExtractor, parse_cards, search_url
+from page_loading import enable_lean_mode_async, open_results_async, load_all_results_async, summarize_steps
+from scrape_state import ScrapeState
+from hotel_output import save_rows, OUTPUT_FORMATS
+
+class HostRateLimiter:
+    """
+    Spaces out requests to the same host to at most `rate` per second, across all searches.
+
+    Each caller is given the next free slot of its host and sleeps until
+    then, so concurrent searches of one site queue up instead of bursting.
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = {}
+
+    async def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot.get(host, now))
+        self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class ContextPool:
+    """
+    A fixed number of isolated browser contexts, each with one page, sharing one browser.
+
+    A search borrows a page with `async with pool.page() as page:` and waits
+    when all are busy, so the pool size is the concurrency limit. Cookies are
+    cleared when a page is handed back; a page whose search failed is closed
+    and the next search to borrow its slot opens a fresh context. A slot
+    always goes back to the pool, even when opening that context fails, so
+    the pool never shrinks. With lean=True every context aborts the
+    requests page_loading.should_block() picks.
+    """
+
+    def __init__(self, browser, size, lean=False, **context_options):
+        self.browser = browser
+        self.size = size
+        self.lean = lean
+        self.context_options = context_options
+        self.idle = asyncio.Queue()
+        self.contexts = set()
+
+    async def _new_page(self):
+        context = await self.browser.new_context(**self.context_options)
+        self.contexts.add(context)
+        if self.lean:
+            await enable_lean_mode_async(context)
+        return context, await context.new_page()
+
+    async def start(self):
+        for _ in range(self.size):
+            self.idle.put_nowait(await self._new_page())
+        return self
+
+    async def _discard(self, context):
+        self.contexts.discard(context)
+        try:
+            await context.close()
+        except Exception:
+            # The context may have gone down with the page
+            pass
+
+    @asynccontextmanager
+    async def page(self):
+        # An empty slot (None) is one whose page was discarded
+        slot = await self.idle.get()
+        try:
+            if slot is None:
+                slot = await self._new_page()
+            context, page = slot
+            slot = None
+            try:
+                yield page
+                await context.clear_cookies()
+            except BaseException:
+                await self._discard(context)
+                raise
+            slot = context, page
+        finally:
+            self.idle.put_nowait(slot)
+
+    async def close(self):
+        for context in list(self.contexts):
+            await context.close()
+        self.contexts.clear()
+
+async def scrape_search(page, url, limiter, load_more_timeout=30000, lean=False, log=print, extractor=None):
+    """
+    Load a search results page, page through all results and return the hotel dicts and step timings.
+
+    Follows the steps of hotels_scraper.py: dismiss the sign-in pop-up, then
+    scroll and click "Load more results" until it stops appearing. Page loads
+    and clicks go through the rate limiter. With an IncrementalExtractor the
+    cards are extracted after every step instead of at the end, and only
+    the hotels it had not seen are returned.
+    """
+    await limiter.wait(url)
+    await open_results_async(page, url, lean, log)
+    if extractor is None:
+        steps = await load_all_results_async(page, lean, log, lambda: limiter.wait(page.url), load_more_timeout)
+        return parse_cards(await page.locator(CARD_SELECTOR).evaluate_all(EXTRACT_CARDS_JS, 0)), steps
+    extractor.page = page
+    hotels = await extractor.extract_async()
+
+    async def extract_new(cards=None):
+        hotels.extend(await extractor.extract_async())
+
+    steps = await load_all_results_async(page, lean, log, lambda: limiter.wait(page.url), load_more_timeout, extract_new)
+    await extract_new()
+    return hotels, steps
+
+def output_path(search, output_dir, output_format):
+    name = "_".join(str(search[field]) for field in ('city', 'country', 'indate', 'outdate'))
+    return os.path.join(output_dir, name.replace(" ", "-").replace(os.sep, "-") + "." + output_format)
+
+async def run_searches(searches, concurrency=4, rate=2.0, base_url="https://www.booking.com", output_dir=".",
+                       output_format="jsonl", headless=True, load_more_timeout=30000, lean=False, verbose=False, on_result=None,
+                       state_path=None, refresh=False):
+    """
+    Scrape many searches concurrently with one browser and a pool of `concurrency` contexts.
+
+    Each search is written to its own file in `output_dir` as soon as it
+    completes, and `on_result(search, hotels, path)` is called if given. A
+    failed search is reported and does not stop the others. Returns a list
+    of (search, hotel count or None, error or None, seconds) in completion order.
+    lean=True loads pages in page_loading's lean mode; verbose=True prints
+    the timing of every pagination step.
+
+    With `state_path` every search checkpoints its hotels to a ScrapeState
+    after each pagination step. A rerun then skips the searches that
+    finished (unless refresh=True) and resumes the others, skipping the
+    hotels they already have; the written files hold all hotels of the search.
+    """
+    from playwright.async_api import async_playwright
+
+    os.makedirs(output_dir, exist_ok=True)
+    limiter = HostRateLimiter(rate)
+    loop = asyncio.get_running_loop()
+    state = ScrapeState(state_path) if state_path else None
+    summary = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        pool = await ContextPool(browser, concurrency, lean).start()
+
+        async def run(search):
+            name = f"{search['city']}, {search['country']} {search['indate']} - {search['outdate']}"
+            log = (lambda message: print(f"{name}: {message}", flush=True)) if verbose else (lambda message: None)
+            start = perf_counter()
+            job = extractor = None
+            if state is not None:
+                job = state.start(search, base_url, refresh)
+                if job['skip']:
+                    result = (search, len(state.hotels(job['job'])), None, 0.0)
+                    print(f"{name}: already done, {result[1]} hotels", flush=True)
+                    summary.append(result)
+                    return
+                extractor = IncrementalExtractor(
+                    None, seen=state.keys(job['job']),
+                    on_extract=lambda keys, hotels, cards: state.record(job['job'], keys, hotels, cards)
+                )
+            try:
+                async with pool.page() as page:
+                    hotels, steps = await scrape_search(page, search_url(search, base_url), limiter, load_more_timeout, lean, log, extractor)
+                if state is not None:
+                    state.finish(job['job'])
+                    hotels = state.hotels(job['job'])
+                path = output_path(search, output_dir, output_format)
+                # Writing is blocking, keep it off the event loop
+                await loop.run_in_executor(None, save_rows, hotels, path)
+                if on_result is not None:
+                    on_result(search, hotels, path)
+                result = (search, len(hotels), None, perf_counter() - start)
+                print(f"{name}: {len(hotels)} hotels in {result[3]:.1f}s ({summarize_steps(steps)}) -> {path}", flush=True)
+            except Exception as e:
+                if job is not None:
+                    state.finish(job['job'], str(e))
+                result = (search, None, str(e), perf_counter() - start)
+                print(f"{name}: failed: {e}", file=sys.stderr, flush=True)
+            summary.append(result)
+
+        try:
+            await asyncio.gather(*(run(search) for search in searches))
+        finally:
+            await pool.close()
+            await browser.close()
+            if state is not None:
+                state.close()
+    return summary
+
+def read_searches(path):
+    """
+    Searches from an Excel, CSV or JSONL file with one column per SEARCH_FIELDS entry.
+    """
+    from batch_score import read_reviews
+    df = read_reviews(path)
+    missing = [field for field in SEARCH_FIELDS if field not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing the columns {missing}")
+    return df[SEARCH_FIELDS].astype(str).to_dict('records')
+
+def cross_searches(cities, country, dates, nadult, nchild, nroom):
+    """
+    One search per city and date range; `dates` are 'indate:outdate' strings.
+    """
+    searches = []
+    for city, dates_range in itertools.product(cities, dates):
+        indate, outdate = dates_range.split(":")
+        searches.append({'city': city, 'country': country, 'indate': indate, 'outdate': outdate,
+                         'nadult': nadult, 'nchild': nchild, 'nroom': nroom})
+    return searches
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script runs many Booking.com searches concurrently in one headless browser.\n"
+            "Searches share a pool of isolated browser contexts, requests to a site are rate limited,\n"
+            "and every search is written to its own file as soon as it completes."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "async_scraper.py --city Alexandria --city Cairo --country Egypt --dates 2025-2-24:2025-2-27\n"
+            "    --dates 2025-3-3:2025-3-5 --concurrency 4 --rate 2 --output-dir scrapes\n"
+            "async_scraper.py --searches searches.csv --concurrency 8 --format csv --state scrapes.db"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--searches", default = None, help = "File with city, country, indate, outdate, nadult, nchild and nroom columns.", metavar = "searches.csv")
+    parser.add_argument("--city", action = "append", default = [], help = "City to search in, can be repeated.", metavar = "Alexandria")
+    parser.add_argument("--country", default = None, help = "Country of the cities.", metavar = "Egypt")
+    parser.add_argument("--dates", action = "append", default = [], help = "Check-in and check-out dates, can be repeated.", metavar = "2025-2-24:2025-2-27")
+    parser.add_argument("--nadult", default = "2", help = "Number of adults.", metavar = "2")
+    parser.add_argument("--nchild", default = "0", help = "Number of children.", metavar = "0")
+    parser.add_argument("--nroom", default = "1", help = "Number of rooms.", metavar = "1")
+    parser.add_argument("--concurrency", type = int, default = 4, help = "Searches running at the same time.", metavar = "4")
+    parser.add_argument("--rate", type = float, default = 2.0, help = "Page loads and clicks per second per site, 0 for no limit.", metavar = "2")
+    parser.add_argument("--output-dir", default = ".", help = "Directory of the per-search files.", metavar = "scrapes")
+    parser.add_argument("--format", choices = OUTPUT_FORMATS, default = "jsonl", help = "Format of the per-search files.")
+    parser.add_argument("--base-url", default = "https://www.booking.com", help = "Site to search, e.g. a local mock_booking_server.py.", metavar = "http://127.0.0.1:8000")
+    parser.add_argument("--load-more-timeout", type = int, default = 30000, help = "Milliseconds to wait for 'Load more results' before stopping.", metavar = "30000")
+    parser.add_argument("--state", default = None, help = "SQLite file checkpointing every search; a rerun skips finished searches and resumes the rest.", metavar = "scrapes.db")
+    parser.add_argument("--refresh", action = "store_true", help = "With --state, scrape finished searches again.")
+    parser.add_argument("--lean", action = "store_true", help = "Block images, fonts and trackers and wait for new cards instead of network idle.")
+    parser.add_argument("--verbose", action = "store_true", help = "Print the timing of every pagination step.")
+    parser.add_argument("--headed", action = "store_true", help = "Show the browser windows.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    if args.searches:
+        searches = read_searches(args.searches)
+    elif args.city and args.country and args.dates:
+        searches = cross_searches(args.city, args.country, args.dates, args.nadult, args.nchild, args.nroom)
+    else:
+        raise SystemExit("Give --searches, or --city, --country and --dates")
+
+    start = perf_counter()
+    summary = asyncio.run(run_searches(
+        searches, args.concurrency, args.rate, args.base_url, args.output_dir, args.format,
+        headless=not args.headed, load_more_timeout=args.load_more_timeout, lean=args.lean, verbose=args.verbose,
+        state_path=args.state, refresh=args.refresh,
+    ))
+    failed = [result for result in summary if result[2] is not None]
+    hotels = sum(result[1] for result in summary if result[1] is not None)
+    print(f"{len(summary) - len(failed)}/{len(summary)} searches, {hotels} hotels in {perf_counter() - start:.1f}s")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
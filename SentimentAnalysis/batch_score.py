@@ -0,0 +1,163 @@
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import pandas as pd
+import argparse
+import json
+import sys
+import os
+from review_analyzer import ReviewAnalyzer
+from analysis_cache import AnalysisCache
+from score_cache import ScoreCache
+
+# Columns added to the output, in this order
+SCORE_COLUMNS = ['neg', 'neu', 'pos', 'compound', 'sentiment', 'emotion']
+
+# Extra columns added when the emotion lexicon is enabled
+EMOTION_COLUMNS = ['top_emotion', 'emotions']
+
+# One warm analyzer per worker process, created by init_worker
+_analyzer = None
+
+def init_worker(engine="nltk", emotions=False, cache_size=0, score_cache_path=None, score_cache_max=None, tokenizer="nltk"):
+    """
+    Load the NLTK resources once per worker process.
+    """
+    global _analyzer
+    cache = AnalysisCache(cache_size) if cache_size else None
+    score_cache = ScoreCache(score_cache_path, score_cache_max) if score_cache_path else None
+    # The lemmas are only needed for the emotion distribution
+    _analyzer = ReviewAnalyzer(engine=engine, emotions=emotions, cache=cache, score_cache=score_cache, with_lemmas=False, tokenizer=tokenizer)
+
+def result_row(result):
+    """
+    Turn an analyzer result into an output row.
+    """
+    row = tuple(result[column] for column in SCORE_COLUMNS)
+    if 'emotions' in result:
+        emotions = result['emotions']
+        row += (next(iter(emotions), None), json.dumps(emotions))
+    return row
+
+def score_chunk(texts):
+    """
+    Score a chunk of reviews in a worker process.
+
+    Only the score columns are sent back to the parent to keep pickling cheap.
+    """
+    return [result_row(result) for result in _analyzer.analyze_batch(texts)]
+
+def read_reviews(path):
+    """
+    Read a review file into a data frame based on its extension (.xlsx, .csv, .jsonl or .parquet).
+
+    A directory or glob pattern reads all matching files, e.g. the outputs of past runs.
+    """
+    from hotel_output import load_frame
+    return load_frame(path)
+
+def write_reviews(df, path):
+    """
+    Write the scored data frame, choosing the format from the file extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xls'):
+        df.to_excel(path, index=False)
+    elif extension == '.csv':
+        df.to_csv(path, index=False)
+    elif extension in ('.jsonl', '.json'):
+        df.to_json(path, orient='records', lines=True, force_ascii=False)
+    elif extension == '.parquet':
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported output format '{extension}', expected .xlsx, .csv, .jsonl or .parquet")
+
+def chunked(items, size):
+    """
+    Split a list into consecutive chunks of at most `size` items.
+    """
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def score_texts(texts, workers=None, chunksize=1000, progress=False, engine="nltk", emotions=False, cache_size=0,
+                score_cache_path=None, score_cache_max=None, tokenizer="nltk"):
+    """
+    Score a list of reviews over a process pool, preserving input order.
+    """
+    chunks = chunked(texts, chunksize)
+    rows = []
+    start = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(engine, emotions, cache_size, score_cache_path, score_cache_max, tokenizer)) as executor:
+        # executor.map yields the chunk results in submission order
+        for chunk_rows in executor.map(score_chunk, chunks):
+            rows.extend(chunk_rows)
+            if progress:
+                elapsed = perf_counter() - start
+                rate = len(rows) / elapsed if elapsed else 0.0
+                print(f"Scored {len(rows)}/{len(texts)} reviews ({rate:.0f} reviews/s)", flush=True)
+    return rows
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script scores a file of reviews with the Review Analyzer.\n"
+            "The reviews are split into chunks and scored over a pool of worker processes,\n"
+            "then written back out with the VADER scores and the sentiment and emotion labels."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "batch_score.py --input hotel_reviews.csv --output scored_reviews.csv\n"
+            "    --column Review --workers 8 --chunksize 2000 --engine numpy --progress"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--input", required = True, help = "Review file to score (.xlsx, .csv, .jsonl or .parquet; a directory or glob reads several).", metavar = "reviews.csv")
+    parser.add_argument("--output", required = True, help = "Where to write the scored reviews (.xlsx, .csv, .jsonl or .parquet).", metavar = "scored.csv")
+    parser.add_argument("--column", default = "Review", help = "Name of the column holding the review text.", metavar = "Review")
+    parser.add_argument("--workers", type = int, default = None, help = "Number of worker processes (defaults to the number of CPUs).", metavar = "8")
+    parser.add_argument("--chunksize", type = int, default = 1000, help = "Number of reviews sent to a worker at a time.", metavar = "1000")
+    parser.add_argument("--engine", choices = ["nltk", "numpy"], default = "nltk", help = "VADER implementation; 'numpy' scores each chunk with the vectorized scorer.")
+    parser.add_argument("--emotions", action = "store_true", help = "Add the fine-grained emotion distribution from emotion.txt.")
+    parser.add_argument("--tokenizer", choices = ["nltk", "regex"], default = "nltk", help = "Tokenizer used for the emotion lemmas; 'regex' is the fast_tokenize backend.")
+    parser.add_argument("--cache-size", type = int, default = 0, help = "Memoize tokens, lemmas and scores in each worker, keeping up to N entries per cache.", metavar = "100000")
+    parser.add_argument("--score-cache", default = None, help = "SQLite file caching scores across runs; unchanged reviews are not scored again.", metavar = "scores.db")
+    parser.add_argument("--score-cache-max", type = int, default = None, help = "Evict the least recently used entries beyond this many.", metavar = "5000000")
+    parser.add_argument("--progress", action = "store_true", help = "Print progress and throughput after every chunk.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    if args.chunksize < 1:
+        print("--chunksize must be at least 1.")
+        sys.exit(1)
+
+    try:
+        df = read_reviews(args.input)
+    except Exception as e:
+        print(f"Failed to read {args.input}: {str(e)}")
+        sys.exit(1)
+
+    if args.column not in df.columns:
+        print(f"Column '{args.column}' not found in {args.input}. Available columns: {', '.join(map(str, df.columns))}")
+        sys.exit(1)
+
+    texts = df[args.column].fillna("").astype(str).tolist()
+    print(f"Scoring {len(texts)} reviews...")
+    start = perf_counter()
+    rows = score_texts(
+        texts, workers=args.workers, chunksize=args.chunksize, progress=args.progress,
+        engine=args.engine, emotions=args.emotions, cache_size=args.cache_size,
+        score_cache_path=args.score_cache, score_cache_max=args.score_cache_max, tokenizer=args.tokenizer
+    )
+    elapsed = perf_counter() - start
+
+    columns = SCORE_COLUMNS + EMOTION_COLUMNS if args.emotions else SCORE_COLUMNS
+    scores = pd.DataFrame(rows, columns=columns, index=df.index)
+    df = pd.concat([df.drop(columns=[c for c in columns if c in df.columns]), scores], axis=1)
+    write_reviews(df, args.output)
+    if args.score_cache:
+        stats = ScoreCache(args.score_cache).stats()
+        print(f"Score cache: {stats['entries']} entries, {stats['file_bytes'] / (1024 * 1024):.1f} MB")
+    rate = len(texts) / elapsed if elapsed else 0.0
+    print(f"Scored {len(texts)} reviews in {elapsed:.1f}s ({rate:.0f} reviews/s), saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
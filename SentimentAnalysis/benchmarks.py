@@ -0,0 +1,480 @@
+from multiprocessing import get_context
+from time import perf_counter
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import string
+import sys
+from datetime import datetime
+
+PRESENTATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'presentation')
+
+# Hotel aspects used as targets in the synthetic target corpus
+HOTEL_TARGETS = ['staff', 'room', 'breakfast', 'location', 'bed', 'pool', 'service', 'food', 'hotel', 'bathroom']
+
+# Registered benchmarks: name -> Benchmark
+BENCHMARKS = {}
+# Temporary directories made by the running benchmark's setup
+TEMP_DIRS = []
+
+class Benchmark:
+    """
+    A registered benchmark.
+
+    `setup` builds whatever the benchmarked path needs and returns the function
+    to time. Per-review benchmarks are called with one review (or one
+    (target, review) pair) at a time so latency percentiles can be reported;
+    batch benchmarks are called with chunks of `batch_size` items. With
+    prepare=True, `setup` is given the corpus and returns the function along
+    with the items to time it on, so per-corpus preprocessing is not timed.
+    """
+
+    def __init__(self, name, setup, corpus='review', per_review=True, batch_size=1000, prepare=False):
+        self.name = name
+        self.setup = setup
+        self.corpus = corpus
+        self.per_review = per_review
+        self.batch_size = batch_size
+        self.prepare = prepare
+
+def benchmark(name, corpus='review', per_review=True, batch_size=1000, prepare=False):
+    """
+    Decorator registering a benchmark setup function.
+    """
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, corpus, per_review, batch_size, prepare)
+        return setup
+    return register
+
+#------------------------------------
+## Corpora
+
+def load_seed_reviews():
+    """
+    The reviews in presentation/sample_reviews.txt and presentation/target_examples.txt.
+    """
+    with open(os.path.join(PRESENTATION_DIR, 'sample_reviews.txt'), encoding='utf-8') as f:
+        reviews = re.findall(r'"(.+?)"', f.read())
+    with open(os.path.join(PRESENTATION_DIR, 'target_examples.txt'), encoding='utf-8') as f:
+        reviews += re.findall(r'^Review: (.+)$', f.read(), re.MULTILINE)
+    return reviews
+
+def load_seed_targets():
+    """
+    (target, review) pairs from presentation/target_examples.txt.
+    """
+    with open(os.path.join(PRESENTATION_DIR, 'target_examples.txt'), encoding='utf-8') as f:
+        examples = re.findall(r'Target: (.+)\nReview: (.+)', f.read())
+    return [(target.strip(), review) for targets, review in examples for target in targets.split(',')]
+
+def synthetic_reviews(size, seed=0):
+    """
+    `size` reviews built by recombining sentences of the seed reviews.
+
+    The seed reviews themselves come first so small corpora still include them.
+    """
+    rng = random.Random(seed)
+    seeds = load_seed_reviews()
+    sentences = [s for review in seeds for s in re.split(r'(?<=[.!?])\s+', review) if s]
+    reviews = seeds[:size]
+    while len(reviews) < size:
+        reviews.append(" ".join(rng.choice(sentences) for _ in range(rng.randint(2, 6))))
+    return reviews
+
+def synthetic_targets(size, seed=0):
+    """
+    `size` (target, review) pairs: the presentation examples, then hotel aspects over synthetic reviews.
+    """
+    rng = random.Random(seed)
+    pairs = load_seed_targets()[:size]
+    reviews = synthetic_reviews(size, seed)
+    while len(pairs) < size:
+        pairs.append((rng.choice(HOTEL_TARGETS), reviews[len(pairs)]))
+    return pairs
+
+def synthetic_multi_targets(size, seed=0):
+    """
+    `size` (targets, review) items: the presentation examples with all their targets, then four hotel aspects per synthetic review.
+    """
+    rng = random.Random(seed)
+    with open(os.path.join(PRESENTATION_DIR, 'target_examples.txt'), encoding='utf-8') as f:
+        examples = re.findall(r'Target: (.+)\nReview: (.+)', f.read())
+    items = [([target.strip() for target in targets.split(',')], review) for targets, review in examples][:size]
+    reviews = synthetic_reviews(size, seed)
+    while len(items) < size:
+        items.append((rng.sample(HOTEL_TARGETS, 4), reviews[len(items)]))
+    return items
+
+def synthetic_high_vocab_reviews(size, seed=0):
+    """
+    synthetic_reviews() with about a third of the words replaced by made up ones.
+
+    The vocabulary keeps growing with the corpus, like the names, typos and
+    foreign words of real reviews, so token caches are always missing.
+    """
+    rng = random.Random(seed)
+    reviews = []
+    for review in synthetic_reviews(size, seed):
+        words = review.split()
+        for i in range(len(words)):
+            if rng.random() < 0.3:
+                word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+                words[i] = word.capitalize() if rng.random() < 0.2 else word
+        reviews.append(" ".join(words))
+    return reviews
+
+CORPORA = {
+    'review': synthetic_reviews,
+    'target': synthetic_targets,
+    'multi_target': synthetic_multi_targets,
+    'high_vocab': synthetic_high_vocab_reviews,
+}
+
+def build_corpus(kind, size, seed=0):
+    return CORPORA[kind](size, seed)
+
+#------------------------------------
+## Benchmarked paths
+
+def legacy_analyze_review(reviewText):
+    """
+    The scoring logic of ReviewDeter.analyze_review before ReviewAnalyzer, kept as a baseline.
+    """
+    from nltk.tokenize import word_tokenize
+    from nltk.corpus import stopwords
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    from nltk.stem import WordNetLemmatizer
+
+    lower_case = reviewText.lower()
+    clean_text = lower_case.translate(str.maketrans('', '', string.punctuation))
+    token_text = word_tokenize(clean_text, "english")
+    deter_text = [word for word in token_text if word not in stopwords.words('english')]
+    lemma_words = [WordNetLemmatizer().lemmatize(word) for word in deter_text]
+    score = SentimentIntensityAnalyzer().polarity_scores(clean_text)
+    return score, lemma_words
+
+def legacy_determine_sentiment(target, review):
+    """
+    TargetReview.determine_sentiment as it was, building a VADER analyzer per call.
+    """
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    import TargetReview
+
+    TargetReview.disable_cache()
+    target_context = TargetReview.extract_target_context(target, review)
+    if not target_context:
+        return None
+    return SentimentIntensityAnalyzer().polarity_scores(target_context)
+
+@benchmark('review.legacy')
+def setup_review_legacy():
+    return legacy_analyze_review
+
+@benchmark('review.analyzer')
+def setup_review_analyzer():
+    from review_analyzer import ReviewAnalyzer
+    return ReviewAnalyzer().analyze
+
+@benchmark('review.analyzer_cached')
+def setup_review_analyzer_cached():
+    from review_analyzer import ReviewAnalyzer
+    from analysis_cache import AnalysisCache
+    return ReviewAnalyzer(cache=AnalysisCache()).analyze
+
+@benchmark('review.analyzer_profiled')
+def setup_review_analyzer_profiled():
+    from review_analyzer import ReviewAnalyzer
+    import profiling
+    profiling.enable_profiling()
+    return ReviewAnalyzer().analyze
+
+@benchmark('high_vocab.review.batch_numpy', corpus='high_vocab', per_review=False)
+@benchmark('review.batch_numpy', per_review=False)
+def setup_review_batch_numpy():
+    from review_analyzer import ReviewAnalyzer
+    return ReviewAnalyzer(engine="numpy").analyze_batch
+
+@benchmark('high_vocab.vader.nltk', corpus='high_vocab')
+@benchmark('vader.nltk')
+def setup_vader_nltk():
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer().polarity_scores
+
+@benchmark('high_vocab.vader.numpy', corpus='high_vocab', per_review=False)
+@benchmark('vader.numpy', per_review=False)
+def setup_vader_numpy():
+    from vader_numpy import VectorizedVader
+    return VectorizedVader().polarity_scores_batch
+
+@benchmark('target.legacy', corpus='target')
+def setup_target_legacy():
+    return lambda pair: legacy_determine_sentiment(*pair)
+
+@benchmark('target.determine_sentiment', corpus='target')
+def setup_target_determine_sentiment():
+    import TargetReview
+    TargetReview.disable_cache()
+    return lambda pair: TargetReview.determine_sentiment(*pair)
+
+@benchmark('target.extract_context', corpus='target')
+def setup_target_extract_context():
+    import TargetReview
+    TargetReview.disable_cache()
+    return lambda pair: TargetReview.extract_target_context(*pair)
+
+@benchmark('target.determine_sentiment_cached', corpus='target')
+def setup_target_cached():
+    import TargetReview
+    TargetReview.enable_cache()
+    return lambda pair: TargetReview.determine_sentiment(*pair)
+
+@benchmark('multi_target.determine_sentiment', corpus='multi_target')
+def setup_multi_target_determine_sentiment():
+    import TargetReview
+    TargetReview.disable_cache()
+    return lambda item: [TargetReview.determine_sentiment(target, item[1]) for target in item[0]]
+
+@benchmark('multi_target.analyze_targets', corpus='multi_target')
+def setup_multi_target_analyze_targets():
+    import TargetReview
+    TargetReview.disable_cache()
+    return lambda item: TargetReview.analyze_targets(*item)
+
+@benchmark('aspect_index.build', per_review=False)
+def setup_aspect_index_build():
+    from aspect_index import AspectIndex
+    return AspectIndex().add_many
+
+@benchmark('tokenize.nltk')
+def setup_tokenize_nltk():
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
+
+@benchmark('tokenize.regex')
+def setup_tokenize_regex():
+    import fast_tokenize
+    return fast_tokenize.word_tokenize
+
+@benchmark('high_vocab.tokenize.regex_batch', corpus='high_vocab', per_review=False)
+@benchmark('tokenize.regex_batch', per_review=False)
+def setup_tokenize_regex_batch():
+    import fast_tokenize
+    return fast_tokenize.word_tokenize_batch
+
+@benchmark('review.analyzer_regex')
+def setup_review_analyzer_regex():
+    from review_analyzer import ReviewAnalyzer
+    return ReviewAnalyzer(tokenizer="regex").analyze
+
+@benchmark('target.determine_sentiment_regex', corpus='target')
+def setup_target_determine_sentiment_regex():
+    import TargetReview
+    TargetReview.disable_cache()
+    TargetReview.set_tokenizer("regex")
+    return lambda pair: TargetReview.determine_sentiment(*pair)
+
+def segmented_corpus(reviews):
+    """
+    Segment reviews into a temporary sidecar and open it.
+
+    The sidecar is removed by remove_temp_dirs() once the benchmark is done.
+    """
+    import tempfile
+    from segmentation import segment_reviews, Segmentation
+    directory = tempfile.TemporaryDirectory(prefix='bench-segments-')
+    TEMP_DIRS.append(directory)
+    segment_reviews(reviews, directory.name)
+    return Segmentation(directory.name)
+
+@benchmark('target.extract_context_segmented', corpus='target', prepare=True)
+def setup_target_extract_context_segmented(pairs):
+    import TargetReview
+    TargetReview.disable_cache()
+    segmentation = segmented_corpus([review for _, review in pairs])
+    items = [(target, i) for i, (target, _) in enumerate(pairs)]
+    return (lambda item: TargetReview.extract_target_context(item[0], None, segmentation.sentences(item[1]))), items
+
+@benchmark('review.batch_numpy_segmented', per_review=False, prepare=True)
+def setup_review_batch_numpy_segmented(reviews):
+    from review_analyzer import ReviewAnalyzer
+    analyzer = ReviewAnalyzer(engine="numpy")
+    segmentation = segmented_corpus(reviews)
+    def analyze(ids):
+        return analyzer.analyze_pretokenized([segmentation.clean_text(i) for i in ids], [segmentation.clean_tokens(i) for i in ids])
+    return analyze, list(range(len(reviews)))
+
+#------------------------------------
+## Runner
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def remove_temp_dirs():
+    while TEMP_DIRS:
+        TEMP_DIRS.pop().cleanup()
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+def run_benchmark(name, size, time_budget, seed=0):
+    """
+    Run one benchmark on a corpus of `size` items and return its metrics.
+
+    Stops early once `time_budget` seconds have been spent timing, so slow
+    baselines can still be measured against the large corpora.
+    """
+    bench = BENCHMARKS[name]
+    corpus = build_corpus(bench.corpus, size, seed)
+    rss_before = peak_rss_mb()
+    latencies = []
+    processed = 0
+    elapsed = 0.0
+    try:
+        if bench.prepare:
+            func, corpus = bench.setup(corpus)
+        else:
+            func = bench.setup()
+
+        if bench.per_review:
+            for item in corpus:
+                start = perf_counter()
+                func(item)
+                latency = perf_counter() - start
+                latencies.append(latency)
+                elapsed += latency
+                processed += 1
+                if elapsed > time_budget:
+                    break
+        else:
+            for i in range(0, len(corpus), bench.batch_size):
+                batch = corpus[i:i + bench.batch_size]
+                start = perf_counter()
+                func(batch)
+                elapsed += perf_counter() - start
+                processed += len(batch)
+                if elapsed > time_budget:
+                    break
+    finally:
+        # Drop the memory maps into the temporary sidecars before removing them
+        func = corpus = None
+        remove_temp_dirs()
+
+    latencies.sort()
+    rss_after = peak_rss_mb()
+    to_ms = lambda value: value * 1000 if value is not None else None
+    return {
+        'benchmark': name,
+        'corpus_size': size,
+        'processed': processed,
+        'seconds': elapsed,
+        'reviews_per_second': processed / elapsed if elapsed else 0.0,
+        'mean_latency_ms': elapsed / processed * 1000 if processed else None,
+        'p50_ms': to_ms(percentile(latencies, 50)),
+        'p90_ms': to_ms(percentile(latencies, 90)),
+        'p99_ms': to_ms(percentile(latencies, 99)),
+        'peak_rss_mb': rss_after,
+        'benchmark_rss_mb': rss_after - rss_before if rss_after is not None else None,
+    }
+
+def run_isolated(name, size, time_budget, seed=0):
+    """
+    Run a benchmark in a fresh process so its peak memory is not shared with the others.
+    """
+    with get_context('spawn').Pool(1) as pool:
+        return pool.apply(run_benchmark, (name, size, time_budget, seed))
+
+def compare(results, baseline, threshold):
+    """
+    Compare throughput with an earlier results file.
+
+    Returns the rows that got slower by more than `threshold` (a fraction).
+    """
+    previous = {(r['benchmark'], r['corpus_size']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['benchmark'], result['corpus_size']))
+        if not old or not old['reviews_per_second']:
+            continue
+        change = result['reviews_per_second'] / old['reviews_per_second'] - 1
+        marker = ""
+        if change < -threshold:
+            regressions.append(result)
+            marker = "  REGRESSION"
+        print(f"{result['benchmark']:<36} {result['corpus_size']:>9} {old['reviews_per_second']:>12.0f} -> {result['reviews_per_second']:>12.0f} reviews/s ({change:+.1%}){marker}")
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmarks for the review and target sentiment paths.\n"
+            "Each benchmark runs in its own process on corpora seeded from the presentation\n"
+            "examples and reports reviews/sec, latency percentiles and peak memory."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "benchmarks.py --sizes 1000,100000,1000000 --output bench.json\n"
+            "benchmarks.py --only target --compare bench.json"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", default = "1000", help = "Comma separated corpus sizes.", metavar = "1000,100000,1000000")
+    parser.add_argument("--only", default = None, help = "Only run benchmarks whose name contains one of these comma separated words.", metavar = "review,vader")
+    parser.add_argument("--time-budget", type = float, default = 20.0, help = "Seconds of timing per benchmark before it stops early.", metavar = "20")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed for the synthetic corpora.", metavar = "0")
+    parser.add_argument("--output", default = None, help = "Save the results as JSON.", metavar = "bench.json")
+    parser.add_argument("--compare", default = None, help = "Earlier results file to compare throughput against.", metavar = "baseline.json")
+    parser.add_argument("--threshold", type = float, default = 0.1, help = "Slowdown fraction reported as a regression.", metavar = "0.1")
+    parser.add_argument("--list", action = "store_true", help = "List the benchmarks and exit.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    names = list(BENCHMARKS)
+    if args.list:
+        print("\n".join(names))
+        return
+    if args.only:
+        words = args.only.split(',')
+        names = [name for name in names if any(word in name for word in words)]
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    results = []
+    for size in sizes:
+        for name in names:
+            result = run_isolated(name, size, args.time_budget, args.seed)
+            results.append(result)
+            p99 = f"{result['p99_ms']:.2f} ms" if result['p99_ms'] is not None else "-"
+            print(f"{name:<36} {size:>9} {result['reviews_per_second']:>12.0f} reviews/s  p99 {p99:>10}  peak {result['peak_rss_mb']:.0f} MB", flush=True)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'time_budget': args.time_budget,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
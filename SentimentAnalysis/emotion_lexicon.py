@@ -0,0 +1,84 @@
+import ast
+import os
+from collections import Counter
+
+# Word -> emotion mapping shipped with the project
+EMOTION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'emotion.txt')
+
+# Key under which a trie node stores the emotion of the phrase ending there
+_EMOTION = None
+
+def load_emotion_file(path=EMOTION_FILE):
+    """
+    Read emotion.txt, which holds the body of a Python dict of phrase -> emotion.
+    """
+    with open(path, encoding='utf-8') as f:
+        return ast.literal_eval('{' + f.read() + '}')
+
+class EmotionLexicon:
+    """
+    Fine-grained emotion classifier compiled from emotion.txt.
+
+    Every phrase is run through the same normalization, stop word removal and
+    lemmatization as the review text, then stored in a token trie. Matching a
+    review is a single left-to-right pass over its lemmas that takes the longest
+    phrase starting at each position, so the cost does not grow with the size
+    of the lexicon.
+    """
+
+    def __init__(self, analyzer, path=EMOTION_FILE):
+        self.trie = {}
+        for phrase, emotion in load_emotion_file(path).items():
+            tokens = analyzer.lemmatize(analyzer.remove_stopwords(analyzer.tokenize(analyzer.normalize(phrase))))
+            if tokens:
+                self.add(tokens, emotion)
+
+    def add(self, tokens, emotion):
+        """
+        Add a phrase to the trie. The first emotion registered for a phrase is kept.
+        """
+        node = self.trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_EMOTION, emotion)
+
+    def match(self, tokens):
+        """
+        Find the emotion phrases in a list of lemmas.
+
+        Returns (start, end, emotion) tuples for the longest, non-overlapping matches.
+        """
+        matches = []
+        i = 0
+        n = len(tokens)
+        while i < n:
+            node = self.trie
+            best = None
+            j = i
+            while j < n:
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if _EMOTION in node:
+                    best = (i, j, node[_EMOTION])
+            if best:
+                matches.append(best)
+                i = best[1]
+            else:
+                i += 1
+        return matches
+
+    def distribution(self, tokens):
+        """
+        Share of each emotion among the phrases matched in a list of lemmas.
+        """
+        counts = Counter(emotion for _, _, emotion in self.match(tokens))
+        total = sum(counts.values())
+        return {emotion: count / total for emotion, count in counts.most_common()}
+
+    def distribution_batch(self, token_lists):
+        """
+        Emotion distribution for each list of lemmas, in input order.
+        """
+        return [self.distribution(tokens) for tokens in token_lists]
@@ -0,0 +1,115 @@
+import re
+
+# Words whose trailing period does not end a sentence
+ABBREVIATIONS = frozenset([
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'vs', 'etc', 'e.g', 'i.e', 'approx',
+    'no', 'nos', 'vol', 'fig', 'inc', 'ltd', 'co', 'corp', 'dept', 'est', 'ave', 'rd', 'blvd',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+    'a.m', 'p.m', 'u.s', 'u.k',
+])
+
+# Sentence ending punctuation with any closing quotes or brackets, followed by whitespace
+SENTENCE_END = re.compile(r'([.!?]+)(["\')\]’”»]*)\s+(?=\S)')
+WORD_BEFORE = re.compile(r'(\S+?)$')
+
+# The substitutions of NLTK's NLTKWordTokenizer (the tokenizer behind
+# nltk.word_tokenize), merged into as few passes as their order allows.
+# Every pattern works line by line so a batch of sentences can be
+# tokenized as one newline separated string.
+STARTING_PADDED = re.compile(r'[«“‘„]|`+')
+LEADING_QUOTE = re.compile(r'^"', re.MULTILINE)
+OPENING_QUOTES = re.compile(r'(?<=[ (\[{<])(?:"|\'\')')
+OPENING_APOSTROPHE = re.compile(r"(?i)(?<!\w)(')(?!(?:re|ve|ll|m|t|s|d|n)\b)(?=\w)")
+PADDED = re.compile(
+    r'[»”’]|\.{2,}|--|[;@#$%&?!*\[\](){}<>‒-―]|[:,]$',
+    re.MULTILINE
+)
+# Consumes the following character like NLTK does, so ",," only pads the first comma
+SEPARATORS = re.compile(r'([:,])([^\d\n])')
+FINAL_PERIOD = re.compile(r'(?<=[^.\n])\.(?=[\]\)}>"\'»”’ ]*[ \t\r\f\v]*$)', re.MULTILINE)
+CLOSING_QUOTES = re.compile(r"''|\"")
+TRAILING_APOSTROPHE = re.compile(r"(?<=[^'\s])'(?=[ \t\r\f\v])")
+CLITICS = re.compile(r"(?<=[^'\s])('[sSmMdD]|')(?=\s|$)", re.MULTILINE)
+LONG_CLITICS = re.compile(r"(?<=[^'\s])('ll|'LL|'re|'RE|'ve|'VE|n't|N'T)(?=\s|$)", re.MULTILINE)
+CONTRACTIONS = re.compile(
+    r"\b(?:(can)(not)|(d)('ye)|(gim)(me)|(gon)(na)|(got)(ta)|(lem)(me)|(more)('n))\b|\b(wan)(na)(?=\s|$)",
+    re.IGNORECASE | re.MULTILINE
+)
+OLD_CONTRACTIONS = re.compile(r"(?<!\S)('t)(is|was)\b", re.IGNORECASE)
+
+def _split_contraction(match):
+    return " " + " ".join(part for part in match.groups() if part) + " "
+
+def sent_tokenize(text):
+    """
+    Split text into sentences at ., ! and ? followed by whitespace.
+
+    A single period after a known abbreviation or an initial does not end a
+    sentence, which covers what Punkt does on review text.
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        if match.group(1) == '.':
+            word = WORD_BEFORE.search(text, start, match.start())
+            if word is not None:
+                word = word.group(1).lstrip('("\'').lower()
+                if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                    continue
+        sentences.append(text[start:match.end(2)])
+        start = match.end()
+    rest = text[start:].strip()
+    if rest:
+        sentences.append(rest)
+    return sentences
+
+def _tokenize_lines(text):
+    # Same order as NLTKWordTokenizer: starting quotes, punctuation, ending quotes, contractions
+    text = STARTING_PADDED.sub(r' \g<0> ', text)
+    text = LEADING_QUOTE.sub(' `` ', text)
+    text = OPENING_QUOTES.sub(' `` ', text)
+    text = OPENING_APOSTROPHE.sub(r"\1 ", text)
+    text = FINAL_PERIOD.sub(' . ', text)
+    text = SEPARATORS.sub(r' \1 \2', text)
+    text = PADDED.sub(r' \g<0> ', text)
+    text = CLOSING_QUOTES.sub(" '' ", text)
+    text = TRAILING_APOSTROPHE.sub(" ' ", text)
+    text = CLITICS.sub(r" \1 ", text)
+    text = LONG_CLITICS.sub(r" \1 ", text)
+    text = CONTRACTIONS.sub(_split_contraction, text)
+    return OLD_CONTRACTIONS.sub(_split_contraction, text)
+
+def tokenize_sentence(sentence):
+    """
+    Word tokenize one sentence like nltk's NLTKWordTokenizer.
+    """
+    return _tokenize_lines(sentence.replace('\n', ' ')).split()
+
+def word_tokenize(text):
+    """
+    Drop-in replacement for nltk.word_tokenize: split into sentences, then tokenize each.
+    """
+    return [token for tokens in tokenize_sentences(sent_tokenize(text)) for token in tokens]
+
+def tokenize_sentences(sentences):
+    """
+    Word tokenize many sentences at once.
+
+    The sentences are joined into one newline separated string so each
+    substitution runs once for the whole batch instead of once per sentence.
+    """
+    if not sentences:
+        return []
+    joined = "\n".join(sentence.replace('\n', ' ') for sentence in sentences)
+    return [line.split() for line in _tokenize_lines(joined).split('\n')]
+
+def sent_tokenize_batch(texts):
+    return [sent_tokenize(text) for text in texts]
+
+def word_tokenize_batch(texts):
+    """
+    word_tokenize() for a list of texts, tokenizing all their sentences in one batch.
+    """
+    sentences = sent_tokenize_batch(texts)
+    tokens = iter(tokenize_sentences([s for text_sentences in sentences for s in text_sentences]))
+    return [[token for _ in text_sentences for token in next(tokens)] for text_sentences in sentences]
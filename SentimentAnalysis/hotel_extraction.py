@@ -0,0 +1,265 @@
+from urllib.parse import urlsplit
+from time import perf_counter
+import re
+
+# Search parameters, named like the scrapers' command line options
+SEARCH_FIELDS = ['city', 'country', 'indate', 'outdate', 'nadult', 'nchild', 'nroom']
+
+# Property cards of a Booking.com search results page
+CARD_SELECTOR = '[data-testid="property-card"]'
+
+# Runs in the page: reads the raw fields of every card from `start` on in one
+# round trip. Mirrors the per-field locators of extract_card(): a test id must
+# match exactly one element (strict mode), and the review score parts must be
+# visible, located with the same XPaths relative to the review-score element.
+EXTRACT_CARDS_JS = """
+(cards, start) => {
+    const visible = (el) => {
+        const style = getComputedStyle(el);
+        if (style.visibility !== 'visible') return false;
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+    const only = (card, testId) => {
+        const found = card.querySelectorAll(`[data-testid="${testId}"]`);
+        return found.length === 1 ? found[0].innerText : null;
+    };
+    const visibleText = (root, xpath) => {
+        if (!root) return null;
+        const el = document.evaluate(xpath, root, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        return el && visible(el) ? el.innerText : null;
+    };
+    return cards.slice(start).map((card) => {
+        const score = card.querySelector('[data-testid="review-score"]');
+        const link = card.querySelector('a[href]');
+        return {
+            url: link ? link.href : null,
+            title: only(card, 'title'),
+            price: only(card, 'price-and-discounted-price'),
+            taxes: only(card, 'taxes-and-charges'),
+            reviews_count: visibleText(score, './/div[2]/div[2]'),
+            overall_rate: visibleText(score, './/div[1]/div[1]'),
+            gpa: visibleText(score, './/div[2]/div[1]'),
+        };
+    });
+}
+"""
+
+def search_url(search, base_url="https://www.booking.com"):
+    """
+    Booking.com search results URL for a dict of SEARCH_FIELDS.
+    """
+    return (f'{base_url.rstrip("/")}/searchresults.html?ss={search["city"]}%2C+{search["country"]}'
+            f'&checkin={search["indate"]}&checkout={search["outdate"]}&group_adults={search["nadult"]}'
+            f'&no_rooms={search["nroom"]}&group_children={search["nchild"]}')
+
+def clean_price(text):
+    return text.replace('&nbsp;', ' ').strip()
+
+# The currency in front of an amount, e.g. "EGP" in "EGP 4,520" or "US$" in "US$120"
+CURRENCY_RE = re.compile(r'\s*([^\d\s.,]*)\s*\d')
+
+def clean_taxes(text, price="N/A"):
+    """
+    Taxes without the "+" and "taxes and fees"; "Includes taxes and fees" becomes 0 in the currency of `price`.
+    """
+    text = text.replace('taxes and fees', '').replace('+', '').replace('&nbsp;', ' ').strip()
+    if text.startswith('Includes'):
+        currency = CURRENCY_RE.match(price)
+        return f"{currency.group(1) if currency else ''} 0".strip()
+    return text
+
+# One whole amount with an optional currency in front, e.g. "EGP 4,520" or "US$120"
+MONEY_RE = re.compile(r'\s*([^\d\s.,]*)\s*(\d[\d,]*)\s*')
+
+def total_cost(price, taxes):
+    """
+    Price plus taxes in the currency of the price (or of the taxes), "N/A" unless both are single amounts.
+    """
+    price_match, taxes_match = MONEY_RE.fullmatch(price), MONEY_RE.fullmatch(taxes)
+    if price_match is None or taxes_match is None:
+        return "N/A"
+    currency = price_match.group(1) or taxes_match.group(1)
+    return f"{currency} {int(price_match.group(2).replace(',', '')) + int(taxes_match.group(2).replace(',', ''))}".strip()
+
+def parse_card(raw):
+    """
+    Turn the raw fields read by EXTRACT_CARDS_JS into a hotel dict, the same one extract_card() builds.
+    """
+    hotel_dict = {}
+    hotel_dict['Hotel'] = raw['title'] if raw['title'] is not None else "N/A"
+    hotel_dict['Price'] = clean_price(raw['price']) if raw['price'] is not None else "N/A"
+    hotel_dict['Taxes & Charges'] = clean_taxes(raw['taxes'], hotel_dict['Price']) if raw['taxes'] is not None else "N/A"
+    hotel_dict['Total Cost'] = total_cost(hotel_dict['Price'], hotel_dict['Taxes & Charges'])
+    hotel_dict['Reviews Count'] = raw['reviews_count'] if raw['reviews_count'] is not None else "N/A"
+    if raw['overall_rate'] is not None and raw['gpa'] is not None:
+        hotel_dict['Overall Rate'] = raw['overall_rate'].replace('Scored ', '') + " - " + raw['gpa']
+    else:
+        hotel_dict['Overall Rate'] = "N/A"
+    return hotel_dict
+
+def parse_cards(raws):
+    return [parse_card(raw) for raw in raws]
+
+def hotel_key(raw):
+    """
+    Stable identity of a property card: its hotel page path, or its name and price when it has no link.
+    """
+    if raw.get('url'):
+        return urlsplit(raw['url']).path
+    return f"{raw['title']}|{raw['price']}"
+
+def extract_card(hotel, timeout=None):
+    """
+    Extract one property card field by field, with a Playwright round trip per field.
+
+    This is the original extraction; `timeout` (ms) bounds the wait for a missing field.
+    """
+    hotel_dict = {}
+    # Extract hotel name
+    try:
+        hotel_dict['Hotel'] = hotel.get_by_test_id("title").inner_text(timeout=timeout)
+    except Exception:
+        hotel_dict['Hotel'] = "N/A"
+
+    # Extract price
+    try:
+        hotel_dict['Price'] = clean_price(hotel.get_by_test_id("price-and-discounted-price").inner_text(timeout=timeout))
+    except Exception:
+        hotel_dict['Price'] = "N/A"
+
+    # Extract taxes and charges
+    try:
+        hotel_dict['Taxes & Charges'] = clean_taxes(hotel.get_by_test_id("taxes-and-charges").inner_text(timeout=timeout), hotel_dict['Price'])
+    except Exception:
+        hotel_dict['Taxes & Charges'] = "N/A"
+
+    # Calculate total cost
+    hotel_dict['Total Cost'] = total_cost(hotel_dict['Price'], hotel_dict['Taxes & Charges'])
+
+    # Extract reviews count
+    review_count = hotel.get_by_test_id("review-score").locator('//div[2]/div[2]')
+    if review_count.is_visible():
+        try:
+            hotel_dict['Reviews Count'] = review_count.inner_text(timeout=timeout)
+        except Exception:
+            hotel_dict['Reviews Count'] = "N/A"
+    else:
+        hotel_dict['Reviews Count'] = "N/A"
+
+    # Extract overall rating
+    overall_rate = hotel.get_by_test_id("review-score").locator('//div[1]/div[1]')
+    gpa = hotel.get_by_test_id("review-score").locator('//div[2]/div[1]')
+    if overall_rate.is_visible() and gpa.is_visible():
+        hotel_dict['Overall Rate'] = overall_rate.inner_text(timeout=timeout).replace('Scored ', '') + " - " + gpa.inner_text(timeout=timeout)
+    else:
+        hotel_dict['Overall Rate'] = "N/A"
+    return hotel_dict
+
+def extract_hotels_bulk(page, start=0):
+    """
+    Extract the property cards from the `start`-th on with a single evaluate_all() call.
+    """
+    return parse_cards(page.locator(CARD_SELECTOR).evaluate_all(EXTRACT_CARDS_JS, start))
+
+def extract_hotels_locators(page, start=0, timeout=None):
+    """
+    Extract the property cards from the `start`-th on one field at a time, as the scrapers used to.
+    """
+    return [extract_card(hotel, timeout) for hotel in page.get_by_test_id("property-card").all()[start:]]
+
+# Extraction modes for the scrapers' --extraction option
+EXTRACTORS = {
+    "bulk": extract_hotels_bulk,
+    "locators": extract_hotels_locators,
+}
+
+def extract_hotels(page, mode="bulk", start=0):
+    """
+    List of hotel dicts of the search results page, one per property card.
+    """
+    if mode not in EXTRACTORS:
+        raise ValueError(f"Unknown extraction mode {mode!r}, expected one of {sorted(EXTRACTORS)}")
+    return EXTRACTORS[mode](page, start=start)
+
+class IncrementalExtractor:
+    """
+    Extracts only the property cards appended since the previous call.
+
+    Call it after every pagination step: the new cards are read in one
+    evaluate_all() call from where the last call stopped, cards already seen
+    (by hotel_key) are dropped and the new hotel dicts are written to
+    `sink` straight away, so nothing accumulates in memory.
+
+    A resumed scrape passes the keys of the hotels it already has as `seen`
+    and extracts from the first card, so hotels that moved up the ranking
+    since the last run are still found. `on_extract(keys, hotels, cards)` is
+    called with every batch of new hotels, e.g. to checkpoint them.
+    """
+
+    def __init__(self, page, sink=None, start=0, seen=(), on_extract=None):
+        self.page = page
+        self.sink = sink
+        self.start = start
+        self.seen = set(seen)
+        self.on_extract = on_extract
+        self.count = 0
+        self.duplicates = 0
+        self.started = perf_counter()
+        self.first_row_seconds = None
+
+    def __call__(self, *args):
+        return self.add(self.page.locator(CARD_SELECTOR).evaluate_all(EXTRACT_CARDS_JS, self.start))
+
+    async def extract_async(self, *args):
+        """
+        __call__() for a page of the async API.
+        """
+        return self.add(await self.page.locator(CARD_SELECTOR).evaluate_all(EXTRACT_CARDS_JS, self.start))
+
+    def add(self, raws):
+        """
+        Take the raw dicts of the cards after `start`; returns the hotel dicts not seen before.
+        """
+        self.start += len(raws)
+        keys, hotels = [], []
+        for raw in raws:
+            key = hotel_key(raw)
+            if key in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(key)
+            keys.append(key)
+            hotels.append(parse_card(raw))
+        if hotels:
+            if self.first_row_seconds is None:
+                self.first_row_seconds = perf_counter() - self.started
+            if self.sink is not None:
+                self.sink.write(hotels)
+            self.count += len(hotels)
+        if self.on_extract is not None and raws:
+            self.on_extract(keys, hotels, self.start)
+        return hotels
+
+def compare_extraction(page, timeout=1000):
+    """
+    Run both extraction modes on a loaded page and report their timings and differences.
+
+    Returns a dict with the card count, the seconds each mode took and the
+    indices of the cards whose dicts differ.
+    """
+    start = perf_counter()
+    bulk = extract_hotels_bulk(page)
+    bulk_seconds = perf_counter() - start
+
+    start = perf_counter()
+    locators = extract_hotels_locators(page, timeout=timeout)
+    locator_seconds = perf_counter() - start
+
+    return {
+        'cards': len(bulk),
+        'bulk_seconds': bulk_seconds,
+        'locator_seconds': locator_seconds,
+        'mismatches': [i for i, (a, b) in enumerate(zip(bulk, locators)) if a != b] + list(range(min(len(bulk), len(locators)), max(len(bulk), len(locators)))),
+        'hotels': bulk,
+    }
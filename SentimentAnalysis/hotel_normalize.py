@@ -0,0 +1,124 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+# Currency symbols Booking.com shows instead of an ISO code
+CURRENCY_SYMBOLS = {
+    'US$': 'USD', '$': 'USD', 'HK$': 'HKD', 'C$': 'CAD', 'CA$': 'CAD', 'A$': 'AUD', 'AU$': 'AUD', 'NZ$': 'NZD',
+    'S$': 'SGD', '€': 'EUR', '£': 'GBP', '¥': 'JPY', 'JP¥': 'JPY', 'CN¥': 'CNY', '₹': 'INR', '₩': 'KRW',
+    'R$': 'BRL', '₺': 'TRY', '฿': 'THB', 'zł': 'PLN', 'E£': 'EGP', 'AED': 'AED',
+}
+
+# The currency in front of the first amount, e.g. "EGP" in "EGP 4,520" or "US$" in "US$120"
+CURRENCY_PATTERN = r'^\s*\+?\s*([^\d\s.,+]+)\s*\d'
+# The last amount of a field, so a discounted price "EGP 5,000EGP 4,250" gives 4,250
+AMOUNT_PATTERN = r'(\d[\d,]*(?:\.\d+)?)(?!.*\d)'
+# "8.1 - Very good" -> 8.1 and "Very good"
+RATING_PATTERN = r'^\s*(\d+(?:\.\d+)?)\s*-\s*(.+?)\s*$'
+
+# Typed columns added by normalize_hotels()
+NORMALIZED_COLUMNS = ['price', 'taxes', 'total_cost', 'currency', 'reviews_count', 'rating', 'rating_label']
+
+def _by_value(column, parse):
+    """
+    Apply `parse` to the distinct values of a column only and spread the results back by their codes.
+
+    Scraped columns repeat the same strings (ratings, currencies, common
+    prices) over and over, so this parses a fraction of the rows.
+    """
+    codes, uniques = pd.factorize(column)
+    parsed = parse(pd.Series(uniques, dtype='string'))
+    if parsed.dtype == np.float32:
+        values = np.append(parsed.to_numpy(), np.float32(np.nan))
+    else:
+        values = np.append(parsed.astype(object).where(parsed.notna(), None).to_numpy(), None)
+    # Missing values have code -1, which picks the NaN/None appended last
+    return values[codes]
+
+def _amounts(values):
+    """
+    float32 of the last amount in each string, NaN where there is none.
+    """
+    amounts = values.str.extract(AMOUNT_PATTERN, expand=False).str.replace(',', '', regex=False)
+    return pd.to_numeric(amounts, errors='coerce').astype(np.float32)
+
+def _currencies(values):
+    return values.str.extract(CURRENCY_PATTERN, expand=False).str.strip().replace(CURRENCY_SYMBOLS)
+
+def _ratings(values):
+    return pd.to_numeric(values.str.extract(RATING_PATTERN, expand=False)[0], errors='coerce').astype(np.float32)
+
+def _rating_labels(values):
+    return values.str.extract(RATING_PATTERN, expand=False)[1]
+
+def normalize_hotels(df, keep_raw=True):
+    """
+    Parse the scraped 'Price', 'Taxes & Charges', 'Reviews Count' and 'Overall Rate' strings into typed columns.
+
+    Adds price, taxes and total_cost (float32, in the detected currency),
+    currency (category of ISO codes, detected from the price or else the
+    taxes or total cost), reviews_count and rating (float32) and rating_label (category).
+    Missing or unparseable values become NaN. Each column is parsed once,
+    vectorized over its distinct values; keep_raw=False drops the raw
+    strings, leaving a much smaller frame.
+    """
+    out = df.copy()
+    raw = {column: df[column].where(df[column] != "N/A") if column in df else pd.Series(np.nan, index=df.index, dtype=object)
+           for column in ['Price', 'Taxes & Charges', 'Reviews Count', 'Overall Rate']}
+
+    out['price'] = _by_value(raw['Price'], _amounts)
+    out['taxes'] = _by_value(raw['Taxes & Charges'], _amounts)
+    out['total_cost'] = out['price'] + out['taxes']
+    currency = _by_value(raw['Price'], _currencies)
+    for column in ['Taxes & Charges', 'Total Cost']:
+        missing = pd.isna(currency)
+        if missing.any() and column in df:
+            currency[missing] = _by_value(df[column].where(df[column] != "N/A"), _currencies)[missing]
+    out['currency'] = pd.Categorical(currency)
+    out['reviews_count'] = _by_value(raw['Reviews Count'], _amounts)
+    out['rating'] = _by_value(raw['Overall Rate'], _ratings)
+    out['rating_label'] = pd.Categorical(_by_value(raw['Overall Rate'], _rating_labels))
+    if not keep_raw:
+        out = out.drop(columns=[column for column in ['Price', 'Taxes & Charges', 'Total Cost', 'Reviews Count', 'Overall Rate']
+                                if column in out])
+    return out
+
+def main_currency(df):
+    """
+    The most common currency of a normalized frame, or None when no price had one.
+    """
+    counts = df['currency'].value_counts()
+    return counts.index[0] if len(counts) and counts.iloc[0] else None
+
+def main():
+    from hotel_output import load_frame
+    from batch_score import write_reviews
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script normalizes scraped hotel files into typed numeric columns\n"
+            "and reports how much memory the normalized table takes compared to the raw one."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "hotel_normalize.py \"scrapes/*.parquet\" --output hotels_normalized.parquet"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input", nargs = "+", help = "Hotel files, directories or glob patterns.", metavar = "hotels.jsonl")
+    parser.add_argument("--output", default = None, help = "Where to write the normalized hotels (.parquet, .csv, .jsonl or .xlsx).", metavar = "hotels_normalized.parquet")
+    parser.add_argument("--keep-raw", action = "store_true", help = "Keep the raw text columns next to the parsed ones.")
+    args = parser.parse_args()
+
+    df = load_frame(args.input)
+    normalized = normalize_hotels(df, keep_raw=args.keep_raw)
+    before = df.memory_usage(deep=True).sum() / 2**20
+    after = normalized.memory_usage(deep=True).sum() / 2**20
+    print(f"{len(df)} hotels: {before:.1f} MB raw, {after:.1f} MB normalized")
+    print(normalized[NORMALIZED_COLUMNS].describe(include='all').to_string())
+    if args.output:
+        write_reviews(normalized, args.output)
+        print(f"Normalized hotels written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+from itertools import chain
+import argparse
+import glob
+import csv
+import json
+import os
+
+# Columns of a scraped hotel, in output order
+HOTEL_COLUMNS = ['Hotel', 'Price', 'Taxes & Charges', 'Total Cost', 'Reviews Count', 'Overall Rate']
+
+class JsonlSink:
+    """
+    Appends dicts, such as hotels, to a JSON Lines file, one object per line, flushed after every write.
+
+    Every row that was written survives a crash of the scraper.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, rows):
+        self.file.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CsvSink(JsonlSink):
+    """
+    Appends dicts to a CSV file, writing the header for a new file.
+
+    The columns default to HOTEL_COLUMNS when given as None, the header of
+    the file when appending to one, or else the keys of the first row.
+    """
+
+    def __init__(self, path, append=False, columns=HOTEL_COLUMNS):
+        self.path = path
+        self.header_needed = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        if columns is None and not self.header_needed:
+            with open(path, encoding='utf-8', newline='') as f:
+                columns = next(csv.reader(f))
+        self.columns = columns
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        self.writer = None
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=self.columns or list(rows[0]), extrasaction='ignore')
+            if self.header_needed:
+                self.writer.writeheader()
+        self.writer.writerows(rows)
+        self.file.flush()
+
+class ParquetSink:
+    """
+    Writes dicts to a Parquet file, one row group per `row_group_size` rows. Needs pyarrow.
+
+    Only the current row group is held in memory. Parquet files cannot be
+    appended to, so the rows go to a temporary file that replaces `path` on
+    close(); with append=True the rows already in `path` are copied over
+    first. The column types come from the first row group, with columns
+    that are empty there stored as strings.
+    """
+
+    def __init__(self, path, append=False, columns=HOTEL_COLUMNS, row_group_size=10000):
+        self.pa, self.pq = _require_pyarrow()
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.columns = columns
+        self.row_group_size = row_group_size
+        self.buffer = []
+        self.writer = None
+        self.previous = self.pq.ParquetFile(path) if append and os.path.exists(path) else None
+        if self.previous is not None:
+            self.columns = self.previous.schema_arrow.names
+            self._open(self.previous.schema_arrow)
+            for i in range(self.previous.num_row_groups):
+                self.writer.write_table(self.previous.read_row_group(i))
+
+    def _open(self, schema):
+        self.schema = schema
+        self.writer = self.pq.ParquetWriter(self.tmp_path, schema)
+
+    def write(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        if self.columns is None:
+            self.columns = list(dict.fromkeys(chain.from_iterable(self.buffer)))
+        records = [{column: row.get(column) for column in self.columns} for row in self.buffer]
+        if self.writer is None:
+            table = self.pa.Table.from_pylist(records)
+            self._open(self.pa.schema([
+                self.pa.field(field.name, self.pa.string()) if self.pa.types.is_null(field.type) else field
+                for field in table.schema
+            ]))
+        self.writer.write_table(self.pa.Table.from_pylist(records, schema=self.schema))
+        self.buffer = []
+
+    def close(self):
+        self._flush()
+        if self.writer is None:
+            self._open(self.pa.schema([self.pa.field(column, self.pa.string()) for column in self.columns or []]))
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ExcelSink:
+    """
+    Writes dicts to an Excel sheet with openpyxl's write-only mode, saved on close().
+
+    Rows are streamed into the workbook instead of going through a data
+    frame, which keeps memory low. Excel files cannot be appended to, so
+    this is for the final export only.
+    """
+
+    def __init__(self, path, append=False, columns=HOTEL_COLUMNS):
+        if append:
+            raise ValueError("Excel files cannot be appended to, write .jsonl, .csv or .parquet and export at the end")
+        from openpyxl import Workbook
+        self.path = path
+        self.columns = columns
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        self.header_written = False
+
+    def write(self, rows):
+        for row in rows:
+            if not self.header_written:
+                self._header(list(row))
+            self.sheet.append([row.get(column) for column in self.columns])
+
+    def _header(self, keys):
+        self.columns = self.columns or keys
+        self.sheet.append(self.columns)
+        self.header_written = True
+
+    def close(self):
+        if not self.header_written and self.columns is not None:
+            self._header(self.columns)
+        self.workbook.save(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet output needs the package 'pyarrow'. Please install it using: pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+# Sink for each file extension
+SINKS = {
+    '.jsonl': JsonlSink,
+    '.csv': CsvSink,
+    '.parquet': ParquetSink,
+    '.xlsx': ExcelSink,
+}
+
+# Output formats for the scrapers' --format options
+OUTPUT_FORMATS = ['xlsx', 'csv', 'jsonl', 'parquet']
+
+def open_sink(path, append=False, columns=HOTEL_COLUMNS):
+    """
+    Open the sink matching the file extension (.jsonl, .csv, .parquet or .xlsx).
+
+    `columns` does not matter for JSONL; pass None for rows other than hotels.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unsupported sink format '{extension}', expected one of {sorted(SINKS)}")
+    if extension == '.jsonl':
+        return JsonlSink(path, append)
+    return SINKS[extension](path, append, columns)
+
+def save_rows(rows, path, columns=HOTEL_COLUMNS):
+    """
+    Write dicts to `path` in the format of its extension.
+
+    `rows` may also be the path of a .jsonl or .csv rows file, which is then
+    streamed into the output without loading it first. Returns the number of rows written.
+    """
+    count = 0
+    with open_sink(path, columns=columns) as sink:
+        batch = []
+        for row in (iter_rows(rows) if isinstance(rows, str) else rows):
+            batch.append(row)
+            if len(batch) == 1000:
+                sink.write(batch)
+                count += len(batch)
+                batch = []
+        sink.write(batch)
+        count += len(batch)
+    return count
+
+def iter_rows(path):
+    """
+    Yield the dicts of a .jsonl or .csv rows file one at a time, keeping every value as written.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8', newline='') as f:
+        if extension == '.csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def read_rows(path):
+    """
+    Read back the hotel dicts written by a sink, keeping every value as written.
+    """
+    return list(iter_rows(path))
+
+def _read_frame(path, columns=None):
+    import pandas as pd
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(path, columns=columns)
+    if extension == '.csv':
+        try:
+            from pyarrow import csv
+        except ImportError:
+            return pd.read_csv(path, usecols=columns)
+        # Reviews and addresses can span lines inside their quotes
+        return csv.read_csv(path, parse_options=csv.ParseOptions(newlines_in_values=True),
+                            convert_options=csv.ConvertOptions(include_columns=columns, strings_can_be_null=True)).to_pandas()
+    if extension in ('.jsonl', '.json'):
+        df = pd.read_json(path, lines=True, dtype=False)
+        return df[columns] if columns else df
+    if extension in ('.xlsx', '.xls'):
+        return pd.read_excel(path, usecols=columns)
+    raise ValueError(f"Unsupported input format '{extension}', expected .parquet, .csv, .jsonl or .xlsx")
+
+def load_frame(paths, columns=None):
+    """
+    Read one or more output files into one data frame, e.g. to feed past runs to the analyzers.
+
+    `paths` is a file, a directory (all supported files in it), a glob
+    pattern or a list of these. Parquet and, with pyarrow installed, CSV are
+    read by pyarrow; `columns` reads only the given columns.
+    """
+    import pandas as pd
+    files = []
+    for path in [paths] if isinstance(paths, str) else paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if os.path.splitext(name)[1].lower() in ('.parquet', '.csv', '.jsonl', '.xlsx')))
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path)))
+        else:
+            files.append(path)
+    if not files:
+        raise ValueError(f"No output files found in {paths}")
+    frames = [_read_frame(path, columns) for path in files]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+def synthetic_hotels(count, seed=0):
+    """
+    `count` hotel dicts shaped like the scrapers' output, for timing the writers.
+    """
+    import random
+    rng = random.Random(seed)
+    hotels = []
+    for i in range(count):
+        price = rng.randint(300, 20000)
+        taxes = rng.randint(0, 3000)
+        hotels.append({
+            'Hotel': f"Hotel {i}", 'Price': f"EGP {price:,}", 'Taxes & Charges': f"EGP {taxes:,}", 'Total Cost': f"EGP {price + taxes}",
+            'Reviews Count': f"{rng.randint(1, 5000)} reviews", 'Overall Rate': f"{rng.randint(50, 99) / 10} - Very good",
+        })
+    return hotels
+
+def compare_writers(hotels, directory, formats=None):
+    """
+    Time and measure the peak Python memory of writing `hotels` in each format.
+
+    'xlsx (DataFrame)' is the scrapers' old pd.DataFrame(...).to_excel()
+    path; formats whose package is missing are reported as skipped. Peak
+    memory is what tracemalloc sees, so allocations made inside pyarrow's
+    C++ code are not counted.
+    """
+    import tracemalloc
+    from time import perf_counter
+    import pandas as pd
+
+    def to_excel(path):
+        pd.DataFrame(hotels).to_excel(path, index=False)
+
+    writers = {'xlsx (DataFrame)': ('.xlsx', to_excel)}
+    for extension in ['.' + fmt for fmt in formats or OUTPUT_FORMATS]:
+        writers[extension[1:]] = (extension, lambda path: save_rows(hotels, path))
+    results = {}
+    for name, (extension, write) in writers.items():
+        path = os.path.join(directory, "writer_benchmark" + extension)
+        try:
+            start = perf_counter()
+            write(path)
+            seconds = perf_counter() - start
+        except ImportError as e:
+            results[name] = {'skipped': str(e)}
+            continue
+        # Memory is measured in a second run, tracing slows the writers down
+        tracemalloc.start()
+        try:
+            write(path)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        results[name] = {'seconds': seconds, 'peak_mb': peak / 2**20, 'file_mb': os.path.getsize(path) / 2**20}
+        os.remove(path)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Times the hotel output writers and measures their peak memory on synthetic hotels.",
+        epilog=(
+            "Usage Example:\n"
+            "hotel_output.py --rows 50000"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type = int, default = 50000, help = "Number of hotels to write.", metavar = "50000")
+    parser.add_argument("--dir", default = ".", help = "Directory for the temporary files.", metavar = ".")
+    args = parser.parse_args()
+
+    for name, result in compare_writers(synthetic_hotels(args.rows), args.dir).items():
+        if 'skipped' in result:
+            print(f"{name:18} skipped: {result['skipped']}")
+        else:
+            print(f"{name:18} {result['seconds']:7.2f}s  peak {result['peak_mb']:7.1f} MB  file {result['file_mb']:6.1f} MB")
+
+if __name__ == "__main__":
+    main()
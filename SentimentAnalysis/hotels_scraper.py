@@ -1,23 +1,19 @@
 from playwright.sync_api import sync_playwright
 from time import sleep
-import pandas as pd
 import argparse
 import sys
 import os
-
-# Check for required dependencies
-try:
-    import openpyxl
-except ImportError:
-    print("Required package 'openpyxl' is missing.")
-    print("Please install it using: pip install openpyxl")
-    sys.exit(1)
+from hotel_extraction import extract_hotels, search_url, IncrementalExtractor, EXTRACTORS
+from hotel_output import open_sink, save_rows, OUTPUT_FORMATS
+from page_loading import enable_lean_mode, open_results, load_all_results, summarize_steps, PagingError
+from scrape_state import ScrapeState, scrape_checkpointed
+from http_replay import HttpStore, record, replay
 
 # Argument parser setup for user-provided inputs
 parser = argparse.ArgumentParser(
     description=(
         "This script scrapes hotels from Booking.com based on the provided parameters.\n"
-        "After retrieving the search results, they are scraped and stored in an Excel sheet at the specified path."
+        "After retrieving the search results, they are scraped and stored in an Excel sheet (or a CSV, JSONL or Parquet file) at the specified path."
     ),
     epilog=(
         "Usage Example:\n"
@@ -38,151 +34,153 @@ parser.add_argument("--nchild", required = True, help = "Number of children who
 parser.add_argument("--nroom", required = True, help = "Number of rooms needed.", metavar = "2")
 parser.add_argument("--path", required = True, help = "Path of the directory where the excel sheet get stored.", metavar = "D:\\projects\\scraping")
 parser.add_argument("--sheetname", required = True, help = "Name of the excel sheet file.", metavar = "hotels_list")
+parser.add_argument("--format", choices = OUTPUT_FORMATS, default = "xlsx", help = "Format of the output file; csv, jsonl and parquet are much faster than xlsx for big searches.")
+parser.add_argument("--extraction", choices = sorted(EXTRACTORS), default = "bulk", help = "Read all property cards in one call (bulk) or field by field (locators).")
+parser.add_argument("--lean", action = "store_true", help = "Run headless, block images, fonts and trackers and wait for new cards instead of network idle.")
+parser.add_argument("--incremental", action = "store_true", help = "Extract new cards after every pagination step and append them to <sheetname>.jsonl as they come.")
+parser.add_argument("--state", default = None, help = "SQLite file checkpointing the scrape; a rerun of the same search resumes where it stopped.", metavar = "scrapes.db")
+parser.add_argument("--refresh", action = "store_true", help = "With --state, scrape a search again even if it already finished.")
+parser.add_argument("--record", default = None, help = "Record every response of the session to this directory for --replay.", metavar = "http_cache")
+parser.add_argument("--replay", default = None, help = "Serve every response from a --record directory, without the network.", metavar = "http_cache")
+parser.add_argument("--base-url", default = "https://www.booking.com", help = "Site to search, e.g. a local mock_booking_server.py.", metavar = "http://127.0.0.1:8000")
 args = parser.parse_args()
+if args.record and args.replay:
+    parser.error("--record and --replay cannot be used together")
+if args.extraction == "locators" and (args.incremental or args.state):
+    parser.error("--extraction locators cannot be used with --incremental or --state, which read the new cards in bulk")
+
+# Check for required dependencies
+try:
+    if args.format == "xlsx":
+        import openpyxl
+    elif args.format == "parquet":
+        import pyarrow
+except ImportError as e:
+    print(f"Required package '{e.name}' is missing.")
+    print(f"Please install it using: pip install {e.name}")
+    sys.exit(1)
 
 def main():
     with sync_playwright() as p:
-         # User-provided parameters
-        checkin_date = args.indate
-        checkout_date = args.outdate
-        adults_no = args.nadult
-        children_no = args.nchild
-        rooms_no = args.nroom
-        city = args.city
-        country = args.country
         # Validate the provided file path
         path = args.path.strip()  # Remove leading/trailing spaces
         if not os.path.exists(path):
             print("Entered path doesn't exist, the file will be created in the current working directory.")
             path = os.getcwd()
         
-        # Construct the full path for the output Excel file
-        full_path = os.path.join(path, args.sheetname + '.xlsx')
+        # Construct the full path for the output file
+        full_path = os.path.join(path, args.sheetname + '.' + args.format)
         
         # Construct the booking.com URL with query parameters
-        page_url = f'https://www.booking.com/searchresults.html?ss={city}%2C+{country}&checkin={checkin_date}&checkout={checkout_date}&group_adults={adults_no}&no_rooms={rooms_no}&group_children={children_no}'
-        print(f"Navigating to: {page_url}")
+        page_url = search_url(vars(args), args.base_url)
 
-        # Launch the browser and open a new page
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
-        
-        try:
-            # Navigate to the constructed URL with increased timeout
-            page.goto(page_url, timeout=30000)  # Increased timeout to 30 seconds
-            page.wait_for_load_state("networkidle", timeout=30000)
-        except Exception as e:
-            print(f"Navigation failed: {str(e)}")
-            print("Please check your internet connection and try again.")
-            browser.close()
-            sys.exit(1)
-        
-        try:
-            # Handle the initial pop-up (e.g., sign-in prompt)
-            x_sign_in = page.get_by_role("button", name="Dismiss sign-in info.")
-            x_sign_in.wait_for(timeout=10000)  # 10 second timeout
-            x_sign_in.click()
-        except Exception as e:
-            print("Warning: Could not dismiss sign-in popup. Continuing anyway...")
+        # Resume from the state file: skip a finished search, or continue without the hotels already extracted
+        state = job = None
+        if args.state:
+            state = ScrapeState(args.state)
+            job = state.start(vars(args), args.base_url, args.refresh)
+            if job['skip']:
+                print("This search already finished, exporting the saved hotels. Use --refresh to scrape it again.")
+            elif job['resume']:
+                print(f"Resuming a {job['previous']} scrape, skipping the {len(state.keys(job['job']))} hotels already saved.")
 
-        # Initialize the "Load more results" button
-        next_button = page.get_by_text('Load more results') #For pagination
-        
+        browser = None
+        if job is not None and job['skip']:
+            hotels_list = state.hotels(job['job'])
+        else:
+            print(f"Navigating to: {page_url}")
 
-        # Scroll and load all hotel listings
-        while True:
-            page.keyboard.press("End") #The end key takes us to the end of the page; needed for "Lazy loading"
-            print("Scrolling down...")
-            page.wait_for_load_state("networkidle")
-            #Wait until all elements are loaded
-            try:
-                next_button.wait_for()
-                next_button.click()
-            except Exception as e:
-                hotels = page.get_by_test_id("property-card").all()
-                break
-        print(f"Number of hotels found: {len(hotels)}")
-        #------------------------------------
-        ## Extract hotel details and store it as a list of dictionaries where each dictionary represents a hotel
-        print("Extracting the data from the search results...")
-        hotels_list = []
-        for hotel in hotels:
-            hotel_dict = {}
-            # Extract hotel name
-            try:
-                hotel_dict['Hotel'] = hotel.get_by_test_id("title").inner_text()
-            except Exception as e:
-                hotel_dict['Hotel']= "N/A"
-            
-            # Extract price
-            try:
-                hotel_dict['Price'] = hotel.get_by_test_id("price-and-discounted-price").inner_text().replace('&nbsp;', ' ').strip()
-            except Exception as e:
-                hotel_dict['Price']= "N/A"
-            
-            # Extract taxes and charges
-            try:
-                hotel_dict['Taxes & Charges'] = hotel.get_by_test_id("taxes-and-charges").inner_text().replace('taxes and fees', '').replace('+', '').replace('&nbsp;', ' ').replace('Includes ', 'EGP 0').strip()
-            except Exception as e:
-                hotel_dict['Taxes & Charges']= "N/A"
+            # Launch the browser and open a new page; lean mode runs headless and skips images, fonts and trackers
+            browser = p.chromium.launch(headless=args.lean)
+            http_store = HttpStore(args.record or args.replay) if args.record or args.replay else None
+            # Service workers would answer requests without going through the record/replay routes
+            page = browser.new_page(service_workers="block") if http_store else browser.new_page()
+            if args.record:
+                record(page, http_store)
+            elif args.replay:
+                replay(page, http_store)
+            if args.lean:
+                enable_lean_mode(page)
 
-            # Calculate total cost
             try:
-                hotel_dict['Total Cost'] = f"EGP {int(hotel_dict['Price'].replace('EGP', '').replace(',','').strip()) + int(hotel_dict['Taxes & Charges'].replace('EGP', '').replace(',','').strip())}"
-            except ValueError:
-                hotel_dict['Total Cost'] = "N/A"
-
-            # Extract reviews count
-            review_count = hotel.get_by_test_id("review-score").locator('//div[2]/div[2]')
-            if review_count.is_visible():
-                try:
-                    hotel_dict['Reviews Count'] = review_count.inner_text()
-                except Exception as e:
-                    hotel_dict['Reviews Count'] = "N/A"
-            else:
-                hotel_dict['Reviews Count'] = "N/A"
-            
-            # Extract overall rating
-            overall_rate = hotel.get_by_test_id("review-score").locator('//div[1]/div[1]')
-            gpa = hotel.get_by_test_id("review-score").locator('//div[2]/div[1]')
+                # Navigate to the constructed URL and handle the initial pop-up (e.g., sign-in prompt)
+                open_results(page, page_url, args.lean)
+            except Exception as e:
+                print(f"Navigation failed: {str(e)}")
+                if args.replay:
+                    print(f"{len(http_store.misses)} requests were not recorded in {args.replay}; record the search again.")
+                else:
+                    print("Please check your internet connection and try again.")
+                if state is not None:
+                    state.finish(job['job'], f"Navigation failed: {str(e)}")
+                    state.close()
+                browser.close()
+                sys.exit(1)
 
-            if overall_rate.is_visible() and gpa.is_visible():
-                hotel_dict['Overall Rate'] = overall_rate.inner_text().replace('Scored ', '') + " - " + gpa.inner_text()
+            rows_path = os.path.join(path, args.sheetname + '.jsonl') if args.incremental else None
+            if state is not None:
+                hotels_list = scrape_checkpointed(page, state, job, args.lean, rows_path)
+            elif args.incremental:
+                # Extract the new cards after every pagination step and append them to the rows file right away
+                with open_sink(rows_path) as sink:
+                    extractor = IncrementalExtractor(page, sink)
+                    extractor()
+                    try:
+                        steps = load_all_results(page, args.lean, on_step=extractor)
+                    except PagingError as e:
+                        steps = e.steps
+                        print(f"Paging stopped early: {str(e)}. The hotels loaded so far are kept, but the list is incomplete.")
+                    extractor()
+                print(f"Pagination: {summarize_steps(steps)}")
+                print(f"{extractor.count} hotels written to {rows_path} ({extractor.duplicates} duplicates skipped), "
+                      f"first row after {extractor.first_row_seconds or 0:.1f}s")
+                # Stream the rows file into the output instead of loading it
+                hotels_list = rows_path if extractor.count else []
             else:
-                hotel_dict['Overall Rate'] = "N/A"
-
-            hotels_list.append(hotel_dict)
+                # Scroll and load all hotel listings, timing every step
+                try:
+                    steps = load_all_results(page, args.lean)
+                except PagingError as e:
+                    steps = e.steps
+                    print(f"Paging stopped early: {str(e)}. The hotels loaded so far are kept, but the list is incomplete.")
+                print(f"Pagination: {summarize_steps(steps)}")
+                #------------------------------------
+                ## Extract hotel details and store it as a list of dictionaries where each dictionary represents a hotel
+                print("Extracting the data from the search results...")
+                hotels_list = extract_hotels(page, args.extraction)
+                print(f"Number of hotels found: {len(hotels_list)}")
+            if args.record:
+                http_store.save()
+                print(f"Recorded {http_store.stats()['responses']} responses to {args.record}")
+            elif args.replay:
+                print(f"Replayed {http_store.hits} responses, {len(http_store.misses)} requests not recorded")
+        if state is not None:
+            state.close()
         #------------------------------------
-        print("Creating the excel sheet...")
-        if hotels_list:
-            df = pd.DataFrame(hotels_list)
-
+        if hotels_list == full_path:
+            print(f"Output file: {full_path}")
+        elif hotels_list:
+            print(f"Creating the {args.format} file...")
             try:
                 # Create directory if it doesn't exist
                 os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                
-                # Turn the data frame into an excel sheet
-                df.to_excel(full_path, index=False)
-                
-                # Verify the file was created
-                if os.path.exists(full_path):
-                    print(f"Excel file successfully created: {full_path}")
-                else:
-                    print("Failed to verify Excel file creation")
+                count = save_rows(hotels_list, full_path)
+                print(f"{count} hotels written to {full_path}")
             except Exception as e:
-                print(f"Error creating Excel file: {str(e)}")
+                print(f"Error creating the output file: {str(e)}")
                 print(f"Attempted to save at: {full_path}")
                 # Try saving in current directory as fallback
-                fallback_path = os.path.join(os.getcwd(), args.sheetname + '.xlsx')
+                fallback_path = os.path.join(os.getcwd(), os.path.basename(full_path))
                 try:
-                    df.to_excel(fallback_path, index=False)
+                    save_rows(hotels_list, fallback_path)
                     print(f"Saved file to fallback location: {fallback_path}")
                 except Exception as e2:
                     print(f"Fallback save also failed: {str(e2)}")
         else:
             print("No hotels found!")
 
-        browser.close()
+        if browser is not None:
+            browser.close()
 
 if __name__ == "__main__":
     main()
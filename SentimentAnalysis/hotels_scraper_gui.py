@@ -6,6 +6,14 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+from hotel_extraction import extract_hotels
+from page_loading import enable_lean_mode, open_results, load_all_results, summarize_steps, PagingError
+from http_replay import HttpStore, record, replay
+from hotel_output import save_rows, OUTPUT_FORMATS
+from hotel_normalize import normalize_hotels, main_currency
+
+# Directory under the save location where sessions are recorded and replayed from
+HTTP_CACHE_DIR = "http_cache"
 
 # Check for required dependencies
 try:
@@ -53,12 +61,29 @@ class HotelScraperGUI:
         self.create_date_section(main_frame, 0, 2)  # New method for dates
         self.create_travelers_section(main_frame, 2, 0)  # New method for traveler inputs
         
+        # Lean mode: headless, no images, fonts or trackers, shorter waits
+        self.lean_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(main_frame, text="Lean mode (headless, faster page loads)", variable=self.lean_var,
+                       font=self.label_font, bg=self.bg_color).grid(row=4, column=0, columnspan=2, pady=5, padx=5, sticky="w")
+
+        # Record the session's responses, or replay a recorded one offline
+        tk.Label(main_frame, text="HTTP cache:", font=self.label_font, bg=self.bg_color).grid(row=4, column=2, pady=5, padx=5, sticky="e")
+        self.http_cache = ttk.Combobox(main_frame, values=["Off", "Record", "Replay"], state="readonly", width=10)
+        self.http_cache.grid(row=4, column=3, pady=5, padx=5, sticky="w")
+        self.http_cache.set("Off")
+
         # Output path selection (spans both columns)
         self.create_path_selection(main_frame, 5, 0)
+
+        # Output format; csv, jsonl and parquet are much faster to write than xlsx
+        tk.Label(main_frame, text="Output Format:", font=self.label_font, bg=self.bg_color).grid(row=6, column=0, pady=5, padx=5, sticky="e")
+        self.output_format = ttk.Combobox(main_frame, values=OUTPUT_FORMATS, state="readonly", width=10)
+        self.output_format.grid(row=6, column=1, pady=5, padx=5, sticky="w")
+        self.output_format.set("xlsx")
         
         # Status text (spans both columns)
         self.status_text = tk.Text(main_frame, height=8, width=60, font=("Helvetica", 10))
-        self.status_text.grid(row=6, column=0, columnspan=4, pady=10, padx=5, sticky="ew")
+        self.status_text.grid(row=7, column=0, columnspan=4, pady=10, padx=5, sticky="ew")
 
         # Scrape button (spans both columns)
         tk.Button(
@@ -68,7 +93,7 @@ class HotelScraperGUI:
             bg=self.button_color,
             fg=self.button_text_color,
             command=self.start_scraping
-        ).grid(row=7, column=0, columnspan=4, pady=10)
+        ).grid(row=8, column=0, columnspan=4, pady=10)
 
     def create_input_field(self, parent, label, row, col):
         tk.Label(parent, text=label, font=self.label_font, bg=self.bg_color).grid(row=row, column=col, pady=5, padx=5, sticky="e")
@@ -123,49 +148,40 @@ class HotelScraperGUI:
         # Create a new window for results
         self.results_window = None
         self.tree = None
+        # The shown hotels with parsed numeric columns, indexed by tree item id
+        self.hotels_df = None
+
+    # Parsed column each sortable tree column is sorted by
+    SORT_COLUMNS = {"Price": "price", "Rating": "rating"}
 
     def treeview_sort_column(self, tv, col, reverse):
-        l = [(tv.set(k, col), k) for k in tv.get_children('')]
-        
-        try:
-            if col == "Price":
-                # Remove 'EGP', commas, and whitespace, then convert to float
-                l.sort(key=lambda t: float(''.join(filter(str.isdigit, t[0]))) if t[0] != "N/A" else -1, reverse=reverse)
-            elif col == "Rating":
-                l.sort(key=lambda t: float(t[0]) if t[0] != "N/A" else -1, reverse=reverse)
-            else:
-                l.sort(reverse=reverse)
-        except ValueError:
-            # Fallback to string sorting if conversion fails
-            l.sort(reverse=reverse)
+        items = list(tv.get_children(''))
+        if col in self.SORT_COLUMNS and self.hotels_df is not None:
+            # Sort by the parsed numbers; hotels without one always go last
+            values = self.hotels_df[self.SORT_COLUMNS[col]].reindex(items).to_numpy()
+            order = np.argsort(-values if reverse else values, kind='stable')
+        else:
+            order = sorted(range(len(items)), key=lambda i: tv.set(items[i], col), reverse=reverse)
 
-        for index, (val, k) in enumerate(l):
-            tv.move(k, '', index)
+        for index, position in enumerate(order):
+            tv.move(items[position], '', index)
 
         tv.heading(col, command=lambda: self.treeview_sort_column(tv, col, not reverse))
 
-    def create_charts(self, hotels_list):
+    def create_charts(self):
         def format_hotel_name(name, max_length=20):
             return str(name)[:max_length] + ('...' if len(str(name)) > max_length else '')
 
         def show_price_chart():
             try:
-                data = []
-                for hotel in hotels_list:
-                    try:
-                        if hotel['Price'] != "N/A":
-                            price_str = ''.join(filter(str.isdigit, hotel['Price']))
-                            if price_str:
-                                price = float(price_str)
-                                data.append((price, format_hotel_name(hotel['Hotel'])))
-                    except (ValueError, KeyError):
-                        continue
+                # Top 10 most expensive hotels, from the parsed prices
+                hotels_df = self.hotels_df
+                data = hotels_df.dropna(subset=['price']).nlargest(10, 'price')
                 
-                if data:
-                    # Sort by price in descending order and take top 10
-                    data.sort(reverse=True)
-                    data = data[:10]
-                    prices, names = zip(*data)
+                if len(data):
+                    prices = data['price'].to_numpy()
+                    names = [format_hotel_name(name) for name in data['Hotel']]
+                    currency = main_currency(hotels_df) or ""
                     
                     plt.figure(figsize=(12, 6))
                     plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'Arial']
@@ -173,13 +189,13 @@ class HotelScraperGUI:
                     plt.xticks(range(len(prices)), names, rotation=45, ha='right')
                     plt.title('Top 10 Most Expensive Hotels', fontsize=12)
                     plt.xlabel('Hotels', fontsize=10)
-                    plt.ylabel('Price (HKD)', fontsize=10)
+                    plt.ylabel(f'Price ({currency})' if currency else 'Price', fontsize=10)
                     
-                    # Add value labels with HKD
+                    # Add value labels with the currency of the prices
                     for bar in bars:
                         height = bar.get_height()
                         plt.text(bar.get_x() + bar.get_width()/2., height,
-                                f'HKD {int(height):,}',
+                                f'{currency} {int(height):,}'.strip(),
                                 ha='center', va='bottom')
                     
                     plt.tight_layout()
@@ -191,24 +207,13 @@ class HotelScraperGUI:
 
         def show_rating_chart():
             try:
-                data = []
-                for hotel in hotels_list:
-                    try:
-                        rate = hotel['Overall Rate']
-                        if rate != "N/A":
-                            score = ''.join(c for c in rate if c.isdigit() or c == '.')
-                            if score:
-                                rating = float(score)
-                                if 0 <= rating <= 10:
-                                    data.append((rating, format_hotel_name(hotel['Hotel'])))
-                    except (ValueError, KeyError, IndexError):
-                        continue
+                # Top 10 highest rated hotels, from the parsed ratings
+                hotels_df = self.hotels_df
+                data = hotels_df[hotels_df['rating'].between(0, 10)].nlargest(10, 'rating')
                 
-                if data:
-                    # Sort by rating in descending order and take top 10  
-                    data.sort(reverse=True)
-                    data = data[:10]
-                    ratings, names = zip(*data)
+                if len(data):
+                    ratings = data['rating'].to_numpy()
+                    names = [format_hotel_name(name) for name in data['Hotel']]
                     
                     plt.figure(figsize=(12, 6))
                     plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'Arial']  # Better font support
@@ -246,8 +251,8 @@ class HotelScraperGUI:
                 buttons_frame = ttk.Frame(self.results_window)
                 buttons_frame.pack(side="top", fill="x", padx=5, pady=5)
 
-                # Add chart buttons
-                show_price_chart, show_rating_chart = self.create_charts(hotels_list)
+                # Add chart buttons; the charts read self.hotels_df, so they follow later results too
+                show_price_chart, show_rating_chart = self.create_charts()
                 ttk.Button(buttons_frame, text="Show Price Chart", command=show_price_chart).pack(side="left", padx=5)
                 ttk.Button(buttons_frame, text="Show Rating Chart", command=show_rating_chart).pack(side="left", padx=5)
 
@@ -276,13 +281,14 @@ class HotelScraperGUI:
                 for item in self.tree.get_children():
                     self.tree.delete(item)
 
-            # Insert data
-            for hotel in hotels_list:
+            # Parse prices and ratings once; sorting and the charts use these columns
+            self.hotels_df = normalize_hotels(pd.DataFrame(hotels_list))
+            self.hotels_df.index = self.hotels_df.index.astype(str)
+
+            # Insert data, one tree item per row of self.hotels_df
+            for iid, name, price, rating in zip(self.hotels_df.index, self.hotels_df['Hotel'], self.hotels_df['Price'], self.hotels_df['rating']):
                 try:
-                    name = hotel['Hotel']
-                    price = hotel['Price']
-                    rating = hotel['Overall Rate'].split('-')[0].strip() if hotel['Overall Rate'] != "N/A" else "N/A"
-                    self.tree.insert("", "end", values=(name, price, rating))
+                    self.tree.insert("", "end", iid=iid, values=(name, price, "N/A" if np.isnan(rating) else f"{rating:.1f}"))
                 except Exception as e:
                     self.log_message(f"Error adding hotel to display: {str(e)}")
 
@@ -316,104 +322,68 @@ class HotelScraperGUI:
                 self.log_message(f"Navigating to: {page_url}")
 
                 # Launch browser
-                browser = p.chromium.launch(headless=False)
-                page = browser.new_page()
+                lean = self.lean_var.get()
+                browser = p.chromium.launch(headless=lean)
+                cache_mode = self.http_cache.get()
+                if cache_mode == "Off":
+                    page = browser.new_page()
+                else:
+                    # Responses are recorded to / replayed from <save location>/http_cache
+                    http_store = HttpStore(os.path.join(params['path'], HTTP_CACHE_DIR))
+                    page = browser.new_page(service_workers="block")
+                    if cache_mode == "Record":
+                        record(page, http_store)
+                    else:
+                        replay(page, http_store)
+                if lean:
+                    enable_lean_mode(page)
 
-                # Navigate to URL
+                # Navigate to URL and handle popup
                 try:
-                    page.goto(page_url, timeout=30000)
-                    page.wait_for_load_state("networkidle", timeout=30000)
+                    open_results(page, page_url, lean, self.log_message)
                 except Exception as e:
                     raise Exception(f"Navigation failed: {str(e)}\nPlease check your internet connection.")
 
-                # Handle popup
+                # Scroll and load all listings, timing every step
                 try:
-                    x_sign_in = page.get_by_role("button", name="Dismiss sign-in info.")
-                    x_sign_in.wait_for(timeout=10000)
-                    x_sign_in.click()
-                except Exception:
-                    self.log_message("Warning: Could not dismiss sign-in popup. Continuing anyway...")
-
-                # Initialize pagination
-                next_button = page.get_by_text('Load more results')
-
-                # Scroll and load all listings
-                while True:
-                    page.keyboard.press("End")
-                    self.log_message("Scrolling down...")
-                    page.wait_for_load_state("networkidle")
-                    try:
-                        next_button.wait_for()
-                        next_button.click()
-                    except Exception:
-                        hotels = page.get_by_test_id("property-card").all()
-                        break
+                    steps = load_all_results(page, lean, self.log_message)
+                except PagingError as e:
+                    steps = e.steps
+                    self.log_message(f"Paging stopped early: {str(e)}. The hotels loaded so far are kept, but the list is incomplete.")
+                self.log_message(f"Pagination: {summarize_steps(steps)}")
 
-                self.log_message(f"Number of hotels found: {len(hotels)}")
                 self.log_message("Extracting data from search results...")
 
-                # Extract hotel details
-                hotels_list = []
-                for hotel in hotels:
-                    hotel_dict = {}
-                    try:
-                        hotel_dict['Hotel'] = hotel.get_by_test_id("title").inner_text()
-                    except Exception:
-                        hotel_dict['Hotel'] = "N/A"
-                    
-                    try:
-                        hotel_dict['Price'] = hotel.get_by_test_id("price-and-discounted-price").inner_text().replace('&nbsp;', ' ').strip()
-                    except Exception:
-                        hotel_dict['Price'] = "N/A"
-                    
-                    try:
-                        hotel_dict['Taxes & Charges'] = hotel.get_by_test_id("taxes-and-charges").inner_text().replace('taxes and fees', '').replace('+', '').replace('&nbsp;', ' ').replace('Includes ', 'EGP 0').strip()
-                    except Exception:
-                        hotel_dict['Taxes & Charges'] = "N/A"
-
-                    try:
-                        hotel_dict['Total Cost'] = f"EGP {int(hotel_dict['Price'].replace('EGP', '').replace(',','').strip()) + int(hotel_dict['Taxes & Charges'].replace('EGP', '').replace(',','').strip())}"
-                    except ValueError:
-                        hotel_dict['Total Cost'] = "N/A"
-
-                    review_count = hotel.get_by_test_id("review-score").locator('//div[2]/div[2]')
-                    if review_count.is_visible():
-                        try:
-                            hotel_dict['Reviews Count'] = review_count.inner_text()
-                        except Exception:
-                            hotel_dict['Reviews Count'] = "N/A"
-                    else:
-                        hotel_dict['Reviews Count'] = "N/A"
-                    
-                    overall_rate = hotel.get_by_test_id("review-score").locator('//div[1]/div[1]')
-                    gpa = hotel.get_by_test_id("review-score").locator('//div[2]/div[1]')
-
-                    if overall_rate.is_visible() and gpa.is_visible():
-                        hotel_dict['Overall Rate'] = overall_rate.inner_text().replace('Scored ', '') + " - " + gpa.inner_text()
-                    else:
-                        hotel_dict['Overall Rate'] = "N/A"
-
-                    hotels_list.append(hotel_dict)
+                # Extract hotel details of all property cards in one call
+                hotels_list = extract_hotels(page)
+                self.log_message(f"Number of hotels found: {len(hotels_list)}")
 
                 # Save results
                 if hotels_list:
-                    df = pd.DataFrame(hotels_list)
-                    filename = "hotels_list.xlsx"
+                    filename = "hotels_list." + self.output_format.get()
                     full_path = os.path.join(params['path'], filename)
                     
                     try:
                         os.makedirs(params['path'], exist_ok=True)
-                        df.to_excel(full_path, index=False)
-                        self.log_message(f"Excel file created successfully at: {full_path}")
-                        # Show results in table view instead of matplotlib
-                        self.show_results(hotels_list)
+                        save_rows(hotels_list, full_path)
+                        self.log_message(f"Output file created successfully at: {full_path}")
                     except Exception as e:
+                        # The rows are written again as they are, nothing is rebuilt
+                        self.log_message(f"Could not write {full_path}: {str(e)}")
                         fallback_path = os.path.join(os.getcwd(), filename)
-                        df.to_excel(fallback_path, index=False)
+                        save_rows(hotels_list, fallback_path)
                         self.log_message(f"Saved to fallback location: {fallback_path}")
+                    # Show results in table view instead of matplotlib
+                    self.show_results(hotels_list)
                 else:
                     self.log_message("No hotels found!")
 
+                if cache_mode == "Record":
+                    http_store.save()
+                    self.log_message(f"Recorded {http_store.stats()['responses']} responses to {http_store.path}")
+                elif cache_mode == "Replay":
+                    self.log_message(f"Replayed {http_store.hits} responses, {len(http_store.misses)} requests not recorded")
+
                 browser.close()
                 self.log_message("Scraping completed!")
 
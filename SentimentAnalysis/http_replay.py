@@ -0,0 +1,256 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from threading import Lock
+from time import perf_counter
+import argparse
+import hashlib
+import json
+import os
+
+# Query parameters that change between sessions without changing the response
+VOLATILE_PARAMS = frozenset(['sid', 'srpvid', 'aid', 'label', 'sig', '_', 'cb', 'ts'])
+
+# Response headers that no longer apply to the decoded body that is stored
+DROPPED_HEADERS = frozenset(['content-encoding', 'content-length', 'transfer-encoding'])
+
+# What replay does with a request that was not recorded
+MISS_ACTIONS = ['abort', 'network']
+
+def normalize_url(url):
+    """
+    URL with the fragment and VOLATILE_PARAMS removed and the query parameters sorted.
+    """
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name not in VOLATILE_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+def request_key(method, url, post_data=None):
+    """
+    Content address of a request: its method, normalized URL and a hash of its body.
+    """
+    body = hashlib.sha1(post_data or b"").hexdigest()
+    return hashlib.sha1(f"{method.upper()}\0{normalize_url(url)}\0{body}".encode('utf-8')).hexdigest()
+
+class HttpStore:
+    """
+    Recorded HTTP responses in a directory, for replaying a scrape offline.
+
+    index.json maps each request key to the responses recorded for it, in
+    order, and every body is saved once under bodies/ by its SHA-1. A request
+    made several times in one session (e.g. "Load more results" calls with
+    the same payload) is answered with its responses in the recorded order,
+    repeating the last one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.bodies_dir = os.path.join(path, 'bodies')
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        self.index_path = os.path.join(path, 'index.json')
+        self.meta = {}
+        self.responses = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            self.meta = index.get('meta', {})
+            self.responses = index.get('responses', {})
+        self.recorded = set()
+        self.served = {}
+        self.hits = 0
+        self.misses = []
+        self._lock = Lock()
+
+    def add(self, method, url, post_data, status, headers, body):
+        """
+        Record one response. The first response recorded for a key in a session replaces the older ones.
+        """
+        key = request_key(method, url, post_data)
+        digest = hashlib.sha1(body).hexdigest()
+        body_path = os.path.join(self.bodies_dir, digest)
+        entry = {
+            'method': method, 'url': url, 'status': status, 'body': digest,
+            'headers': {name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS},
+        }
+        with self._lock:
+            if not os.path.exists(body_path):
+                with open(body_path, 'wb') as f:
+                    f.write(body)
+            if key not in self.recorded:
+                self.recorded.add(key)
+                self.responses[key] = []
+            self.responses[key].append(entry)
+
+    def lookup(self, method, url, post_data=None):
+        """
+        The next recorded (entry, body) of a request, or None when it was not recorded.
+        """
+        key = request_key(method, url, post_data)
+        with self._lock:
+            entries = self.responses.get(key)
+            if not entries:
+                self.misses.append(f"{method} {url}")
+                return None
+            served = self.served.get(key, 0)
+            self.served[key] = served + 1
+            self.hits += 1
+        entry = entries[min(served, len(entries) - 1)]
+        with open(os.path.join(self.bodies_dir, entry['body']), 'rb') as f:
+            return entry, f.read()
+
+    def rewind(self):
+        """
+        Serve every request from its first recorded response again, e.g. before another replay run.
+        """
+        with self._lock:
+            self.served.clear()
+            self.hits = 0
+            self.misses = []
+
+    def save(self):
+        tmp_path = self.index_path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'meta': self.meta, 'responses': self.responses}, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+    def stats(self):
+        """
+        Request, response and body counts, the size of the bodies and the replay hits and misses.
+        """
+        bodies = os.listdir(self.bodies_dir)
+        return {
+            'requests': len(self.responses),
+            'responses': sum(len(entries) for entries in self.responses.values()),
+            'bodies': len(bodies),
+            'body_bytes': sum(os.path.getsize(os.path.join(self.bodies_dir, name)) for name in bodies),
+            'hits': self.hits,
+            'misses': len(self.misses),
+        }
+
+def _note_start(store, request):
+    if 'start_url' not in store.meta and request.is_navigation_request() and request.resource_type == 'document':
+        store.meta['start_url'] = request.url
+
+def record(context, store):
+    """
+    Send every request of a (sync) browser context or page to the network and record its response in `store`.
+
+    Install it before page_loading.enable_lean_mode(), so the requests lean
+    mode blocks are never recorded. Call store.save() when done.
+    """
+    def handle(route):
+        request = route.request
+        _note_start(store, request)
+        try:
+            response = route.fetch()
+            body = response.body()
+        except Exception:
+            route.abort()
+            return
+        store.add(request.method, request.url, request.post_data_buffer, response.status, response.headers, body)
+        route.fulfill(response=response, body=body)
+    context.route("**/*", handle)
+
+def replay(context, store, on_miss='abort'):
+    """
+    Answer every request of a (sync) browser context or page from `store`, without touching the network.
+
+    Requests that were not recorded are aborted, or with on_miss='network'
+    sent on as usual; either way they are listed in store.misses.
+    """
+    def handle(route):
+        request = route.request
+        found = store.lookup(request.method, request.url, request.post_data_buffer)
+        if found is None:
+            if on_miss == 'network':
+                route.fallback()
+            else:
+                route.abort()
+            return
+        entry, body = found
+        route.fulfill(status=entry['status'], headers=entry['headers'], body=body)
+    context.route("**/*", handle)
+
+def check_replay(store, url=None, runs=3, lean=True, expected=None, update=False):
+    """
+    Scrape and extract a recorded search offline `runs` times and check the results.
+
+    Every run must give the same hotels; with `expected` (a JSONL file of
+    hotel dicts) they must also match it, and update=True rewrites it from
+    this replay instead. Returns a dict with the per-run seconds, the hotel
+    count, the replay misses and whether every check passed.
+    """
+    from playwright.sync_api import sync_playwright
+    from hotel_extraction import extract_hotels
+    from hotel_output import open_sink, read_rows
+    from page_loading import enable_lean_mode, open_results, load_all_results
+
+    url = url or store.meta.get('start_url')
+    if not url:
+        raise ValueError("No start URL was recorded, give one")
+    seconds, results = [], []
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        for _ in range(runs):
+            store.rewind()
+            page = browser.new_page(service_workers="block")
+            replay(page, store)
+            if lean:
+                enable_lean_mode(page)
+            start = perf_counter()
+            open_results(page, url, lean, log=lambda message: None)
+            load_all_results(page, lean, log=lambda message: None)
+            results.append(extract_hotels(page))
+            seconds.append(perf_counter() - start)
+            page.close()
+        browser.close()
+
+    report = {'seconds': seconds, 'hotels': len(results[0]), 'misses': sorted(set(store.misses)),
+              'deterministic': all(result == results[0] for result in results), 'matches_expected': None}
+    if expected and update:
+        with open_sink(expected) as sink:
+            sink.write(results[0])
+    elif expected:
+        report['matches_expected'] = read_rows(expected) == results[0]
+    report['ok'] = report['deterministic'] and report['matches_expected'] is not False
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script inspects a directory of recorded scraper responses (hotels_scraper.py --record)\n"
+            "and replays the recorded search offline to time and regression-test the extraction."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "http_replay.py stats http_cache\n"
+            "http_replay.py check http_cache --runs 5 --expected hotels_expected.jsonl --update\n"
+            "http_replay.py check http_cache --runs 5 --expected hotels_expected.jsonl"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("mode", choices = ['stats', 'check'], help = "Print the store's counts, or replay and check the recorded search.")
+    parser.add_argument("store", help = "Directory of the recorded responses.", metavar = "http_cache")
+    parser.add_argument("--url", default = None, help = "Search results URL to replay, by default the first page recorded.", metavar = "URL")
+    parser.add_argument("--runs", type = int, default = 3, help = "Number of replay runs.", metavar = "3")
+    parser.add_argument("--no-lean", action = "store_true", help = "Replay with network idle waits instead of lean mode.")
+    parser.add_argument("--expected", default = None, help = "JSONL file of the hotels the replay must extract.", metavar = "hotels_expected.jsonl")
+    parser.add_argument("--update", action = "store_true", help = "Write --expected from this replay instead of checking it.")
+    args = parser.parse_args()
+
+    store = HttpStore(args.store)
+    if args.mode == 'stats':
+        print(json.dumps(dict(store.stats(), **store.meta), indent=2))
+        return
+
+    report = check_replay(store, args.url, args.runs, not args.no_lean, args.expected, args.update)
+    runs = ", ".join(f"{s:.2f}s" for s in report['seconds'])
+    print(f"{report['hotels']} hotels per run ({runs}), deterministic: {report['deterministic']}, "
+          f"matches expected: {report['matches_expected']}")
+    for miss in report['misses']:
+        print(f"Not recorded: {miss}")
+    if not report['ok']:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
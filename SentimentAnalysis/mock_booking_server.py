@@ -0,0 +1,444 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from html import escape
+import argparse
+import random
+import json
+import threading
+import os
+
+# Saved Booking-like pages and the hotel dicts expected from them
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# 1x1 transparent GIF served for every card image
+PIXEL_GIF = bytes.fromhex('47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b')
+
+# Web font stylesheet, so pages load fonts like the real site
+FONTS_CSS = "@font-face { font-family: MockSans; src: url(/static/mock-sans.woff2) format('woff2'); }"
+
+ADJECTIVES = ['Grand', 'Royal', 'Blue', 'Golden', 'Old', 'Sea View', 'Garden', 'Palm', 'Desert', 'City']
+NOUNS = ['Hotel', 'Resort', 'Suites', 'Inn', 'Palace', 'Apartments', 'Lodge', 'Hostel']
+LABELS = [(9.0, 'Wonderful'), (8.0, 'Very good'), (7.0, 'Good'), (6.0, 'Pleasant'), (0.0, 'Review score')]
+
+# Pieces of the generated guest reviews
+REVIEW_TITLES = ['Great stay', 'Disappointing', 'Good value', 'Would come back', 'Not as expected', 'Lovely place']
+POSITIVE_PHRASES = [
+    'The staff were friendly and helpful.', 'Breakfast was delicious with lots of choice.',
+    'Amazing sea view from the balcony.', 'The room was spotless and quiet.',
+    'Great location close to the beach.', 'The pool area was clean and relaxing.',
+]
+NEGATIVE_PHRASES = [
+    'The bathroom was dirty and smelled bad.', 'Wifi was slow and kept dropping.',
+    'Breakfast was cold and repetitive.', 'The air conditioning was noisy all night.',
+    'Check in took forever and the reception was rude.', 'The bed was uncomfortable.',
+]
+
+def make_hotels(count, seed=0):
+    """
+    Deterministic synthetic hotels for the mock search results.
+
+    Some hotels have no price, taxes included in the price or no review
+    score, so every branch of the extraction is exercised.
+    """
+    rng = random.Random(seed)
+    hotels = []
+    for i in range(count):
+        score = round(rng.uniform(5.0, 9.9), 1) if rng.random() > 0.1 else None
+        price = rng.randrange(800, 25000, 10) if rng.random() > 0.05 else None
+        hotels.append({
+            'id': f"hotel-{i}",
+            'name': f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}",
+            'price': price,
+            'taxes': None if price is None else (0 if rng.random() < 0.2 else price * 14 // 100),
+            'score': score,
+            'label': next(label for bound, label in LABELS if score is None or score >= bound),
+            'reviews': rng.randrange(1, 5000),
+        })
+    return hotels
+
+def render_card(hotel):
+    """
+    One property card with Booking's test ids and review-score layout.
+    """
+    parts = [f'<div data-testid="property-card" data-hotel-id="{escape(hotel["id"])}">',
+             f'<img src="/images/{escape(hotel["id"])}.gif" width="200" height="150" alt="">',
+             f'<a href="/hotel/{escape(hotel["id"])}.html"><div data-testid="title">{escape(hotel["name"])}</div></a>']
+    if hotel['score'] is not None:
+        parts.append(
+            '<div data-testid="review-score">'
+            f'<div><div>Scored {hotel["score"]}</div><div>{hotel["score"]}</div></div>'
+            f'<div><div>{hotel["label"]}</div><div>{hotel["reviews"]:,} reviews</div></div>'
+            '</div>'
+        )
+    if hotel['price'] is not None:
+        parts.append(f'<span data-testid="price-and-discounted-price">EGP&nbsp;{hotel["price"]:,}</span>')
+        if hotel['taxes']:
+            parts.append(f'<div data-testid="taxes-and-charges">+EGP&nbsp;{hotel["taxes"]:,} taxes and fees</div>')
+        else:
+            parts.append('<div data-testid="taxes-and-charges">Includes taxes and fees</div>')
+    parts.append('</div>')
+    return "".join(parts)
+
+def render_cards(hotels):
+    return "\n".join(render_card(hotel) for hotel in hotels)
+
+def make_reviews(hotel_id, count, seed=0):
+    """
+    Deterministic guest reviews of one hotel, each with a title, a liked and a disliked part.
+    """
+    rng = random.Random(f"{seed}:{hotel_id}")
+    reviews = []
+    for _ in range(count):
+        reviews.append({
+            'title': rng.choice(REVIEW_TITLES),
+            'positive': " ".join(rng.sample(POSITIVE_PHRASES, rng.randint(0, 2))),
+            'negative': " ".join(rng.sample(NEGATIVE_PHRASES, rng.randint(0, 2))),
+        })
+    return reviews
+
+def render_review(review):
+    """
+    One review card with the test ids of Booking's review list.
+    """
+    parts = ['<div data-testid="review-card">', f'<h3 data-testid="review-title">{escape(review["title"])}</h3>']
+    if review['positive']:
+        parts.append(f'<div data-testid="review-positive-text">{escape(review["positive"])}</div>')
+    if review['negative']:
+        parts.append(f'<div data-testid="review-negative-text">{escape(review["negative"])}</div>')
+    parts.append('</div>')
+    return "".join(parts)
+
+# "Next page" replaces the review list with the next page of reviews
+HOTEL_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{name}</title></head><body>
+<h2>Guest reviews</h2>
+<div id="reviews">
+{reviews}
+</div>
+{next}
+<script>
+let reviewPage = 1;
+const next = document.querySelector('[aria-label="Next page"]');
+if (next) next.addEventListener('click', async () => {{
+    next.disabled = true;
+    reviewPage += 1;
+    const response = await fetch(`/hotel/{hotel_id}/reviews?page=${{reviewPage}}`);
+    const pages = Number(response.headers.get('X-Pages'));
+    document.getElementById('reviews').innerHTML = await response.text();
+    if (reviewPage >= pages) next.remove(); else next.disabled = false;
+}});
+</script>
+</body></html>
+"""
+
+# "Load more results" fetches the next cards and appends them, like the real page
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/static/fonts.css">
+<style>body {{ font-family: MockSans, sans-serif; }} [data-testid="property-card"] {{ border: 1px solid #ccc; margin: 8px; padding: 8px; }}</style>
+</head><body>
+<div role="dialog"><button aria-label="Dismiss sign-in info." onclick="this.parentNode.remove()">&times;</button></div>
+<div id="results">
+{cards}
+</div>
+{more}
+<script>
+let offset = {shown};
+const button = document.getElementById('load-more');
+if (button) button.addEventListener('click', async () => {{
+    button.disabled = true;
+    const response = await fetch(`/cards?offset=${{offset}}&limit={page_size}{query}`);
+    const total = Number(response.headers.get('X-Total'));
+    document.getElementById('results').insertAdjacentHTML('beforeend', await response.text());
+    offset += {page_size};
+    if (offset >= total) button.remove(); else button.disabled = false;
+}});
+</script>
+</body></html>
+"""
+
+class MockBooking:
+    """
+    A local stand-in for Booking.com search results.
+
+    Serves a search page with the first `page_size` property cards and a
+    "Load more results" button that appends the next ones, until `count`
+    cards are shown. Query parameters `count`, `page_size` and `seed` on the
+    search URL override the defaults, so one server can serve small and very
+    large result pages. Files in FIXTURES_DIR are served under /fixtures/.
+    Every card has an image and the page loads a web font, like the real site.
+    `delay` (seconds) is added to every response to imitate network latency.
+    Each hotel link leads to a page of `reviews_per_hotel` guest reviews, shown
+    `review_page_size` at a time with a "Next page" button.
+    """
+
+    def __init__(self, count=100, page_size=25, seed=0, delay=0.0, port=0, fixtures_dir=FIXTURES_DIR,
+                 reviews_per_hotel=30, review_page_size=10):
+        self.count = count
+        self.page_size = page_size
+        self.reviews_per_hotel = reviews_per_hotel
+        self.review_page_size = review_page_size
+        self.seed = seed
+        self.delay = delay
+        self.fixtures_dir = fixtures_dir
+        self._hotels = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def search_url(self, city="Alexandria", country="Egypt", checkin="2025-02-24", checkout="2025-02-27", adults=2, children=0, rooms=1, **overrides):
+        """
+        Search URL in the scrapers' format; keyword overrides (count, page_size, seed) are added to the query.
+        """
+        url = (f"{self.url}/searchresults.html?ss={city}%2C+{country}&checkin={checkin}&checkout={checkout}"
+               f"&group_adults={adults}&no_rooms={rooms}&group_children={children}")
+        return url + "".join(f"&{key}={value}" for key, value in overrides.items())
+
+    def hotels(self, count, seed):
+        key = (count, seed)
+        if key not in self._hotels:
+            self._hotels[key] = make_hotels(count, seed)
+        return self._hotels[key]
+
+    def _options(self, query):
+        def number(name, default):
+            return int(query[name][0]) if name in query else default
+        return number('count', self.count), number('page_size', self.page_size), number('seed', self.seed)
+
+    def search_page(self, query):
+        count, page_size, seed = self._options(query)
+        hotels = self.hotels(count, seed)
+        overrides = "".join(f"&{name}={query[name][0]}" for name in ('count', 'seed') if name in query)
+        more = '<button id="load-more" type="button">Load more results</button>' if count > page_size else ''
+        return SEARCH_PAGE.format(
+            title=escape(query.get('ss', ['Search results'])[0]),
+            cards=render_cards(hotels[:page_size]), more=more,
+            shown=min(page_size, count), page_size=page_size, query=overrides,
+        )
+
+    def cards(self, query):
+        count, page_size, seed = self._options(query)
+        offset = int(query.get('offset', ['0'])[0])
+        limit = int(query.get('limit', [page_size])[0])
+        return render_cards(self.hotels(count, seed)[offset:offset + limit]), count
+
+    def review_pages(self, hotel_id, page_no):
+        """
+        HTML of one page of a hotel's reviews and the number of pages.
+        """
+        reviews = make_reviews(hotel_id, self.reviews_per_hotel, self.seed)
+        size = self.review_page_size
+        pages = max(1, -(-len(reviews) // size))
+        return "\n".join(render_review(review) for review in reviews[(page_no - 1) * size:page_no * size]), pages
+
+    def hotel_page(self, hotel_id):
+        reviews, pages = self.review_pages(hotel_id, 1)
+        next_button = '<button aria-label="Next page" type="button">Next page</button>' if pages > 1 else ''
+        return HOTEL_PAGE.format(name=escape(hotel_id), hotel_id=escape(hotel_id), reviews=reviews, next=next_button)
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if mock.delay:
+                    threading.Event().wait(mock.delay)
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                if url.path == '/searchresults.html':
+                    self.send(200, mock.search_page(query))
+                elif url.path == '/cards':
+                    body, total = mock.cards(query)
+                    self.send(200, body, {'X-Total': str(total)})
+                elif url.path.startswith('/hotel/') and url.path.endswith('.html'):
+                    self.send(200, mock.hotel_page(url.path[len('/hotel/'):-len('.html')]))
+                elif url.path.startswith('/hotel/') and url.path.endswith('/reviews'):
+                    page_no = int(query.get('page', ['1'])[0])
+                    body, pages = mock.review_pages(url.path.split('/')[2], page_no)
+                    self.send(200, body, {'X-Pages': str(pages)})
+                elif url.path.startswith('/images/'):
+                    self.send(200, PIXEL_GIF, content_type='image/gif')
+                elif url.path == '/static/fonts.css':
+                    self.send(200, FONTS_CSS, content_type='text/css')
+                elif url.path.startswith('/static/'):
+                    self.send(200, b'\0' * 1024, content_type='font/woff2')
+                elif url.path.startswith('/fixtures/'):
+                    name = os.path.basename(url.path)
+                    path = os.path.join(mock.fixtures_dir, name)
+                    if os.path.isfile(path):
+                        with open(path, encoding='utf-8') as f:
+                            self.send(200, f.read())
+                    else:
+                        self.send(404, "Not found")
+                else:
+                    self.send(404, "Not found")
+
+            def send(self, status, body, headers=None, content_type='text/html; charset=utf-8'):
+                data = body.encode('utf-8') if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def load_fixture_expected(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+def expected_hotel(hotel):
+    """
+    The hotel dict the scrapers should extract from render_card(hotel).
+    """
+    from hotel_extraction import clean_price, clean_taxes, total_cost
+    result = {'Hotel': hotel['name'], 'Price': "N/A", 'Taxes & Charges': "N/A"}
+    if hotel['price'] is not None:
+        result['Price'] = clean_price(f"EGP\xa0{hotel['price']:,}")
+        result['Taxes & Charges'] = clean_taxes(f"+EGP\xa0{hotel['taxes']:,} taxes and fees" if hotel['taxes'] else "Includes taxes and fees",
+                                                result['Price'])
+    result['Total Cost'] = total_cost(result['Price'], result['Taxes & Charges'])
+    if hotel['score'] is not None:
+        result['Reviews Count'] = f"{hotel['reviews']:,} reviews"
+        result['Overall Rate'] = f"{hotel['score']} - {hotel['label']}"
+    else:
+        result['Reviews Count'] = "N/A"
+        result['Overall Rate'] = "N/A"
+    return result
+
+def check_extraction(counts=(100, 1000), headless=True):
+    """
+    Load the saved fixture and generated result pages in Chromium and check both extraction modes.
+
+    The fixture must give the saved expected dicts and every generated page
+    the dicts of its hotels; the timings of both modes are printed. Returns
+    True when everything matched.
+    """
+    from playwright.sync_api import sync_playwright
+    from hotel_extraction import compare_extraction
+
+    ok = True
+    with MockBooking() as mock, sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        page = browser.new_page()
+        pages = [('fixture', f"{mock.url}/fixtures/search_results.html", load_fixture_expected('search_results.json'))]
+        for count in counts:
+            url = mock.search_url(count=count, page_size=count)
+            pages.append((f"{count} cards", url, [expected_hotel(hotel) for hotel in mock.hotels(count, mock.seed)]))
+
+        for name, url, expected in pages:
+            page.goto(url)
+            report = compare_extraction(page)
+            matches = report['hotels'] == expected and not report['mismatches']
+            ok = ok and matches
+            speedup = report['locator_seconds'] / report['bulk_seconds'] if report['bulk_seconds'] else float('inf')
+            print(f"{name}: {report['cards']} cards, bulk {report['bulk_seconds'] * 1000:.1f} ms, "
+                  f"locators {report['locator_seconds'] * 1000:.1f} ms ({speedup:.0f}x), "
+                  f"{'OK' if matches else 'MISMATCH ' + str(report['mismatches'][:10])}")
+        browser.close()
+    return ok
+
+def compare_loading(count=500, page_size=25, delay=0.05, headless=True, browser=None):
+    """
+    Load the same paginated search in the default and the lean mode and print their step timings.
+
+    `delay` (seconds) is added to every response of the mock site, images
+    and fonts included. Runs in `browser` if given, else in a new Chromium.
+    Returns the step timings of both modes.
+    """
+    from contextlib import nullcontext
+    from playwright.sync_api import sync_playwright
+    from page_loading import enable_lean_mode, open_results, load_all_results, summarize_steps
+    from hotel_extraction import extract_hotels
+
+    timings = {}
+    with MockBooking(count, page_size, delay=delay) as mock, (nullcontext() if browser else sync_playwright()) as p:
+        own_browser = browser is None
+        if own_browser:
+            browser = p.chromium.launch(headless=headless)
+        for lean in (False, True):
+            mode = "lean" if lean else "default"
+            context = browser.new_context()
+            if lean:
+                enable_lean_mode(context)
+            page = context.new_page()
+            open_results(page, mock.search_url(), lean, log=lambda message: None)
+            steps = load_all_results(page, lean, log=lambda message: None)
+            hotels = extract_hotels(page)
+            timings[mode] = steps
+            per_step = sorted(step['seconds'] for step in steps[:-1]) or [0.0]
+            print(f"{mode}: {summarize_steps(steps)}, median step {per_step[len(per_step) // 2] * 1000:.0f} ms, "
+                  f"last step {steps[-1]['seconds'] * 1000:.0f} ms, {len(hotels)} hotels extracted")
+            context.close()
+        if own_browser:
+            browser.close()
+    return timings
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script serves Booking-like search result pages locally, for developing and checking the scrapers\n"
+            "without hitting booking.com. 'check' runs both extraction modes against the fixtures in Chromium,\n"
+            "'loading' times the pagination steps of the default and the lean page loading mode."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "mock_booking_server.py serve --port 8000 --count 500 --page-size 25\n"
+            "mock_booking_server.py check --counts 100,1000\n"
+            "mock_booking_server.py loading --count 500 --delay 0.05"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("mode", choices = ["serve", "check", "loading"], help = "Serve the mock site, check the extraction or time the page loading against it.")
+    parser.add_argument("--port", type = int, default = 8000, help = "Serve: port to listen on.", metavar = "8000")
+    parser.add_argument("--count", type = int, default = 100, help = "Serve, loading: hotels per search.", metavar = "100")
+    parser.add_argument("--page-size", type = int, default = 25, help = "Serve, loading: hotels shown before each 'Load more results'.", metavar = "25")
+    parser.add_argument("--reviews", type = int, default = 30, help = "Serve: guest reviews per hotel.", metavar = "30")
+    parser.add_argument("--delay", type = float, default = 0.0, help = "Serve, loading: seconds added to every response.", metavar = "0.2")
+    parser.add_argument("--counts", default = "100,1000", help = "Check: sizes of the generated result pages.", metavar = "100,1000")
+    parser.add_argument("--headed", action = "store_true", help = "Check, loading: show the browser.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    if args.mode == "check":
+        counts = [int(count) for count in args.counts.split(",") if count.strip()]
+        raise SystemExit(0 if check_extraction(counts, headless=not args.headed) else 1)
+    if args.mode == "loading":
+        compare_loading(args.count, args.page_size, args.delay, headless=not args.headed)
+        return
+
+    mock = MockBooking(args.count, args.page_size, delay=args.delay, port=args.port, reviews_per_hotel=args.reviews)
+    print(f"Serving mock search results at {mock.search_url()}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+if __name__ == "__main__":
+    main()
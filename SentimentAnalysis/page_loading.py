@@ -0,0 +1,195 @@
+from urllib.parse import urlsplit
+from time import perf_counter
+from hotel_extraction import CARD_SELECTOR
+
+# Requests the result cards never need, aborted in lean mode
+BLOCKED_RESOURCE_TYPES = frozenset(['image', 'media', 'font'])
+BLOCKED_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'facebook.net', 'facebook.com', 'bat.bing.com', 'hotjar.com', 'criteo.com', 'criteo.net',
+    'taboola.com', 'outbrain.com', 'tiktok.com', 'snapchat.com', 'pinterest.com', 'quantserve.com',
+)
+
+# Lean mode waits this long (ms) for "Load more results" before deciding there are no more results
+LEAN_BUTTON_TIMEOUT = 5000
+# and this long for the sign-in pop-up
+LEAN_POPUP_TIMEOUT = 3000
+
+# True once there are more property cards than before the click
+MORE_CARDS_JS = "([selector, count]) => document.querySelectorAll(selector).length > count"
+# How long (ms) a click on "Load more results" may take to add cards
+MORE_CARDS_TIMEOUT = 30000
+
+class PagingError(Exception):
+    """
+    "Load more results" was there but clicking it did not add cards, so the results are incomplete.
+
+    `steps` holds the step timings up to the failed step and `cards` the
+    number of cards that did load.
+    """
+
+    def __init__(self, message, steps, cards):
+        super().__init__(message)
+        self.steps = steps
+        self.cards = cards
+
+def should_block(request):
+    """
+    Whether lean mode aborts a request: images, media, fonts and known trackers.
+    """
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(request.url).hostname or ""
+    return any(host == domain or host.endswith("." + domain) for domain in BLOCKED_DOMAINS)
+
+def enable_lean_mode(context):
+    """
+    Abort unneeded requests of every page of a (sync) browser context or page.
+
+    Other requests fall back to the routes installed before, e.g. http_replay's, or go to the network.
+    """
+    context.route("**/*", lambda route: route.abort() if should_block(route.request) else route.fallback())
+
+async def enable_lean_mode_async(context):
+    async def handle(route):
+        if should_block(route.request):
+            await route.abort()
+        else:
+            await route.fallback()
+    await context.route("**/*", handle)
+
+def card_count(page):
+    return page.locator(CARD_SELECTOR).count()
+
+def _first_line(error):
+    # Playwright errors carry a multi-line call log
+    return (str(error).splitlines() or [type(error).__name__])[0]
+
+def _log_step(steps, cards, start, log):
+    steps.append({'step': len(steps) + 1, 'cards': cards, 'seconds': perf_counter() - start})
+    log(f"Step {len(steps)}: {cards} cards ({steps[-1]['seconds'] * 1000:.0f} ms)")
+
+def open_results(page, url, lean=False, log=print):
+    """
+    Load the search results page and dismiss the sign-in pop-up.
+
+    Lean mode only waits for the first property card instead of network idle.
+    Navigation errors are raised to the caller.
+    """
+    if lean:
+        page.goto(url, timeout=30000, wait_until="domcontentloaded")
+        page.wait_for_selector(CARD_SELECTOR, timeout=30000)
+    else:
+        page.goto(url, timeout=30000)
+        page.wait_for_load_state("networkidle", timeout=30000)
+
+    try:
+        # Handle the initial pop-up (e.g., sign-in prompt)
+        x_sign_in = page.get_by_role("button", name="Dismiss sign-in info.")
+        x_sign_in.wait_for(timeout=LEAN_POPUP_TIMEOUT if lean else 10000)
+        x_sign_in.click()
+    except Exception:
+        log("Warning: Could not dismiss sign-in popup. Continuing anyway...")
+
+def load_all_results(page, lean=False, log=print, on_step=None):
+    """
+    Scroll and click "Load more results" until every property card is on the page.
+
+    The default mode waits for network idle after each scroll, like the
+    scrapers always did. Lean mode clicks as soon as the button shows up.
+    Both then wait for the card count to grow. Every step is timed and
+    logged, and `on_step(cards)` is called after every click for more
+    results, e.g. with an IncrementalExtractor. Returns the step timings as dicts with 'step', 'cards' and 'seconds'.
+
+    Only a missing button ends the results. A click that fails or does not
+    add cards raises PagingError, so a slow "Load more results" is not
+    mistaken for the last page.
+    """
+    next_button = page.get_by_text('Load more results')
+    steps = []
+    count = card_count(page)
+    while True:
+        start = perf_counter()
+        # The end key takes us to the end of the page; needed for "Lazy loading"
+        page.keyboard.press("End")
+        if not lean:
+            log("Scrolling down...")
+            page.wait_for_load_state("networkidle")
+        try:
+            next_button.wait_for(timeout=LEAN_BUTTON_TIMEOUT if lean else None)
+        except Exception:
+            # No more "Load more results": every card is on the page
+            _log_step(steps, card_count(page), start, log)
+            break
+        try:
+            next_button.click()
+            page.wait_for_function(MORE_CARDS_JS, arg=[CARD_SELECTOR, count], timeout=MORE_CARDS_TIMEOUT)
+        except Exception as e:
+            _log_step(steps, card_count(page), start, log)
+            log(f"Error: 'Load more results' added no cards after {count} cards: {_first_line(e)}")
+            raise PagingError(f"'Load more results' added no cards after {count} cards", steps, count) from e
+        count = card_count(page)
+        _log_step(steps, count, start, log)
+        if on_step is not None:
+            on_step(count)
+    return steps
+
+async def open_results_async(page, url, lean=False, log=print):
+    """
+    open_results() for the async API.
+    """
+    if lean:
+        await page.goto(url, timeout=30000, wait_until="domcontentloaded")
+        await page.wait_for_selector(CARD_SELECTOR, timeout=30000)
+    else:
+        await page.goto(url, timeout=30000)
+        await page.wait_for_load_state("networkidle", timeout=30000)
+
+    try:
+        x_sign_in = page.get_by_role("button", name="Dismiss sign-in info.")
+        await x_sign_in.wait_for(timeout=LEAN_POPUP_TIMEOUT if lean else 10000)
+        await x_sign_in.click()
+    except Exception:
+        log("Warning: Could not dismiss sign-in popup. Continuing anyway...")
+
+async def load_all_results_async(page, lean=False, log=print, before_click=None, load_more_timeout=30000, on_step=None):
+    """
+    load_all_results() for the async API. `before_click` is awaited before each click, e.g. for rate limiting,
+    and `on_step(cards)` is awaited after it. Raises PagingError like load_all_results().
+    """
+    next_button = page.get_by_text('Load more results')
+    steps = []
+    count = await page.locator(CARD_SELECTOR).count()
+    while True:
+        start = perf_counter()
+        await page.keyboard.press("End")
+        if not lean:
+            await page.wait_for_load_state("networkidle")
+        try:
+            await next_button.wait_for(timeout=LEAN_BUTTON_TIMEOUT if lean else load_more_timeout)
+        except Exception:
+            _log_step(steps, await page.locator(CARD_SELECTOR).count(), start, log)
+            break
+        try:
+            if before_click is not None:
+                await before_click()
+            await next_button.click()
+            await page.wait_for_function(MORE_CARDS_JS, arg=[CARD_SELECTOR, count], timeout=MORE_CARDS_TIMEOUT)
+        except Exception as e:
+            _log_step(steps, await page.locator(CARD_SELECTOR).count(), start, log)
+            log(f"Error: 'Load more results' added no cards after {count} cards: {_first_line(e)}")
+            raise PagingError(f"'Load more results' added no cards after {count} cards", steps, count) from e
+        count = await page.locator(CARD_SELECTOR).count()
+        _log_step(steps, count, start, log)
+        if on_step is not None:
+            await on_step(count)
+    return steps
+
+def summarize_steps(steps):
+    """
+    One line summary of load_all_results() timings.
+    """
+    if not steps:
+        return "no pagination steps"
+    total = sum(step['seconds'] for step in steps)
+    return f"{len(steps)} steps, {steps[-1]['cards']} cards in {total:.1f}s ({total / len(steps) * 1000:.0f} ms per step)"
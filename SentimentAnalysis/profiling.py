@@ -0,0 +1,193 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+import cProfile
+import json
+
+# Upper bounds of the latency histogram buckets in seconds, 1µs doubling up to ~1s.
+# Slower calls land in a final overflow bucket.
+HISTOGRAM_BOUNDS = tuple(1e-6 * 2 ** i for i in range(21))
+
+# Active profiler, see enable_profiling(). None means instrumentation is off.
+_profiler = None
+
+class StageTimings:
+    """
+    Call count, cumulative time and latency histogram of one stage.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.histogram[bisect_left(HISTOGRAM_BOUNDS, seconds)] += 1
+
+    def percentile(self, p):
+        """
+        Upper bound of the histogram bucket holding the p-th percentile call.
+        """
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, calls in zip(HISTOGRAM_BOUNDS, self.histogram):
+            seen += calls
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else None,
+            'min_seconds': self.min,
+            'max_seconds': self.max,
+            'p50_seconds': self.percentile(50),
+            'p99_seconds': self.percentile(99),
+            'histogram': self.histogram_dict(),
+        }
+
+    def histogram_dict(self):
+        """
+        Non-empty histogram buckets keyed by their upper bound in microseconds.
+        """
+        labels = [f"<={bound * 1e6:g}us" for bound in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1] * 1e6:g}us"]
+        return {label: calls for label, calls in zip(labels, self.histogram) if calls}
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, perf_counter() - self.start)
+        return False
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+# Returned by stage() while profiling is off, so the hot paths only pay for a global lookup
+_NULL_STAGE = _NullStage()
+
+class Profiler:
+    """
+    Collects per-stage timings from the instrumented analyzer code.
+
+    Stages nest, so the time of an outer stage such as 'target.determine_sentiment'
+    includes the time of the stages it calls.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            timings = self.stages.get(name)
+            if timings is None:
+                timings = self.stages[name] = StageTimings(name)
+            timings.add(seconds)
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def clear(self):
+        with self._lock:
+            self.stages.clear()
+
+    def stats(self):
+        """
+        Timings of every stage seen so far, keyed by stage name.
+        """
+        with self._lock:
+            return {name: timings.to_dict() for name, timings in self.stages.items()}
+
+    def dump_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats(), f, indent=2)
+
+    def report(self):
+        """
+        One line per stage, slowest cumulative time first.
+        """
+        lines = []
+        for name, stats in sorted(self.stats().items(), key=lambda item: -item[1]['total_seconds']):
+            lines.append(
+                f"{name:<28} {stats['count']:>9} calls {stats['total_seconds']:>9.3f}s total "
+                f"{stats['mean_seconds'] * 1e6:>9.1f}us mean  p99 <= {stats['p99_seconds'] * 1e6:g}us"
+            )
+        return "\n".join(lines)
+
+def stage(name):
+    """
+    Context manager timing a block as stage `name` when profiling is enabled.
+    """
+    if _profiler is None:
+        return _NULL_STAGE
+    return _Stage(_profiler, name)
+
+def enable_profiling(profiler=None):
+    """
+    Start recording stage timings. Returns the Profiler that collects them.
+    """
+    global _profiler
+    _profiler = profiler or Profiler()
+    return _profiler
+
+def disable_profiling():
+    global _profiler
+    _profiler = None
+
+def get_profiler():
+    """
+    The active Profiler, or None when profiling is off.
+    """
+    return _profiler
+
+@contextmanager
+def profile_run(json_path=None, pstats_path=None, profiler=None):
+    """
+    Profile the stages run inside the block.
+
+    On exit the stage timings are written to `json_path` and, when
+    `pstats_path` is given, a cProfile of the block is saved there for
+    `python -m pstats` or snakeviz.
+    """
+    active = enable_profiling(profiler)
+    cprofile = cProfile.Profile() if pstats_path else None
+    if cprofile is not None:
+        cprofile.enable()
+    try:
+        yield active
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(pstats_path)
+        disable_profiling()
+        if json_path:
+            active.dump_json(json_path)
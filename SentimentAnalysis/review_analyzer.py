@@ -0,0 +1,212 @@
+import string
+from nltk.tokenize import word_tokenize
+from nltk.corpus import stopwords
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from nltk.stem import WordNetLemmatizer
+from vader_numpy import VectorizedVader
+from emotion_lexicon import EmotionLexicon
+import profiling
+import fast_tokenize
+
+# Translation table used to strip punctuation, built once instead of per review
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+def determine_sentiment_label(scores):
+    """
+    Map VADER polarity scores to the sentiment label shown by the Review Analyzer.
+    """
+    if scores['neg'] > scores['pos']:
+        return "Negative Sentiment"
+    elif scores['pos'] > scores['neg']:
+        return "Positive Sentiment"
+    return "Neutral Sentiment"
+
+def determine_emotion_label(scores):
+    """
+    Map VADER polarity scores to the basic emotion shown by the Review Analyzer.
+    """
+    if scores['pos'] > 0.5:
+        return "Overall Satisfied"
+    elif scores['neg'] > 0.5:
+        return "Overall Dissatisfied"
+    elif scores['neu'] > 0.5:
+        return "Calm Emotions"
+    return "Mixed Emotions"
+
+class ReviewAnalyzer:
+    """
+    Headless review scoring engine used by the Review Analyzer GUI and batch tools.
+
+    The VADER analyzer, stop word set and lemmatizer are loaded once when the
+    analyzer is created, so scoring a review only pays for the work on its text.
+    With engine="numpy", analyze_batch() scores the whole batch at once with
+    VectorizedVader, which gives the same scores as NLTK. With emotions=True the
+    results also carry the fine-grained emotion distribution from emotion.txt.
+    Pass an AnalysisCache as `cache` to memoize tokenization, lemmas and scores,
+    and a ScoreCache as `score_cache` to reuse results stored by earlier runs.
+    With with_lemmas=False (and no emotions) only the scores and labels are
+    computed, skipping tokenization and lemmatization. tokenizer="regex"
+    tokenizes with fast_tokenize instead of NLTK.
+    """
+
+    def __init__(self, engine="nltk", emotions=False, cache=None, score_cache=None, with_lemmas=True, tokenizer="nltk"):
+        if engine not in ("nltk", "numpy"):
+            raise ValueError(f"Unknown scoring engine '{engine}', expected 'nltk' or 'numpy'")
+        if tokenizer not in ("nltk", "regex"):
+            raise ValueError(f"Unknown tokenizer '{tokenizer}', expected 'nltk' or 'regex'")
+        # A set gives constant time lookups, stopwords.words() returns a list
+        self.stop_words = frozenset(stopwords.words('english'))
+        self.lemmatizer = WordNetLemmatizer()
+        self.sia = SentimentIntensityAnalyzer()
+        self.engine = engine
+        self.word_tokenize = fast_tokenize.word_tokenize if tokenizer == "regex" else word_tokenize
+        self.cache = cache
+        self.score_cache = score_cache
+        # Options that change the result and so must be part of the score cache key;
+        # like TargetReview, the default tokenizer keeps the keys of older cache files
+        self.cache_options = f"review:emotions={emotions}"
+        if tokenizer != "nltk":
+            self.cache_options += f":tokenizer={tokenizer}"
+        self.vectorized = None
+        if engine == "numpy":
+            self.vectorized = VectorizedVader(self.sia)
+        self.emotion_lexicon = EmotionLexicon(self) if emotions else None
+        self.with_lemmas = with_lemmas or emotions
+
+    def normalize(self, text):
+        """
+        Lowercase the review and remove punctuation.
+        """
+        with profiling.stage("review.normalize"):
+            return text.lower().translate(PUNCTUATION_TABLE)
+
+    def tokenize(self, clean_text):
+        """
+        Tokenize normalized review text.
+        """
+        with profiling.stage("review.tokenize"):
+            if self.cache is None:
+                return self.word_tokenize(clean_text)
+            return self.cache.tokens.get_or_compute(clean_text, lambda t: tuple(self.word_tokenize(t)))
+
+    def remove_stopwords(self, tokens):
+        """
+        Remove English stop words from a list of tokens.
+        """
+        with profiling.stage("review.stopwords"):
+            return [word for word in tokens if word not in self.stop_words]
+
+    def lemmatize(self, tokens):
+        """
+        Lemmatize a list of tokens.
+        """
+        with profiling.stage("review.lemmatize"):
+            if self.cache is None:
+                return [self.lemmatizer.lemmatize(word) for word in tokens]
+            lemma_cache = self.cache.lemmas
+            return [lemma_cache.get_or_compute(word, self.lemmatizer.lemmatize) for word in tokens]
+
+    def score(self, clean_text):
+        """
+        Score normalized review text and attach the sentiment and emotion labels.
+        """
+        with profiling.stage("review.vader"):
+            if self.cache is None:
+                scores = self.sia.polarity_scores(clean_text)
+            else:
+                scores = self.cache.scores.get_or_compute(clean_text, self.sia.polarity_scores)
+        return self.label(scores)
+
+    def label(self, scores):
+        """
+        Copy polarity scores and attach the sentiment and emotion labels.
+        """
+        result = dict(scores)
+        result['sentiment'] = determine_sentiment_label(result)
+        result['emotion'] = determine_emotion_label(result)
+        return result
+
+    def analyze(self, text):
+        """
+        Analyze a single review.
+
+        Returns a dictionary with the VADER 'neg', 'neu', 'pos' and 'compound'
+        scores, the 'sentiment' and 'emotion' labels and the review's 'lemmas'.
+        When emotions are enabled it also has the 'emotions' distribution.
+        Results served from the score cache do not carry the 'lemmas'.
+        """
+        return self.analyze_batch([text])[0]
+
+    def _analyze_clean(self, clean_text, tokens=None):
+        result = self.score(clean_text)
+        self.add_lemmas(result, clean_text, tokens)
+        return result
+
+    def _analyze_clean_batch(self, clean_texts, token_lists=None):
+        if token_lists is None:
+            token_lists = [None] * len(clean_texts)
+        if self.vectorized is None:
+            return [self._analyze_clean(clean_text, tokens) for clean_text, tokens in zip(clean_texts, token_lists)]
+
+        with profiling.stage("review.vader_numpy"):
+            batch_scores = self.vectorized.polarity_scores_batch(clean_texts)
+        results = []
+        for clean_text, tokens, scores in zip(clean_texts, token_lists, batch_scores):
+            result = self.label(scores)
+            self.add_lemmas(result, clean_text, tokens)
+            results.append(result)
+        return results
+
+    def add_lemmas(self, result, clean_text, tokens=None):
+        """
+        Attach the review's lemmas, and their emotion distribution when enabled, to a result.
+
+        `tokens` are the already tokenized `clean_text`, when available.
+        """
+        if not self.with_lemmas:
+            return
+        if tokens is None:
+            tokens = self.tokenize(clean_text)
+        result['lemmas'] = self.lemmatize(self.remove_stopwords(tokens))
+        if self.emotion_lexicon is not None:
+            with profiling.stage("review.emotions"):
+                result['emotions'] = self.emotion_lexicon.distribution(result['lemmas'])
+
+    def analyze_pretokenized(self, clean_texts, token_lists):
+        """
+        Analyze reviews that were normalized and tokenized beforehand (see segmentation.py).
+
+        `clean_texts` are the normalize()d reviews and `token_lists` their
+        tokenize()d words. Gives the same results as analyze_batch() on the
+        original reviews, without the score cache.
+        """
+        with profiling.stage("review.analyze_pretokenized"):
+            return self._analyze_clean_batch(list(clean_texts), list(token_lists))
+
+    def analyze_batch(self, texts):
+        """
+        Analyze an iterable of reviews, returning the results in input order.
+
+        With a score cache, all reviews are looked up in one go and only the
+        ones missing from the cache are analyzed and then stored.
+        """
+        with profiling.stage("review.analyze_batch"):
+            return self._analyze_batch(texts)
+
+    def _analyze_batch(self, texts):
+        clean_texts = [self.normalize(text) for text in texts]
+        if self.score_cache is None:
+            return self._analyze_clean_batch(clean_texts)
+
+        keys = [self.score_cache.make_key(clean_text, self.cache_options) for clean_text in clean_texts]
+        cached = self.score_cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        fresh = self._analyze_clean_batch([clean_texts[i] for i in missing])
+        self.score_cache.put_many({
+            keys[i]: {k: v for k, v in result.items() if k != 'lemmas'} for i, result in zip(missing, fresh)
+        })
+
+        results = [dict(cached[key]) if key in cached else None for key in keys]
+        for i, result in zip(missing, fresh):
+            results[i] = result
+        return results
@@ -0,0 +1,330 @@
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import asyncio
+import argparse
+import sys
+import os
+import TargetReview
+import batch_score
+from batch_score import SCORE_COLUMNS
+from async_scraper import HostRateLimiter, ContextPool
+from hotel_extraction import CARD_SELECTOR, EXTRACT_CARDS_JS, parse_card, hotel_key, search_url
+from hotel_output import open_sink
+from page_loading import open_results_async, load_all_results_async
+
+# Booking's review list
+REVIEW_SELECTOR = '[data-testid="review-card"]'
+NEXT_PAGE_SELECTOR = '[aria-label="Next page"]'
+
+# Runs in the page: title, liked and disliked text of every review card
+EXTRACT_REVIEWS_JS = """
+(cards) => cards.map((card) => {
+    const text = (testId) => {
+        const el = card.querySelector(`[data-testid="${testId}"]`);
+        return el ? el.innerText.trim() : '';
+    };
+    return {title: text('review-title'), positive: text('review-positive-text'), negative: text('review-negative-text')};
+})
+"""
+
+# True once the first review card shows something else than before the click
+REVIEWS_CHANGED_JS = """
+([selector, first]) => {
+    const card = document.querySelector(selector);
+    return card !== null && card.innerText !== first;
+}
+"""
+
+# Targets scored for every review when none are given
+DEFAULT_TARGETS = ['staff', 'breakfast', 'room', 'location', 'cleanliness']
+
+# Targets of the worker processes, set by init_worker
+_targets = []
+
+def review_text(raw):
+    """
+    One review text from the parts of a review card, each ending as a sentence.
+    """
+    parts = [part for part in (raw['title'], raw['positive'], raw['negative']) if part]
+    return " ".join(part if part[-1] in ".!?" else part + "." for part in parts)
+
+def init_worker(engine="nltk", targets=(), tokenizer="nltk"):
+    """
+    Load both analyzers once per worker process.
+    """
+    global _targets
+    batch_score.init_worker(engine, tokenizer=tokenizer)
+    TargetReview.set_tokenizer(tokenizer)
+    _targets = list(targets)
+
+def score_reviews(texts):
+    """
+    Score a batch of reviews in a worker process: overall sentiment and sentiment towards each target.
+    """
+    rows = []
+    for row, text in zip(batch_score.score_chunk(texts), texts):
+        scored = dict(zip(SCORE_COLUMNS, row))
+        if _targets:
+            for target, result in TargetReview.analyze_targets(_targets, text).items():
+                scored[f"{target} sentiment"] = result['sentiment'] if result else None
+                scored[f"{target} compound"] = result['compound'] if result else None
+        rows.append(scored)
+    return rows
+
+async def find_hotels(page, url, limiter, lean=True):
+    """
+    Run a search and return its hotels as dicts with 'Hotel' and 'URL', one per hotel page.
+    """
+    await limiter.wait(url)
+    await open_results_async(page, url, lean, log=lambda message: None)
+    await load_all_results_async(page, lean, log=lambda message: None, before_click=lambda: limiter.wait(page.url))
+    hotels = {}
+    for raw in await page.locator(CARD_SELECTOR).evaluate_all(EXTRACT_CARDS_JS, 0):
+        if raw['url']:
+            hotels.setdefault(hotel_key(raw), {'Hotel': parse_card(raw)['Hotel'], 'URL': raw['url']})
+    return list(hotels.values())
+
+async def crawl_hotel(page, hotel, limiter, queue, max_pages=10, stats=None):
+    """
+    Put the reviews of one hotel on the queue, a page of reviews at a time.
+
+    Follows "Next page" up to `max_pages` pages. The queue is bounded, so
+    this waits whenever the scorers fall behind. Every page queued is added
+    to stats['reviews'] right away, so a hotel failing midway still counts
+    the reviews it queued. Returns the number of reviews.
+    """
+    await limiter.wait(hotel['URL'])
+    await page.goto(hotel['URL'], timeout=30000, wait_until="domcontentloaded")
+    count = 0
+    for _ in range(max_pages):
+        try:
+            await page.wait_for_selector(REVIEW_SELECTOR, timeout=5000)
+        except Exception:
+            break
+        raws = await page.locator(REVIEW_SELECTOR).evaluate_all(EXTRACT_REVIEWS_JS)
+        texts = [text for text in map(review_text, raws) if text]
+        if texts:
+            await queue.put((hotel, texts))
+            count += len(texts)
+            if stats is not None:
+                stats['reviews'] += len(texts)
+
+        next_page = page.locator(NEXT_PAGE_SELECTOR)
+        if not await next_page.count() or await next_page.first.is_disabled():
+            break
+        first = await page.locator(REVIEW_SELECTOR).first.inner_text()
+        await limiter.wait(page.url)
+        await next_page.first.click()
+        try:
+            await page.wait_for_function(REVIEWS_CHANGED_JS, arg=[REVIEW_SELECTOR, first], timeout=30000)
+        except Exception:
+            break
+    return count
+
+class ReviewScorer:
+    """
+    Consumer side of the pipeline: takes review batches off the queue and scores them in a process pool.
+
+    Reviews are grouped into batches of `batch_size`, or sent as they are
+    when the queue runs dry, and at most `max_pending` batches are scored at
+    once; while all of them are busy the queue fills up and the crawlers
+    wait. Scored rows are written to `sink` as each batch completes; a
+    batch that fails to score or to write is counted in `failed` and the
+    queue keeps draining.
+    """
+
+    def __init__(self, executor, sink, batch_size=256, max_pending=4):
+        self.executor = executor
+        self.sink = sink
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.scored = 0
+        self.failed = 0
+
+    def _submit(self, batch, pending):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, score_reviews, [text for _, text in batch])
+        pending[future] = batch
+
+    def _write(self, done, pending):
+        for future in done:
+            batch = pending.pop(future)
+            try:
+                scores = future.result()
+            except Exception as e:
+                # Keep draining the queue, or the crawlers would wait forever
+                self.failed += len(batch)
+                print(f"Scoring {len(batch)} reviews failed: {e}", file=sys.stderr, flush=True)
+                continue
+            rows = [{'Hotel': hotel['Hotel'], 'URL': hotel['URL'], 'Review': text, **scores}
+                    for (hotel, text), scores in zip(batch, scores)]
+            try:
+                self.sink.write(rows)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Writing {len(batch)} scored reviews failed: {e}", file=sys.stderr, flush=True)
+                continue
+            self.scored += len(rows)
+
+    async def run(self, queue):
+        pending = {}
+        batch = []
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            hotel, texts = item
+            batch.extend((hotel, text) for text in texts)
+            if len(batch) >= self.batch_size or (queue.empty() and len(pending) < self.max_pending):
+                self._submit(batch, pending)
+                batch = []
+            if len(pending) >= self.max_pending:
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                self._write(done, pending)
+            else:
+                self._write([future for future in pending if future.done()], pending)
+        if batch:
+            self._submit(batch, pending)
+        if pending:
+            done, _ = await asyncio.wait(list(pending))
+            self._write(done, pending)
+        return self.scored
+
+async def unless_stopped(awaitable, task):
+    """
+    Await `awaitable`, unless `task` ends first: then cancel it and raise the error of `task`.
+
+    Keeps the crawlers from waiting forever on a full queue nobody drains.
+    """
+    future = asyncio.ensure_future(awaitable)
+    await asyncio.wait([future, task], return_when=asyncio.FIRST_COMPLETED)
+    if not future.done():
+        future.cancel()
+        await asyncio.gather(future, return_exceptions=True)
+        task.result()
+        raise RuntimeError("Scoring stopped before the crawl finished")
+    return future.result()
+
+async def crawl_and_score(hotels=None, search=None, output="reviews_scored.jsonl", base_url="https://www.booking.com",
+                          pages=4, workers=None, queue_size=64, batch_size=256, max_review_pages=10, rate=2.0,
+                          engine="nltk", targets=DEFAULT_TARGETS, tokenizer="nltk", lean=True, headless=True, max_hotels=None):
+    """
+    Crawl the reviews of `hotels` (dicts with 'Hotel' and 'URL'), or of the hotels a `search` finds, and score them.
+
+    `pages` browser pages crawl hotels concurrently and put each page of
+    reviews on a queue holding at most `queue_size` items; a ReviewScorer
+    scores them in `workers` processes while the crawl goes on. If scoring
+    stops with an error, the crawl is cancelled and the error raised.
+    Returns a dict of counts and timings.
+    """
+    from playwright.async_api import async_playwright
+
+    loop = asyncio.get_running_loop()
+    workers = workers or os.cpu_count()
+    limiter = HostRateLimiter(rate)
+    queue = asyncio.Queue(maxsize=queue_size)
+    stats = {'hotels': 0, 'reviews': 0, 'failed': 0}
+    start = perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(engine, list(targets), tokenizer)) as executor, \
+            open_sink(output, columns=None) as sink:
+        # Warm the workers up while the browser starts
+        warmup = [loop.run_in_executor(executor, score_reviews, ["Warming up."]) for _ in range(workers)]
+        scorer = ReviewScorer(executor, sink, batch_size, max_pending=workers)
+        scoring = asyncio.ensure_future(scorer.run(queue))
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=headless)
+            pool = await ContextPool(browser, pages, lean).start()
+            try:
+                if hotels is None:
+                    async with pool.page() as page:
+                        hotels = await find_hotels(page, search_url(search, base_url), limiter, lean)
+                    print(f"Found {len(hotels)} hotels", file=sys.stderr, flush=True)
+                hotels = hotels[:max_hotels] if max_hotels else hotels
+                await asyncio.gather(*warmup)
+
+                async def crawl(hotel):
+                    try:
+                        async with pool.page() as page:
+                            await crawl_hotel(page, hotel, limiter, queue, max_review_pages, stats)
+                        stats['hotels'] += 1
+                    except Exception as e:
+                        stats['failed'] += 1
+                        print(f"{hotel['Hotel']}: failed: {e}", file=sys.stderr, flush=True)
+
+                await unless_stopped(asyncio.gather(*(crawl(hotel) for hotel in hotels)), scoring)
+                stats['crawl_seconds'] = perf_counter() - start
+            finally:
+                if not scoring.done():
+                    await unless_stopped(queue.put(None), scoring)
+                await pool.close()
+                await browser.close()
+        stats['scored'] = await scoring
+        stats['unscored'] = scorer.failed
+    stats['seconds'] = perf_counter() - start
+    return stats
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script visits the review pages of the hotels found by a search and scores the reviews\n"
+            "while it crawls: a pool of browser pages feeds a bounded queue that worker processes drain\n"
+            "with the review and target analyzers."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "review_crawler.py --city Alexandria --country Egypt --indate 2025-2-24 --outdate 2025-2-27\n"
+            "    --pages 6 --workers 4 --targets \"staff, breakfast, room\" --output reviews_scored.jsonl\n"
+            "review_crawler.py --hotels hotels.csv --output reviews_scored.csv"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--hotels", default = None, help = "File with Hotel and URL columns, instead of a search.", metavar = "hotels.csv")
+    parser.add_argument("--city", default = None, help = "Search: the city to search in.", metavar = "Alexandria")
+    parser.add_argument("--country", default = None, help = "Search: the country to search in.", metavar = "Egypt")
+    parser.add_argument("--indate", default = None, help = "Search: checking in date.", metavar = "2025-2-24")
+    parser.add_argument("--outdate", default = None, help = "Search: checking out date.", metavar = "2025-2-27")
+    parser.add_argument("--nadult", default = "2", help = "Search: number of adults.", metavar = "2")
+    parser.add_argument("--nchild", default = "0", help = "Search: number of children.", metavar = "0")
+    parser.add_argument("--nroom", default = "1", help = "Search: number of rooms.", metavar = "1")
+    parser.add_argument("--output", default = "reviews_scored.jsonl", help = "Scored reviews, JSONL or CSV, written as they are scored.", metavar = "reviews_scored.jsonl")
+    parser.add_argument("--pages", type = int, default = 4, help = "Browser pages crawling at the same time.", metavar = "4")
+    parser.add_argument("--workers", type = int, default = None, help = "Scoring processes (default: all CPUs).", metavar = "4")
+    parser.add_argument("--queue-size", type = int, default = 64, help = "Pages of reviews waiting to be scored before the crawlers pause.", metavar = "64")
+    parser.add_argument("--batch-size", type = int, default = 256, help = "Reviews per scoring task.", metavar = "256")
+    parser.add_argument("--max-review-pages", type = int, default = 10, help = "Review pages read per hotel.", metavar = "10")
+    parser.add_argument("--max-hotels", type = int, default = None, help = "Only crawl the first hotels.", metavar = "50")
+    parser.add_argument("--rate", type = float, default = 2.0, help = "Page loads and clicks per second per site, 0 for no limit.", metavar = "2")
+    parser.add_argument("--engine", choices = ["nltk", "numpy"], default = "nltk", help = "VADER implementation used for the overall sentiment.")
+    parser.add_argument("--tokenizer", choices = sorted(TargetReview.TOKENIZERS), default = "nltk", help = "Word and sentence tokenizer.")
+    parser.add_argument("--targets", default = ", ".join(DEFAULT_TARGETS), help = "Comma separated targets scored in every review, empty for none.", metavar = "staff,breakfast")
+    parser.add_argument("--base-url", default = "https://www.booking.com", help = "Site to search, e.g. a local mock_booking_server.py.", metavar = "http://127.0.0.1:8000")
+    parser.add_argument("--no-lean", action = "store_true", help = "Load pages with images, fonts and trackers.")
+    parser.add_argument("--headed", action = "store_true", help = "Show the browser windows.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    hotels = search = None
+    if args.hotels:
+        hotels = batch_score.read_reviews(args.hotels)[['Hotel', 'URL']].astype(str).to_dict('records')
+    elif args.city and args.country and args.indate and args.outdate:
+        search = {'city': args.city, 'country': args.country, 'indate': args.indate, 'outdate': args.outdate,
+                  'nadult': args.nadult, 'nchild': args.nchild, 'nroom': args.nroom}
+    else:
+        raise SystemExit("Give --hotels, or --city, --country, --indate and --outdate")
+
+    stats = asyncio.run(crawl_and_score(
+        hotels, search, args.output, args.base_url, args.pages, args.workers, args.queue_size, args.batch_size,
+        args.max_review_pages, args.rate, args.engine, TargetReview.parse_targets(args.targets), args.tokenizer,
+        lean=not args.no_lean, headless=not args.headed, max_hotels=args.max_hotels,
+    ))
+    rate = stats['scored'] / stats['seconds'] if stats['seconds'] else 0.0
+    print(f"Crawled {stats['reviews']} reviews from {stats['hotels']} hotels ({stats['failed']} failed) in {stats['crawl_seconds']:.1f}s, "
+          f"scored {stats['scored']} ({stats['unscored']} failed) in {stats['seconds']:.1f}s ({rate:.0f} reviews/s) -> {args.output}")
+    if stats['failed'] or stats['unscored']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+from itertools import islice
+from time import perf_counter
+import argparse
+import csv
+import json
+import sys
+import os
+from review_analyzer import ReviewAnalyzer
+from analysis_cache import AnalysisCache
+import profiling
+
+# Pipeline stages, in the order reviews flow through them
+STAGES = ('read', 'normalize', 'tokenize', 'stopwords', 'lemmatize', 'score', 'write')
+
+# Per-review fields produced by the intermediate stages, dropped before writing
+INTERMEDIATE_FIELDS = ('clean_text', 'tokens', 'filtered')
+
+class StageStats:
+    """
+    Number of reviews a pipeline stage handled and the time it spent on them.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.seconds = 0.0
+
+    @property
+    def rate(self):
+        return self.items / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return f"{self.name:<10} {self.items:>10} reviews {self.seconds:>9.2f}s {self.rate:>12.0f} reviews/s"
+
+class ReviewPipeline:
+    """
+    Generator based review processing pipeline.
+
+    The stages are chained generators (read, normalize, tokenize, stop word
+    filter, lemmatize, VADER score, write), so only the reviews currently moving
+    through the chain are in memory no matter how large the input is. Each stage
+    records how many reviews it handled and the time spent in its own work.
+    """
+
+    def __init__(self, analyzer=None, column="Review", batch_size=256):
+        self.analyzer = analyzer or ReviewAnalyzer()
+        self.column = column
+        # Only used by the numpy engine, which scores small batches at a time
+        self.batch_size = batch_size
+        self.stats = {name: StageStats(name) for name in STAGES}
+
+    def _stage(self, name):
+        return self.stats[name]
+
+    def _map(self, name, func, records):
+        # Time only the stage's own work, not the upstream generators
+        stats = self._stage(name)
+        for record in records:
+            start = perf_counter()
+            func(record)
+            stats.seconds += perf_counter() - start
+            stats.items += 1
+            yield record
+
+    def read(self, source, fmt="jsonl"):
+        """
+        Yield review records from a JSONL or CSV file object, one line at a time.
+        """
+        stats = self._stage('read')
+        start = perf_counter()
+        rows = csv.DictReader(source) if fmt == "csv" else (json.loads(line) for line in source if line.strip())
+        for record in rows:
+            if self.column not in record:
+                raise KeyError(f"Review record has no '{self.column}' field: {record}")
+            stats.seconds += perf_counter() - start
+            stats.items += 1
+            yield record
+            start = perf_counter()
+
+    def normalize(self, records):
+        def normalize_record(record):
+            record['clean_text'] = self.analyzer.normalize(str(record[self.column] or ""))
+        return self._map('normalize', normalize_record, records)
+
+    def tokenize(self, records):
+        def tokenize_record(record):
+            record['tokens'] = self.analyzer.tokenize(record['clean_text'])
+        return self._map('tokenize', tokenize_record, records)
+
+    def remove_stopwords(self, records):
+        def filter_record(record):
+            record['filtered'] = self.analyzer.remove_stopwords(record['tokens'])
+        return self._map('stopwords', filter_record, records)
+
+    def lemmatize(self, records):
+        def lemmatize_record(record):
+            record['lemmas'] = self.analyzer.lemmatize(record['filtered'])
+        return self._map('lemmatize', lemmatize_record, records)
+
+    def score(self, records):
+        if self.analyzer.vectorized is None:
+            def score_record(record):
+                record.update(self.analyzer.score(record['clean_text']))
+            yield from self._map('score', score_record, records)
+            return
+
+        # The vectorized scorer works on small batches to keep memory bounded
+        stats = self._stage('score')
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            start = perf_counter()
+            scores = self.analyzer.vectorized.polarity_scores_batch([record['clean_text'] for record in batch])
+            for record, record_scores in zip(batch, scores):
+                record.update(self.analyzer.label(record_scores))
+            stats.seconds += perf_counter() - start
+            stats.items += len(batch)
+            yield from batch
+
+    def write(self, records, sink, fmt="jsonl"):
+        """
+        Write each record to a file object as soon as it reaches the end of the pipeline.
+        """
+        stats = self._stage('write')
+        writer = None
+        for record in records:
+            start = perf_counter()
+            for field in INTERMEDIATE_FIELDS:
+                record.pop(field, None)
+            if fmt == "csv":
+                if writer is None:
+                    writer = csv.DictWriter(sink, fieldnames=list(record), extrasaction="ignore")
+                    writer.writeheader()
+                record['lemmas'] = " ".join(record['lemmas'])
+                writer.writerow(record)
+            else:
+                sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stats.seconds += perf_counter() - start
+            stats.items += 1
+            yield record
+
+    def run(self, source, sink, input_format="jsonl", output_format="jsonl", report_every=0):
+        """
+        Push every review from `source` through the pipeline into `sink`.
+
+        Returns the number of reviews processed.
+        """
+        records = self.read(source, input_format)
+        records = self.normalize(records)
+        records = self.tokenize(records)
+        records = self.remove_stopwords(records)
+        records = self.lemmatize(records)
+        records = self.score(records)
+        count = 0
+        for _ in self.write(records, sink, output_format):
+            count += 1
+            if report_every and count % report_every == 0:
+                print(f"Processed {count} reviews", file=sys.stderr, flush=True)
+        return count
+
+    def report(self):
+        """
+        Per-stage throughput lines, in pipeline order.
+        """
+        return "\n".join(str(stats) for stats in self.stats.values())
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None where it is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def file_format(path, default):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return "csv"
+    elif extension in ('.jsonl', '.json'):
+        return "jsonl"
+    return default
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script streams reviews through the Review Analyzer without loading the whole file.\n"
+            "Reviews are read, normalized, tokenized, stop word filtered, lemmatized, scored and\n"
+            "written one at a time, and the throughput of every stage is reported at the end."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "review_pipeline.py --input reviews.jsonl --output scored.jsonl --column Review\n"
+            "cat reviews.csv | review_pipeline.py --input - --format csv --output - > scored.csv"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--input", default = "-", help = "JSONL or CSV review file, or - for stdin.", metavar = "reviews.jsonl")
+    parser.add_argument("--output", default = "-", help = "JSONL or CSV output file, or - for stdout.", metavar = "scored.jsonl")
+    parser.add_argument("--format", choices = ["jsonl", "csv"], default = "jsonl", help = "Format of stdin and stdout when no file extension tells.")
+    parser.add_argument("--column", default = "Review", help = "Name of the field holding the review text.", metavar = "Review")
+    parser.add_argument("--engine", choices = ["nltk", "numpy"], default = "nltk", help = "VADER implementation used by the score stage.")
+    parser.add_argument("--tokenizer", choices = ["nltk", "regex"], default = "nltk", help = "Tokenizer used by the tokenize stage; 'regex' is the fast_tokenize backend.")
+    parser.add_argument("--batch-size", type = int, default = 256, help = "Reviews per batch for the numpy engine.", metavar = "256")
+    parser.add_argument("--cache-size", type = int, default = 0, help = "Memoize tokens, lemmas and scores, keeping up to N entries per cache.", metavar = "100000")
+    parser.add_argument("--profile", default = None, help = "Save per-stage call counts, times and latency histograms of the analyzer as JSON.", metavar = "profile.json")
+    parser.add_argument("--pstats", default = None, help = "Also save a cProfile of the run, readable with python -m pstats.", metavar = "run.pstats")
+    parser.add_argument("--report-every", type = int, default = 0, help = "Print progress every N reviews.", metavar = "100000")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    input_format = file_format(args.input, args.format)
+    output_format = file_format(args.output, args.format)
+    cache = AnalysisCache(args.cache_size) if args.cache_size else None
+    pipeline = ReviewPipeline(ReviewAnalyzer(engine=args.engine, cache=cache, tokenizer=args.tokenizer), column=args.column, batch_size=args.batch_size)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    profiler = None
+    try:
+        start = perf_counter()
+        if args.profile or args.pstats:
+            with profiling.profile_run(args.profile, args.pstats) as profiler:
+                count = pipeline.run(source, sink, input_format, output_format, args.report_every)
+        else:
+            count = pipeline.run(source, sink, input_format, output_format, args.report_every)
+        elapsed = perf_counter() - start
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    # Keep stdout clean for the scored reviews, the report goes to stderr
+    print(pipeline.report(), file=sys.stderr)
+    rate = count / elapsed if elapsed else 0.0
+    print(f"Processed {count} reviews in {elapsed:.1f}s ({rate:.0f} reviews/s)", file=sys.stderr)
+    if cache is not None:
+        for name, stats in cache.stats().items():
+            print(f"{name} cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions ({stats['hit_rate']:.1%} hit rate)", file=sys.stderr)
+    if profiler is not None:
+        print(profiler.report(), file=sys.stderr)
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak RSS: {peak:.0f} MB", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
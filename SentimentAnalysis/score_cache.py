@@ -0,0 +1,179 @@
+from threading import Lock
+from time import time
+import hashlib
+import json
+import os
+import sqlite3
+import nltk
+
+# Bump when the scoring or labelling logic changes so old entries stop matching
+SCORE_VERSION = "1"
+
+# SQLite limits the number of parameters in one statement
+_BATCH = 500
+# Cache hits whose last_used is written in one transaction
+_TOUCH_BATCH = 1000
+
+class ScoreCache:
+    """
+    Persistent, content-addressed cache of review scores backed by SQLite.
+
+    Entries are keyed by a hash of the normalized text, the analyzer version and
+    the options that affect the result, and store the VADER scores together
+    with the derived labels as JSON. With max_entries set, the least recently
+    used entries are evicted once the cache grows past that size. The entry
+    count is kept up to date by triggers, so checking the size does not scan
+    the table, and the last_used times of hits are written in batches.
+    """
+
+    def __init__(self, path, max_entries=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.version = f"{SCORE_VERSION}:{nltk.__version__}"
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._touched = {}
+        self._lock = Lock()
+        # Several worker processes may share one cache file
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, result TEXT, last_used REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self.conn.commit()
+        # Counted once for files written before the entry count existed; the
+        # lock keeps another process from adding rows between the two steps
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS score_count (id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER)")
+        if self.conn.execute("SELECT 1 FROM score_count").fetchone() is None:
+            self.conn.execute("INSERT INTO score_count (id, entries) SELECT 0, COUNT(*) FROM scores")
+        self.conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS scores_insert AFTER INSERT ON scores "
+            "BEGIN UPDATE score_count SET entries = entries + 1 WHERE id = 0; END"
+        )
+        self.conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS scores_delete AFTER DELETE ON scores "
+            "BEGIN UPDATE score_count SET entries = entries - 1 WHERE id = 0; END"
+        )
+        self.conn.commit()
+
+    def make_key(self, text, options=""):
+        """
+        Content address of a piece of normalized text scored with the given options.
+        """
+        content = f"{self.version}\0{options}\0{text}"
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached result for `key`, or None when it is not cached.
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        Look up many keys at once. Returns a dict holding only the keys that were found.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _BATCH):
+                batch = keys[i:i + _BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, result FROM scores WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update((key, json.loads(result)) for key, result in rows)
+            if found:
+                now = time()
+                self._touched.update((key, now) for key in found)
+                if len(self._touched) >= _TOUCH_BATCH:
+                    self._write_touched()
+                    self.conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key, result):
+        self.put_many({key: result})
+
+    def put_many(self, results):
+        """
+        Store a dict of key -> result, evicting old entries if the cache is over its size.
+        """
+        if not results:
+            return
+        now = time()
+        with self._lock:
+            self._write_touched()
+            # An upsert, unlike INSERT OR REPLACE, only fires the insert trigger for new keys
+            self.conn.executemany(
+                "INSERT INTO scores (key, result, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET result = excluded.result, last_used = excluded.last_used",
+                [(key, json.dumps(result), now) for key, result in results.items()]
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _write_touched(self):
+        """
+        Write the pending last_used times of cache hits; the caller commits.
+        """
+        if self._touched:
+            self.conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?",
+                                  [(now, key) for key, now in self._touched.items()])
+            self._touched.clear()
+
+    def _entries(self):
+        return self.conn.execute("SELECT entries FROM score_count WHERE id = 0").fetchone()[0]
+
+    def _evict(self):
+        if not self.max_entries:
+            return
+        excess = self._entries() - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self.evictions += excess
+
+    def flush(self):
+        """
+        Write the pending last_used times of cache hits now instead of with the next batch.
+        """
+        with self._lock:
+            self._write_touched()
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self.conn.execute("DELETE FROM scores")
+            self.conn.commit()
+
+    def stats(self):
+        """
+        Entry count, file size and the hit, miss and eviction counters of this session.
+        """
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'max_entries': self.max_entries,
+                # The write-ahead log holds recent writes until it is checkpointed
+                'file_bytes': sum(os.path.getsize(p) for p in (self.path, self.path + '-wal') if os.path.exists(p)),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._write_touched()
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,422 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Process
+from time import perf_counter, sleep
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import socket
+from review_analyzer import ReviewAnalyzer
+import TargetReview
+
+# Sample reviews used by the load generator
+SAMPLE_REVIEWS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'presentation', 'sample_reviews.txt')
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+# One warm analyzer per worker process, created by init_worker
+_analyzer = None
+
+def init_worker(engine="numpy", tokenizer="nltk"):
+    """
+    Load the NLTK resources once per worker process.
+    """
+    global _analyzer
+    _analyzer = ReviewAnalyzer(engine=engine, with_lemmas=False)
+    TargetReview.set_tokenizer(tokenizer)
+    TargetReview.get_analyzer()
+
+def score_reviews(texts):
+    """
+    Whole-review analysis of a micro-batch, run in a worker process.
+    """
+    return _analyzer.analyze_batch(texts)
+
+def score_targets(requests):
+    """
+    Target analysis of a micro-batch of (target, review) pairs, run in a worker process.
+    """
+    return [TargetReview.analyze_target(target, review) for target, review in requests]
+
+class MicroBatcher:
+    """
+    Coalesces concurrent requests into micro-batches scored in a worker pool.
+
+    A batch is sent to the pool as soon as it holds max_batch_size requests or
+    the oldest request in it has waited max_wait seconds. Up to `concurrency`
+    batches are scored at the same time.
+    """
+
+    def __init__(self, func, executor, max_batch_size=64, max_wait=0.002, concurrency=1):
+        self.func = func
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(concurrency)
+        self.batches = 0
+        self.items = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.slots.acquire()
+            loop.create_task(self._score(batch))
+
+    async def _score(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.func, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.slots.release()
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+        }
+
+class ScoringService:
+    """
+    Local HTTP/JSON scoring server.
+
+    POST /review with {"text": ...} runs the Review Analyzer on a whole review.
+    POST /target with {"target": ..., "review": ...} runs the Target Review
+    analysis. GET /stats reports the micro-batching counters.
+    """
+
+    def __init__(self, workers=None, max_batch_size=64, max_wait=0.002, engine="numpy", tokenizer="nltk"):
+        self.workers = workers or os.cpu_count()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.engine = engine
+        self.tokenizer = tokenizer
+        self.executor = None
+        self.batchers = {}
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker, initargs=(self.engine, self.tokenizer))
+        # Warm every worker up front so the first requests do not pay for loading NLTK
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, score_reviews, ["warm up"]) for _ in range(self.workers)))
+        for path, func in (('/review', score_reviews), ('/target', score_targets)):
+            batcher = MicroBatcher(func, self.executor, self.max_batch_size, self.max_wait, concurrency=self.workers)
+            batcher.start()
+            self.batchers[path] = batcher
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        if self.executor:
+            self.executor.shutdown()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_http_request(reader)
+                except ValueError as e:
+                    # The rest of the stream cannot be trusted after a malformed request
+                    writer.write(http_response(400, {'error': f"Malformed request: {e}"}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self.route(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(http_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if path == '/stats' and method == 'GET':
+            return 200, {path: batcher.stats() for path, batcher in self.batchers.items()}
+        if path not in self.batchers:
+            return 404, {'error': f"Unknown endpoint '{path}'"}
+        if method != 'POST':
+            return 405, {'error': "Use POST"}
+        try:
+            data = json.loads(body or b'{}')
+            if path == '/review':
+                item = str(data['text'])
+            else:
+                item = (str(data['target']), str(data['review']))
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {'error': f"Invalid request body: {e}"}
+        try:
+            return 200, {'result': await self.batchers[path].submit(item)}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+async def read_http_request(reader):
+    """
+    Read one HTTP/1.1 request. Returns (method, path, headers, body), or None at end of stream.
+
+    Raises ValueError for a malformed request line or Content-Length.
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    parts = request_line.decode('latin-1').split(' ', 2)
+    if len(parts) != 3:
+        raise ValueError(f"invalid request line {request_line.strip()[:100]!r}")
+    method, path, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get('content-length', '0')
+    if not length.isdigit():
+        raise ValueError(f"invalid Content-Length {length[:100]!r}")
+    length = int(length)
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+def http_response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+def load_sample_reviews(path=SAMPLE_REVIEWS):
+    """
+    The quoted reviews from presentation/sample_reviews.txt.
+    """
+    with open(path, encoding='utf-8') as f:
+        return re.findall(r'"(.+?)"', f.read())
+
+async def run_load_test(host, port, total_requests=2000, concurrency=50, endpoint='/review'):
+    """
+    Fire `total_requests` requests over `concurrency` keep-alive connections.
+
+    Returns the throughput and latency percentiles in milliseconds.
+    """
+    reviews = load_sample_reviews()
+    latencies = []
+    counter = iter(range(total_requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                review = reviews[i % len(reviews)]
+                payload = {'text': review} if endpoint == '/review' else {'target': 'staff', 'review': review}
+                body = json.dumps(payload).encode('utf-8')
+                start = perf_counter()
+                writer.write(
+                    f"POST {endpoint} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+                )
+                await writer.drain()
+                status_line = await reader.readline()
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':', 1)[1])
+                await reader.readexactly(length)
+                latencies.append(perf_counter() - start)
+                if b' 200 ' not in status_line:
+                    raise RuntimeError(f"Request failed: {status_line.decode().strip()}")
+        finally:
+            writer.close()
+
+    start = perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': latencies[-1] * 1000,
+    }
+
+async def watch_parent(parent_pid, task):
+    """
+    Cancel `task` once the process that started this one has died.
+    """
+    while os.getppid() == parent_pid:
+        await asyncio.sleep(1)
+    task.cancel()
+
+async def serve(args, parent_pid=None):
+    """
+    Run the service until it is interrupted, terminated or, with `parent_pid`, orphaned.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    try:
+        # Stop cleanly on terminate(), so the worker pool is shut down too
+        loop.add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, RuntimeError):
+        pass
+    watcher = loop.create_task(watch_parent(parent_pid, task)) if parent_pid else None
+    service = ScoringService(args.workers, args.max_batch_size, args.max_wait / 1000, args.engine, args.tokenizer)
+    try:
+        server = await service.start(args.host, args.port)
+        print(f"Scoring service listening on http://{args.host}:{args.port}", flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        if watcher:
+            watcher.cancel()
+        await service.stop()
+
+def run_service(args, parent_pid=None):
+    try:
+        asyncio.run(serve(args, parent_pid))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+def wait_for_port(host, port, timeout=120, process=None):
+    """
+    Block until something accepts connections on host:port.
+    """
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        if process is not None and not process.is_alive():
+            raise RuntimeError("The scoring service exited before it started listening")
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            sleep(0.1)
+    raise TimeoutError(f"Nothing is listening on {host}:{port}")
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /stats HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b'\r\n\r\n', 1)[1])
+
+def exit_on_sigterm(signum, frame):
+    raise SystemExit(128 + signum)
+
+def load_test(args):
+    service = None
+    if not args.external:
+        # Run the service in its own process so the load generator does not share its event loop.
+        # It cannot be a daemon, which may not start the worker pool, so it stops itself when
+        # this process dies and a SIGTERM here still runs the finally block below.
+        signal.signal(signal.SIGTERM, exit_on_sigterm)
+        service = Process(target=run_service, args=(args, os.getpid()))
+        service.start()
+    try:
+        wait_for_port(args.host, args.port, process=service)
+        report = asyncio.run(run_load_test(args.host, args.port, args.requests, args.concurrency, args.endpoint))
+        report['batching'] = asyncio.run(fetch_stats(args.host, args.port))[args.endpoint]
+    finally:
+        if service:
+            service.terminate()
+            service.join()
+    print(json.dumps(report, indent=2))
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Local HTTP/JSON scoring service for the Review Analyzer and Target Review Analyzer.\n"
+            "Concurrent requests are coalesced into micro-batches and scored by warm worker processes."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "scoring_service.py serve --port 8765 --workers 4\n"
+            "curl -d '{\"text\": \"Great staff!\"}' http://127.0.0.1:8765/review\n"
+            "curl -d '{\"target\": \"staff\", \"review\": \"The staff were rude.\"}' http://127.0.0.1:8765/target\n"
+            "scoring_service.py loadtest --requests 5000 --concurrency 100"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("mode", choices = ["serve", "loadtest"], help = "Run the service, or run a load test against it.")
+    parser.add_argument("--host", default = "127.0.0.1", help = "Address to bind to (localhost only by default).", metavar = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765, help = "Port to listen on.", metavar = "8765")
+    parser.add_argument("--workers", type = int, default = None, help = "Number of worker processes (defaults to the number of CPUs).", metavar = "4")
+    parser.add_argument("--max-batch-size", type = int, default = 64, help = "Largest micro-batch sent to a worker.", metavar = "64")
+    parser.add_argument("--max-wait", type = float, default = 2.0, help = "Longest a request waits for its batch to fill, in milliseconds.", metavar = "2")
+    parser.add_argument("--engine", choices = ["nltk", "numpy"], default = "numpy", help = "VADER implementation used for whole reviews.")
+    parser.add_argument("--tokenizer", choices = ["nltk", "regex"], default = "nltk", help = "Tokenizer used to find target contexts.")
+    parser.add_argument("--requests", type = int, default = 2000, help = "Load test: number of requests.", metavar = "2000")
+    parser.add_argument("--concurrency", type = int, default = 50, help = "Load test: number of concurrent connections.", metavar = "50")
+    parser.add_argument("--endpoint", choices = ["/review", "/target"], default = "/review", help = "Load test: endpoint to hit.")
+    parser.add_argument("--external", action = "store_true", help = "Load test: target an already running service instead of starting one.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    if args.mode == "serve":
+        run_service(args)
+    else:
+        load_test(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+from contextlib import nullcontext
+from threading import Lock
+from time import time
+import argparse
+import hashlib
+import json
+import sqlite3
+from hotel_extraction import SEARCH_FIELDS, IncrementalExtractor
+from hotel_output import open_sink
+from page_loading import load_all_results, summarize_steps
+
+# Job states; only 'done' jobs are skipped by a rerun
+RUNNING, DONE, FAILED = 'running', 'done', 'failed'
+
+def job_key(search, base_url="https://www.booking.com"):
+    """
+    Stable id of a search: a hash of its SEARCH_FIELDS values and the site searched.
+    """
+    content = "\0".join([base_url.rstrip("/")] + [str(search[field]).strip() for field in SEARCH_FIELDS])
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+class ScrapeState:
+    """
+    Checkpoints of scrape jobs in a local SQLite file, so an interrupted scrape can resume.
+
+    A job is one search. It stores the search parameters, its status, how
+    many property cards were already extracted (the pagination depth) and
+    the hotels found so far, keyed by hotel_extraction.hotel_key(). Every
+    record() call is committed, so whatever was extracted before a crash or
+    timeout survives it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (job TEXT PRIMARY KEY, search TEXT, base_url TEXT, status TEXT, "
+            "cards INTEGER, runs INTEGER, error TEXT, started REAL, updated REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hotels (job TEXT, key TEXT, data TEXT, first_seen REAL, updated REAL, "
+            "PRIMARY KEY (job, key))"
+        )
+        self.conn.commit()
+
+    def start(self, search, base_url="https://www.booking.com", refresh=False):
+        """
+        Start a job, or resume it when the same search was run before.
+
+        Returns a dict with the job id, the status it had before ('new' for a
+        first run), the number of cards it reached, whether it resumes an
+        interrupted run and whether it should be skipped altogether. A job that
+        failed or was interrupted keeps its hotels, so a resumed scrape only
+        adds the ones it does not have. A finished job is skipped unless
+        refresh=True, which drops its hotels and scrapes it again from scratch.
+        """
+        job = job_key(search, base_url)
+        now = time()
+        with self._lock:
+            row = self.conn.execute("SELECT status, cards FROM jobs WHERE job = ?", (job,)).fetchone()
+            if row is None:
+                self.conn.execute(
+                    "INSERT INTO jobs (job, search, base_url, status, cards, runs, started, updated) VALUES (?, ?, ?, ?, 0, 1, ?, ?)",
+                    (job, json.dumps({field: str(search[field]) for field in SEARCH_FIELDS}), base_url, RUNNING, now, now)
+                )
+                self.conn.commit()
+                return {'job': job, 'previous': 'new', 'cards': 0, 'resume': False, 'skip': False}
+            status, cards = row
+            if status == DONE and not refresh:
+                return {'job': job, 'previous': status, 'cards': cards, 'resume': False, 'skip': True}
+            if status == DONE:
+                self.conn.execute("DELETE FROM hotels WHERE job = ?", (job,))
+                cards = 0
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, cards = ?, runs = runs + 1, error = NULL, updated = ? WHERE job = ?",
+                (RUNNING, cards, now, job)
+            )
+            self.conn.commit()
+            return {'job': job, 'previous': status, 'cards': cards, 'resume': status != DONE, 'skip': False}
+
+    def keys(self, job):
+        """
+        Set of the hotel keys the job already has.
+        """
+        with self._lock:
+            return {key for key, in self.conn.execute("SELECT key FROM hotels WHERE job = ?", (job,))}
+
+    def record(self, job, keys, hotels, cards):
+        """
+        Store new hotels of a job and its pagination depth as one checkpoint.
+
+        Hotels already stored with the same data are left alone, so re-scraping
+        an unchanged page writes nothing. Returns the number of hotels
+        inserted or updated.
+        """
+        now = time()
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT INTO hotels (job, key, data, first_seen, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (job, key) DO UPDATE SET data = excluded.data, updated = excluded.updated "
+                "WHERE data != excluded.data",
+                [(job, key, json.dumps(hotel), now, now) for key, hotel in zip(keys, hotels)]
+            )
+            changed = self.conn.total_changes - before
+            self.conn.execute("UPDATE jobs SET cards = MAX(cards, ?), updated = ? WHERE job = ?", (cards, now, job))
+            self.conn.commit()
+        return changed
+
+    def finish(self, job, error=None):
+        """
+        Mark a job done, or failed with `error`, keeping everything it recorded.
+        """
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE job = ?",
+                (DONE if error is None else FAILED, error, time(), job)
+            )
+            self.conn.commit()
+
+    def hotels(self, job):
+        """
+        Hotel dicts of a job in the order they were first found.
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM hotels WHERE job = ? ORDER BY rowid", (job,)).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def jobs(self):
+        """
+        One dict per job with its search, status, depth and hotel count.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT j.job, j.search, j.base_url, j.status, j.cards, j.runs, j.error, j.updated, "
+                "(SELECT COUNT(*) FROM hotels h WHERE h.job = j.job) FROM jobs j ORDER BY j.started"
+            ).fetchall()
+        columns = ['job', 'search', 'base_url', 'status', 'cards', 'runs', 'error', 'updated', 'hotels']
+        jobs = [dict(zip(columns, row)) for row in rows]
+        for job in jobs:
+            job['search'] = json.loads(job['search'])
+        return jobs
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def scrape_checkpointed(page, state, job, lean=False, rows_path=None, log=print):
+    """
+    Extract the cards after every pagination step into the state file, skipping the hotels it already has.
+
+    Returns the job's hotels, including those of earlier runs. If paging
+    fails midway, e.g. a "Load more results" click that never adds cards,
+    the job is marked failed so the next run resumes it, and what was
+    extracted is kept and returned. The rows file is appended to when the
+    job resumes and rewritten otherwise.
+    """
+    with (open_sink(rows_path, append=job['resume']) if rows_path else nullcontext()) as sink:
+        extractor = IncrementalExtractor(page, sink, seen=state.keys(job['job']),
+                                         on_extract=lambda keys, hotels, cards: state.record(job['job'], keys, hotels, cards))
+        try:
+            extractor()
+            steps = load_all_results(page, lean, log, on_step=extractor)
+            extractor()
+        except Exception as e:
+            state.finish(job['job'], str(e))
+            log(f"Scraping failed after {extractor.start} cards: {str(e)}")
+            log("The hotels found so far are kept; run the same command again to resume.")
+        else:
+            state.finish(job['job'])
+            log(f"Pagination: {summarize_steps(steps)}")
+    log(f"{extractor.count} new hotels, {extractor.duplicates} already scraped")
+    return state.hotels(job['job'])
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Lists the scrape jobs checkpointed in a state file by hotels_scraper.py and async_scraper.py.",
+        epilog=(
+            "Usage Example:\n"
+            "scrape_state.py scrapes.db"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("state", help = "SQLite state file.", metavar = "scrapes.db")
+    args = parser.parse_args()
+
+    with ScrapeState(args.state) as state:
+        for job in state.jobs():
+            search = job['search']
+            line = (f"{job['status']:8} {search['city']}, {search['country']} {search['indate']} - {search['outdate']}: "
+                    f"{job['hotels']} hotels, {job['cards']} cards, {job['runs']} runs")
+            if job['error']:
+                line += f" ({job['error']})"
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+from array import array
+from time import perf_counter
+import argparse
+import json
+import os
+import nltk
+import numpy as np
+import TargetReview
+
+# Bump when the sidecar layout changes
+SEGMENTATION_VERSION = 1
+
+class _StringColumn:
+    """
+    Strings appended into one UTF-8 byte buffer with an offset array, for writing.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offsets = array('q', [0])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def append(self, text):
+        self.buffer += text.encode('utf-8')
+        self.offsets.append(len(self.buffer))
+
+    def save(self, path, name):
+        np.save(os.path.join(path, f"{name}_bytes.npy"), np.frombuffer(bytes(self.buffer), dtype=np.uint8))
+        np.save(os.path.join(path, f"{name}_offsets.npy"), np.frombuffer(self.offsets, dtype=np.int64))
+
+class _StringArray:
+    """
+    Read side of _StringColumn, memory-mapped. Strings are only decoded when asked for.
+    """
+
+    def __init__(self, path, name):
+        self.buffer = np.load(os.path.join(path, f"{name}_bytes.npy"), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, f"{name}_offsets.npy"), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def slice(self, start, end):
+        """
+        Strings start to end, decoded from one contiguous slice of the buffer.
+        """
+        offsets = self.offsets[start:end + 1].tolist()
+        raw = self.buffer[offsets[0]:offsets[-1]].tobytes()
+        base = offsets[0]
+        return [raw[a - base:b - base].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+
+def segment_reviews(reviews, path, analyzer=None):
+    """
+    Segment and tokenize reviews once and save the result as a sidecar directory.
+
+    Two tokenizations are stored, one per analyzer:
+    - for TargetReview, the review split into sentences and each sentence
+      word tokenized, as extract_target_context() does it;
+    - for ReviewAnalyzer, the normalized review text and its tokens.
+
+    Token strings live in UTF-8 byte buffers addressed by int64 offset arrays,
+    and further offset arrays mark where each sentence and each review starts.
+    Everything is saved as .npy files that Segmentation memory-maps.
+    Returns the number of reviews written.
+    """
+    if analyzer is None:
+        from review_analyzer import ReviewAnalyzer
+        analyzer = ReviewAnalyzer(with_lemmas=False)
+    os.makedirs(path, exist_ok=True)
+
+    sentence_tokens = _StringColumn()
+    sentence_offsets = array('q', [0])
+    review_sentences = array('q', [0])
+    clean_texts = _StringColumn()
+    clean_tokens = _StringColumn()
+    review_tokens = array('q', [0])
+
+    for review in reviews:
+        for sentence in TargetReview.split_sentences(review):
+            for word in TargetReview.tokenize_words(sentence):
+                sentence_tokens.append(word)
+            sentence_offsets.append(len(sentence_tokens))
+        review_sentences.append(len(sentence_offsets) - 1)
+
+        clean_text = analyzer.normalize(review)
+        clean_texts.append(clean_text)
+        for word in analyzer.tokenize(clean_text):
+            clean_tokens.append(word)
+        review_tokens.append(len(clean_tokens))
+
+    sentence_tokens.save(path, 'sentence_tokens')
+    clean_texts.save(path, 'clean_text')
+    clean_tokens.save(path, 'clean_tokens')
+    for name, offsets in (('sentence_offsets', sentence_offsets), ('review_sentences', review_sentences), ('review_tokens', review_tokens)):
+        np.save(os.path.join(path, f"{name}.npy"), np.frombuffer(offsets, dtype=np.int64))
+
+    reviews_written = len(review_sentences) - 1
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': SEGMENTATION_VERSION,
+            'nltk': nltk.__version__,
+            'reviews': reviews_written,
+            'sentences': len(sentence_offsets) - 1,
+            'sentence_tokens': len(sentence_tokens),
+            'clean_tokens': len(clean_tokens),
+        }, f, indent=2)
+    return reviews_written
+
+class Segmentation:
+    """
+    Memory-mapped sidecar written by segment_reviews().
+
+    Opening it is instant whatever the corpus size; reviews are sliced out of
+    the mapped buffers on demand and handed to the analyzers as pre-tokenized
+    input, so repeated queries never run the NLTK tokenizers again.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != SEGMENTATION_VERSION:
+            raise ValueError(f"Segmentation {path} has version {self.meta.get('version')}, expected {SEGMENTATION_VERSION}; rebuild it")
+        self.path = path
+        self.sentence_tokens = _StringArray(path, 'sentence_tokens')
+        self.sentence_offsets = np.load(os.path.join(path, 'sentence_offsets.npy'), mmap_mode='r')
+        self.review_sentences = np.load(os.path.join(path, 'review_sentences.npy'), mmap_mode='r')
+        self.clean_texts = _StringArray(path, 'clean_text')
+        self.clean_token_strings = _StringArray(path, 'clean_tokens')
+        self.review_tokens = np.load(os.path.join(path, 'review_tokens.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return self.meta['reviews']
+
+    def sentences(self, review_id):
+        """
+        The review's sentences as lists of words, as TargetReview tokenizes them.
+        """
+        first, last = int(self.review_sentences[review_id]), int(self.review_sentences[review_id + 1])
+        bounds = self.sentence_offsets[first:last + 1].tolist()
+        if len(bounds) < 2:
+            return []
+        words = self.sentence_tokens.slice(bounds[0], bounds[-1])
+        base = bounds[0]
+        return [words[a - base:b - base] for a, b in zip(bounds, bounds[1:])]
+
+    def clean_text(self, review_id):
+        return self.clean_texts[review_id]
+
+    def clean_tokens(self, review_id):
+        """
+        The normalized review's tokens, as ReviewAnalyzer.tokenize() returns them.
+        """
+        return self.clean_token_strings.slice(int(self.review_tokens[review_id]), int(self.review_tokens[review_id + 1]))
+
+    def may_mention(self, review_id, needles):
+        """
+        Cheap check whether a review can mention one of `needles`.
+
+        Searches the review's token buffer, decoded in one go with the tokens
+        run together, so a needle must be given without spaces. It may find
+        false matches across token boundaries but never misses a real one.
+        """
+        first, last = int(self.review_sentences[review_id]), int(self.review_sentences[review_id + 1])
+        start, end = int(self.sentence_offsets[first]), int(self.sentence_offsets[last])
+        offsets = self.sentence_tokens.offsets
+        text = self.sentence_tokens.buffer[offsets[start]:offsets[end]].tobytes().decode('utf-8').lower()
+        return any(needle in text for needle in needles)
+
+    @staticmethod
+    def _needles(targets):
+        return ["".join(TargetReview._target_tokens(target)) for target in targets]
+
+    def analyze_target(self, target, review_ids=None):
+        """
+        TargetReview.analyze_target() for every review (or the given ones), as a dict of review id -> result.
+        """
+        needles = self._needles([target])
+        review_ids = range(len(self)) if review_ids is None else review_ids
+        return {
+            i: TargetReview.analyze_target(target, None, self.sentences(i)) if self.may_mention(i, needles) else None
+            for i in review_ids
+        }
+
+    def analyze_targets(self, targets, review_ids=None):
+        """
+        TargetReview.analyze_targets() for every review (or the given ones), as a dict of review id -> results.
+        """
+        if isinstance(targets, str):
+            targets = TargetReview.parse_targets(targets)
+        needles = self._needles(targets)
+        review_ids = range(len(self)) if review_ids is None else review_ids
+        return {
+            i: TargetReview.analyze_targets(targets, None, self.sentences(i)) if self.may_mention(i, needles)
+            else dict.fromkeys(targets)
+            for i in review_ids
+        }
+
+    def analyze_reviews(self, analyzer, batch_size=1000):
+        """
+        Yield ReviewAnalyzer results for every review in order, in batches of `batch_size`.
+        """
+        for start in range(0, len(self), batch_size):
+            ids = range(start, min(start + batch_size, len(self)))
+            yield from analyzer.analyze_pretokenized(
+                [self.clean_text(i) for i in ids], [self.clean_tokens(i) for i in ids]
+            )
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "This script segments and tokenizes a review file once and stores the result next to it,\n"
+            "so target queries over the same reviews skip the NLTK tokenizers."
+        ),
+        epilog=(
+            "Usage Example:\n"
+            "segmentation.py build --input reviews.xlsx --column Review --segments reviews.seg\n"
+            "segmentation.py query --segments reviews.seg --target breakfast"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("mode", choices = ["build", "query"], help = "Build the sidecar, or run a target query on it.")
+    parser.add_argument("--segments", required = True, help = "Sidecar directory.", metavar = "reviews.seg")
+    parser.add_argument("--input", default = None, help = "Build: Excel, CSV or JSONL review file.", metavar = "reviews.xlsx")
+    parser.add_argument("--column", default = "Review", help = "Build: name of the column holding the review text.", metavar = "Review")
+    parser.add_argument("--target", default = None, help = "Query: comma separated targets.", metavar = "breakfast,staff")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    start = perf_counter()
+    if args.mode == "build":
+        from batch_score import read_reviews
+        if not args.input:
+            raise SystemExit("build needs --input")
+        reviews = read_reviews(args.input)[args.column].fillna("").astype(str)
+        count = segment_reviews(reviews, args.segments)
+        print(f"Segmented {count} reviews into {args.segments} in {perf_counter() - start:.1f}s")
+        return
+
+    if not args.target:
+        raise SystemExit("query needs --target")
+    segmentation = Segmentation(args.segments)
+    targets = TargetReview.parse_targets(args.target)
+    counts = {target: {'positive': 0, 'negative': 0, 'neutral': 0} for target in targets}
+    for results in segmentation.analyze_targets(targets).values():
+        for target, result in results.items():
+            if result is not None:
+                counts[target][result['sentiment']] += 1
+    for target, split in counts.items():
+        print(f"{target}: {split['positive']} positive / {split['negative']} negative / {split['neutral']} neutral")
+    print(f"Queried {len(segmentation)} reviews in {perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
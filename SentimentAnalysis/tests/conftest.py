@@ -0,0 +1,59 @@
+import os
+import random
+import sys
+import pytest
+
+# The modules live flat in SentimentAnalysis/ and import each other by name
+SENTIMENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SENTIMENT_DIR)
+
+PRESENTATION_DIR = os.path.join(os.path.dirname(SENTIMENT_DIR), 'presentation')
+
+# Pieces the adversarial corpus is assembled from: negations, caps, "but",
+# punctuation runs, emoticons and emoji, boosters, idioms and contractions
+ADVERSARIAL_PIECES = [
+    "not good", "isn't bad", "wasn't great", "never so happy", "never this bad", "without doubt", "ain't nice",
+    "at least", "very least", "least good", "kind of nice", "sort of awful", "kinda ok", "the shit", "the bomb",
+    "cut the mustard", "hand to mouth", "GREAT", "TERRIBLE", "Great", "AWFUL service", "extremely good",
+    "barely acceptable", "really REALLY bad", "but", "But", "BUT", "!!!", "!", "??", "????", "?", ",", ".",
+    "...", "--", ";", ":)", ":-(", ":D", "<3", ":(", "😀", "😡", "👍", "good good good", "bad, bad, bad",
+    "love", "hate", "no", "nor", "don't", "can't", "cannot", "gonna", "'tis", "we'll", "I'm", "they're",
+    "good!", "!good", "(nice)", "'great'", '"clean"', "``fine''", "-bad-", "x", "a", "3,000", "$45.50",
+    "e.g.", "Mr. Smith", "the room", "staff", "breakfast", "lol", "meh", "okay", "[sic]", "{ok}", "<b>",
+]
+
+@pytest.fixture(scope="module")
+def chromium():
+    """
+    A headless Chromium of the sync Playwright API; the test is skipped when none is installed.
+    """
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.launch()
+        except Exception as e:
+            pytest.skip(f"Chromium is not available: {(str(e).splitlines() or [type(e).__name__])[0]}")
+        yield browser
+        browser.close()
+
+@pytest.fixture(scope="session")
+def presentation_texts():
+    """
+    The reviews of presentation/sample_reviews.txt and presentation/target_examples.txt.
+    """
+    texts = []
+    with open(os.path.join(PRESENTATION_DIR, 'sample_reviews.txt'), encoding='utf-8') as f:
+        texts.extend(line.strip().strip('"') for line in f if line.strip().startswith('"'))
+    with open(os.path.join(PRESENTATION_DIR, 'target_examples.txt'), encoding='utf-8') as f:
+        texts.extend(line.strip()[len("Review:"):].strip() for line in f if line.strip().startswith("Review:"))
+    assert texts
+    return texts
+
+@pytest.fixture(scope="session")
+def adversarial_texts():
+    """
+    2000 seeded random combinations of ADVERSARIAL_PIECES plus a few edge cases.
+    """
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(ADVERSARIAL_PIECES) for _ in range(rng.randint(0, 25))) for _ in range(2000)]
+    return texts + ["", "   ", "!!!", "GOOD", "good", "GOOD BAD", "but", "not", ":)", "good " * 50]
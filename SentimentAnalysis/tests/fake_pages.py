@@ -0,0 +1,65 @@
+# Stand-ins for the Playwright pages the paging and extraction code drives, for tests without a browser
+
+def raw_card(name):
+    """
+    The raw dict EXTRACT_CARDS_JS reads from a property card.
+    """
+    return {'url': f"https://www.booking.com/hotel/eg/{name}.html", 'title': name, 'price': "EGP\xa01,000",
+            'taxes': "Includes taxes and fees", 'reviews_count': None, 'overall_rate': None, 'gpa': None}
+
+class FakeResultsPage:
+    """
+    A search results page showing `batches` of raw cards, one more batch per "Load more results" click.
+
+    The click numbered `stall_at` (0 for the first) adds no cards, like a
+    "Load more results" response that never arrives.
+    """
+
+    def __init__(self, batches, stall_at=None):
+        self.batches = batches
+        self.stall_at = stall_at
+        self.shown = 1
+        self.clicks = 0
+        self.keyboard = self
+
+    def cards(self):
+        return [raw for batch in self.batches[:self.shown] for raw in batch]
+
+    def press(self, key):
+        pass
+
+    def wait_for_load_state(self, state=None, timeout=None):
+        pass
+
+    def get_by_text(self, text):
+        return FakeButton(self)
+
+    def locator(self, selector):
+        return FakeCards(self)
+
+    def wait_for_function(self, expression, arg=None, timeout=None):
+        if len(self.cards()) <= arg[1]:
+            raise TimeoutError(f"Timeout {timeout}ms exceeded.")
+
+class FakeButton:
+    def __init__(self, page):
+        self.page = page
+
+    def wait_for(self, timeout=None):
+        if self.page.shown >= len(self.page.batches):
+            raise TimeoutError(f"Timeout {timeout}ms exceeded.")
+
+    def click(self):
+        if self.page.clicks != self.page.stall_at:
+            self.page.shown += 1
+        self.page.clicks += 1
+
+class FakeCards:
+    def __init__(self, page):
+        self.page = page
+
+    def count(self):
+        return len(self.page.cards())
+
+    def evaluate_all(self, expression, start=0):
+        return self.page.cards()[start:]
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import pytest
+from async_scraper import ContextPool, HostRateLimiter, cross_searches, output_path
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        return object()
+
+    async def clear_cookies(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    """
+    new_context() raises while `failing` is set, like a browser that crashed or ran out of memory.
+    """
+
+    def __init__(self):
+        self.failing = False
+
+    async def new_context(self, **options):
+        if self.failing:
+            raise RuntimeError("new_context failed")
+        return FakeContext(self)
+
+async def search(pool, fail=False):
+    async with pool.page() as page:
+        if fail:
+            raise RuntimeError("search failed")
+        return page
+
+def test_failed_replacement_keeps_the_slot():
+    async def run():
+        browser = FakeBrowser()
+        pool = await ContextPool(browser, 2).start()
+        first = await search(pool)
+
+        browser.failing = True
+        with pytest.raises(RuntimeError, match="search failed"):
+            await search(pool, fail=True)
+        assert pool.idle.qsize() == 2
+        # The slot whose page was discarded cannot be refilled yet, the other one still works
+        results = await asyncio.gather(search(pool), search(pool), return_exceptions=True)
+        assert sum(isinstance(result, RuntimeError) for result in results) == 1
+        assert pool.idle.qsize() == 2
+
+        browser.failing = False
+        assert await asyncio.wait_for(asyncio.gather(search(pool), search(pool)), 1)
+        assert pool.idle.qsize() == 2 and len(pool.contexts) == 2
+        assert first in [page for _, page in pool.idle._queue]
+        await pool.close()
+    asyncio.run(run())
+
+def test_rate_limiter_spaces_requests_per_host():
+    async def run():
+        limiter = HostRateLimiter(20)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def request(url):
+            await limiter.wait(url)
+            return url, loop.time() - start
+
+        urls = ["https://a.example/1", "https://a.example/2", "https://b.example/1", "https://a.example/3"]
+        return await asyncio.gather(*(request(url) for url in urls))
+    times = asyncio.run(run())
+    a_times = sorted(seconds for url, seconds in times if "a.example" in url)
+    gaps = [later - earlier for earlier, later in zip(a_times, a_times[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+    # Another host is not held up by the first one
+    assert [seconds for url, seconds in times if "b.example" in url][0] < 0.04
+
+def test_rate_limiter_disabled():
+    async def run():
+        limiter = HostRateLimiter(0)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(50):
+            await limiter.wait("https://a.example/")
+        return loop.time() - start
+    assert asyncio.run(run()) < 0.05
+
+def test_cross_searches():
+    searches = cross_searches(["Alexandria", "Cairo"], "Egypt", ["2025-2-24:2025-2-27", "2025-3-1:2025-3-3"], 2, 0, 1)
+    assert [(s['city'], s['indate'], s['outdate']) for s in searches] == [
+        ("Alexandria", "2025-2-24", "2025-2-27"), ("Alexandria", "2025-3-1", "2025-3-3"),
+        ("Cairo", "2025-2-24", "2025-2-27"), ("Cairo", "2025-3-1", "2025-3-3"),
+    ]
+    assert all(s['country'] == "Egypt" and (s['nadult'], s['nchild'], s['nroom']) == (2, 0, 1) for s in searches)
+
+def test_output_path_is_one_flat_file_per_search(tmp_path):
+    search = {'city': "Sharm El Sheikh", 'country': "Egypt", 'indate': "2025-2-24", 'outdate': "2025-2-27"}
+    path = output_path(search, str(tmp_path), "csv")
+    assert path == os.path.join(str(tmp_path), "Sharm-El-Sheikh_Egypt_2025-2-24_2025-2-27.csv")
+    search['city'] = f"Alexandria{os.sep}East"
+    assert os.path.dirname(output_path(search, str(tmp_path), "jsonl")) == str(tmp_path)
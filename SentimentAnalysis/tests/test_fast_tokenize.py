@@ -0,0 +1,53 @@
+import nltk
+import pytest
+from nltk.tokenize import NLTKWordTokenizer
+import fast_tokenize
+
+nltk_tokenize = NLTKWordTokenizer().tokenize
+
+# Cases each substitution of NLTKWordTokenizer is sensitive to
+SENTENCES = [
+    'He said "the room was clean" and left.', '"Great" stay', "''Quoted'' twice", "``fine''", "«Très bien»",
+    "It's the staff's fault, isn't it?", "I can't, won't and shouldn't.", "They're gonna wanna stay, y'all.",
+    "'Tis the best; 'twas the worst.", "CANNOT RECOMMEND IT ENOUGH!!!", "Gimme more'n that, lemme see, d'ye?",
+    "Price: $45.50 (incl. 14% tax) & 3,000 points.", "Wait... what?! -- really", "a,,b ,c: d:e 12:30 1,000",
+    "Mr. Smith's room e.g. was fine.", "The end.", "The end. ", "Closing (quote).\"", "Ends with a bracket.)",
+    "'single quotes' and 'tis", "x'", "'", "tab\there", "emoji 😀 :) <3 👍", "[sic] {ok} <b>bold</b> #1 @home *star*",
+    "", "   ", ".", "...", "!!!", "a.b.c", "U.S. hotels", "rooms--cheap", "new\nline",
+]
+
+def assert_same_tokens(texts):
+    sentences = [s for text in texts for s in fast_tokenize.sent_tokenize(text)] + [t.replace('\n', ' ') for t in texts]
+    expected = [nltk_tokenize(sentence) for sentence in sentences]
+    assert [fast_tokenize.tokenize_sentence(sentence) for sentence in sentences] == expected
+    assert fast_tokenize.tokenize_sentences(sentences) == expected
+
+@pytest.mark.parametrize("sentence", SENTENCES)
+def test_sentence_matches_nltk(sentence):
+    assert fast_tokenize.tokenize_sentence(sentence) == nltk_tokenize(sentence.replace('\n', ' '))
+
+def test_sentence_batch_matches_nltk():
+    assert fast_tokenize.tokenize_sentences(SENTENCES) == [nltk_tokenize(s.replace('\n', ' ')) for s in SENTENCES]
+    assert fast_tokenize.tokenize_sentences([]) == []
+
+def test_presentation_reviews_match_nltk(presentation_texts):
+    assert_same_tokens(presentation_texts)
+
+def test_adversarial_corpus_matches_nltk(adversarial_texts):
+    assert_same_tokens(adversarial_texts)
+
+def test_word_tokenize_batch_matches_single(presentation_texts, adversarial_texts):
+    texts = presentation_texts + adversarial_texts + SENTENCES
+    expected = [[token for s in fast_tokenize.sent_tokenize(text) for token in nltk_tokenize(s)] for text in texts]
+    assert [fast_tokenize.word_tokenize(text) for text in texts] == expected
+    assert fast_tokenize.word_tokenize_batch(texts) == expected
+
+def test_sentences_match_punkt(presentation_texts):
+    try:
+        nltk.sent_tokenize("Punkt. Check.")
+    except LookupError:
+        pytest.skip("NLTK punkt data is not installed")
+    assert [fast_tokenize.sent_tokenize(text) for text in presentation_texts] == \
+        [nltk.sent_tokenize(text) for text in presentation_texts]
+    assert [fast_tokenize.word_tokenize(text) for text in presentation_texts] == \
+        [nltk.word_tokenize(text) for text in presentation_texts]
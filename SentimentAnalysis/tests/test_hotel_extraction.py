@@ -0,0 +1,43 @@
+import pytest
+from hotel_extraction import parse_card, extract_hotels_bulk, extract_hotels_locators
+from mock_booking_server import MockBooking, expected_hotel, load_fixture_expected
+
+def raw_card(price, taxes):
+    return {'title': "Sea Star Apartments", 'price': price, 'taxes': taxes, 'reviews_count': "88 reviews",
+            'overall_rate': "Scored 7.4", 'gpa': "Good"}
+
+@pytest.mark.parametrize("price, taxes, expected_taxes, expected_total", [
+    ("EGP\xa01,200", "Includes taxes and fees", "EGP 0", "EGP 1200"),
+    ("US$120", "Includes taxes and fees", "US$ 0", "US$ 120"),
+    ("1,200", "Includes taxes and fees", "0", "1200"),
+    ("EGP\xa04,520", "+EGP\xa0633 taxes and fees", "EGP\xa0633", "EGP 5153"),
+    ("€ 100", "+€ 12 taxes and fees", "€ 12", "€ 112"),
+])
+def test_taxes_in_the_currency_of_the_price(price, taxes, expected_taxes, expected_total):
+    hotel = parse_card(raw_card(price, taxes))
+    assert hotel['Taxes & Charges'] == expected_taxes
+    assert hotel['Total Cost'] == expected_total
+
+def test_included_taxes_without_a_price():
+    hotel = parse_card(raw_card(None, "Includes taxes and fees"))
+    assert (hotel['Price'], hotel['Taxes & Charges'], hotel['Total Cost']) == ("N/A", "0", "N/A")
+
+def test_bulk_and_locators_match_the_saved_fixture(chromium):
+    with MockBooking() as mock:
+        page = chromium.new_page()
+        page.goto(f"{mock.url}/fixtures/search_results.html")
+        expected = load_fixture_expected('search_results.json')
+        assert extract_hotels_bulk(page) == expected
+        assert extract_hotels_locators(page, timeout=1000) == expected
+        assert extract_hotels_bulk(page, start=3) == expected[3:]
+        page.close()
+
+def test_bulk_and_locators_match_generated_cards(chromium):
+    # Generated hotels include missing prices, included taxes and missing scores
+    with MockBooking(count=40, page_size=40) as mock:
+        page = chromium.new_page()
+        page.goto(mock.search_url())
+        expected = [expected_hotel(hotel) for hotel in mock.hotels(40, mock.seed)]
+        assert extract_hotels_bulk(page) == expected
+        assert extract_hotels_locators(page, timeout=1000) == expected
+        page.close()
@@ -0,0 +1,15 @@
+import pandas as pd
+from hotel_output import load_frame
+
+def test_csv_with_multiline_fields(tmp_path):
+    # Big enough for pyarrow to parse it in several blocks
+    path = tmp_path / "hotels.csv"
+    count = 40000
+    df = pd.DataFrame({'Hotel': [f"Hotel {i}" for i in range(count)],
+                       'Review': [f"Great stay.\nWould come back, \"really\".\n{'x' * (i % 50)}" for i in range(count)],
+                       'Price': ["EGP 4,520" if i % 3 else "" for i in range(count)]})
+    df.to_csv(path, index=False)
+    loaded = load_frame(str(path))
+    assert loaded['Review'].tolist() == df['Review'].tolist()
+    assert loaded['Price'].isna().tolist() == [not i % 3 for i in range(count)]
+    assert load_frame(str(path), columns=['Hotel', 'Review']).columns.tolist() == ['Hotel', 'Review']
@@ -0,0 +1,57 @@
+from http_replay import HttpStore, normalize_url, request_key
+
+SEARCH = "https://www.booking.com/searchresults.html?ss=Alexandria&group_adults=2"
+CARDS = "https://www.booking.com/dml/graphql"
+
+def test_volatile_parameters_are_ignored():
+    assert normalize_url(SEARCH + "&sid=abc&srpvid=1&label=x#map") == \
+        "https://www.booking.com/searchresults.html?group_adults=2&ss=Alexandria"
+    assert normalize_url("https://www.booking.com/searchresults.html?group_adults=2&ss=Alexandria&sid=other") == \
+        normalize_url(SEARCH)
+    assert request_key("get", SEARCH + "&sid=abc&_=123") == request_key("GET", SEARCH)
+    assert request_key("GET", SEARCH + "&offset=25") != request_key("GET", SEARCH)
+    assert request_key("POST", CARDS, b'{"offset": 25}') != request_key("POST", CARDS, b'{"offset": 50}')
+
+def test_repeated_requests_follow_the_recorded_order(tmp_path):
+    store = HttpStore(str(tmp_path))
+    for body in [b"first", b"second"]:
+        store.add("POST", CARDS, b'{"offset": 25}', 200, {}, body)
+
+    served = [store.lookup("POST", CARDS + "?sid=new", b'{"offset": 25}')[1] for _ in range(4)]
+    assert served == [b"first", b"second", b"second", b"second"]
+    assert store.hits == 4
+
+    store.rewind()
+    assert store.lookup("POST", CARDS, b'{"offset": 25}')[1] == b"first"
+
+def test_save_and_reload(tmp_path):
+    store = HttpStore(str(tmp_path))
+    store.meta['start_url'] = SEARCH
+    store.add("GET", SEARCH + "&sid=abc", None, 200, {'Content-Type': "text/html", 'Content-Encoding': "br"}, b"<html>")
+    store.add("GET", "https://www.booking.com/logo.png", None, 404, {}, b"<html>")
+    store.save()
+
+    reloaded = HttpStore(str(tmp_path))
+    assert reloaded.meta == {'start_url': SEARCH}
+    entry, body = reloaded.lookup("GET", SEARCH)
+    assert (entry['status'], entry['headers'], body) == (200, {'Content-Type': "text/html"}, b"<html>")
+    assert reloaded.lookup("GET", "https://www.booking.com/logo.png")[0]['status'] == 404
+    stats = reloaded.stats()
+    assert (stats['requests'], stats['responses'], stats['bodies'], stats['body_bytes']) == (2, 2, 1, 6)
+
+    # Recording the search again replaces its old responses
+    reloaded.add("GET", SEARCH, None, 200, {}, b"<html>new")
+    reloaded.rewind()
+    assert reloaded.lookup("GET", SEARCH)[1] == b"<html>new"
+    assert reloaded.lookup("GET", SEARCH)[1] == b"<html>new"
+
+def test_misses_are_listed(tmp_path):
+    store = HttpStore(str(tmp_path))
+    store.add("GET", SEARCH, None, 200, {}, b"<html>")
+    assert store.lookup("GET", "https://www.booking.com/hotel/eg/a.html") is None
+    assert store.lookup("POST", SEARCH, b"{}") is None
+    assert store.misses == ["GET https://www.booking.com/hotel/eg/a.html", f"POST {SEARCH}"]
+    assert (store.stats()['hits'], store.stats()['misses']) == (0, 2)
+
+    store.rewind()
+    assert store.misses == []
@@ -0,0 +1,43 @@
+import pytest
+import page_loading
+from page_loading import load_all_results, open_results, enable_lean_mode, PagingError
+from mock_booking_server import MockBooking, compare_loading
+from fake_pages import FakeResultsPage, raw_card
+
+def batches(count, size):
+    return [[raw_card(f"hotel-{i}") for i in range(start, min(start + size, count))] for start in range(0, count, size)]
+
+@pytest.mark.parametrize("lean", [False, True])
+def test_missing_button_ends_paging(lean):
+    page = FakeResultsPage(batches(10, 4))
+    steps = load_all_results(page, lean, log=lambda message: None)
+    assert [step['cards'] for step in steps] == [8, 10, 10]
+
+@pytest.mark.parametrize("lean", [False, True])
+def test_click_without_new_cards_raises(lean):
+    page = FakeResultsPage(batches(10, 4), stall_at=1)
+    seen = []
+    with pytest.raises(PagingError) as error:
+        load_all_results(page, lean, log=lambda message: None, on_step=seen.append)
+    assert error.value.cards == 8
+    assert [step['cards'] for step in error.value.steps] == [8, 8]
+    assert seen == [8]
+
+def test_lean_and_default_load_the_same_cards(chromium):
+    timings = compare_loading(count=60, page_size=20, delay=0.01, browser=chromium)
+    assert timings['default'][-1]['cards'] == timings['lean'][-1]['cards'] == 60
+    assert len(timings['default']) == len(timings['lean']) == 3
+
+def test_load_more_without_response_raises(chromium, monkeypatch):
+    monkeypatch.setattr(page_loading, 'MORE_CARDS_TIMEOUT', 2000)
+    with MockBooking(count=60, page_size=20) as mock:
+        context = chromium.new_context()
+        enable_lean_mode(context)
+        page = context.new_page()
+        open_results(page, mock.search_url(), lean=True, log=lambda message: None)
+        # The second "Load more results" request never gets an answer
+        page.route("**/cards?offset=40*", lambda route: None)
+        with pytest.raises(PagingError) as error:
+            load_all_results(page, lean=True, log=lambda message: None)
+        assert error.value.cards == 40
+        context.close()
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import review_crawler
+from review_crawler import ReviewScorer, unless_stopped
+
+class MemorySink:
+    """
+    Keeps the written rows; raises for rows of the hotels in `failing`.
+    """
+
+    def __init__(self, failing=()):
+        self.rows = []
+        self.failing = set(failing)
+
+    def write(self, rows):
+        if any(row['Hotel'] in self.failing for row in rows):
+            raise OSError("disk full")
+        self.rows.extend(rows)
+
+@pytest.fixture
+def scored_batches(monkeypatch):
+    """
+    Replaces score_reviews: records the size of every batch and fails batches with a review starting with "fail".
+    """
+    sizes = []
+    gate = threading.Event()
+    gate.set()
+
+    def score_reviews(texts):
+        gate.wait()
+        sizes.append(len(texts))
+        if any(text.startswith("fail") for text in texts):
+            raise ValueError("scoring failed")
+        return [{'compound': len(text)} for text in texts]
+
+    monkeypatch.setattr(review_crawler, 'score_reviews', score_reviews)
+    return sizes, gate
+
+def hotel(name):
+    return {'Hotel': name, 'URL': f"https://example.com/{name}"}
+
+async def produce(queue, items, produced=None):
+    for item in items:
+        await queue.put(item)
+        if produced is not None:
+            produced.append(item)
+    await queue.put(None)
+
+def test_reviews_are_batched(scored_batches):
+    sizes, _ = scored_batches
+    items = [(hotel(f"h{i}"), [f"review {i}.{j}" for j in range(3)]) for i in range(4)]
+
+    async def run():
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+        queue.put_nowait(None)
+        sink = MemorySink()
+        with ThreadPoolExecutor(2) as executor:
+            scored = await ReviewScorer(executor, sink, batch_size=5, max_pending=2).run(queue)
+        return scored, sink
+
+    scored, sink = asyncio.run(run())
+    assert scored == 12
+    assert sizes == [6, 6]
+    assert sorted((row['Hotel'], row['Review']) for row in sink.rows) == \
+        sorted((h['Hotel'], text) for h, texts in items for text in texts)
+    assert all(row['compound'] == len(row['Review']) for row in sink.rows)
+
+def test_crawlers_wait_while_the_scorers_are_busy(scored_batches):
+    _, gate = scored_batches
+    gate.clear()
+    items = [(hotel(f"h{i}"), [f"review {i}"]) for i in range(10)]
+
+    async def run():
+        queue = asyncio.Queue(maxsize=2)
+        produced = []
+        sink = MemorySink()
+        with ThreadPoolExecutor(2) as executor:
+            scoring = asyncio.ensure_future(ReviewScorer(executor, sink, batch_size=1, max_pending=1).run(queue))
+            producer = asyncio.ensure_future(produce(queue, items, produced))
+            await asyncio.sleep(0.2)
+            # One batch is being scored and two items wait in the queue
+            blocked = len(produced)
+            gate.set()
+            await asyncio.wait_for(producer, 5)
+            scored = await asyncio.wait_for(scoring, 5)
+        return blocked, scored, sink
+
+    blocked, scored, sink = asyncio.run(run())
+    assert blocked == 3
+    assert scored == 10
+    assert len(sink.rows) == 10
+
+def test_failing_batches_do_not_stall_the_queue(scored_batches):
+    items = [(hotel(f"h{i}"), ["fail to score" if i == 3 else f"review {i}"]) for i in range(10)]
+
+    async def run():
+        queue = asyncio.Queue(maxsize=1)
+        sink = MemorySink(failing={"h6"})
+        scorer = ReviewScorer(ThreadPoolExecutor(2), sink, batch_size=1, max_pending=1)
+        scoring = asyncio.ensure_future(scorer.run(queue))
+        await asyncio.wait_for(produce(queue, items), 5)
+        scored = await asyncio.wait_for(scoring, 5)
+        scorer.executor.shutdown()
+        return scorer, scored, sink
+
+    scorer, scored, sink = asyncio.run(run())
+    assert scored == 8
+    assert scorer.failed == 2
+    assert sorted(row['Hotel'] for row in sink.rows) == sorted(f"h{i}" for i in range(10) if i not in (3, 6))
+
+def test_crawl_is_cancelled_when_scoring_stops():
+    async def run():
+        queue = asyncio.Queue(maxsize=1)
+        queue.put_nowait("full")
+
+        async def scoring():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("scorer crashed")
+
+        with pytest.raises(RuntimeError, match="scorer crashed"):
+            await asyncio.wait_for(unless_stopped(queue.put("blocked"), asyncio.ensure_future(scoring())), 5)
+        assert queue.qsize() == 1
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+import sqlite3
+from score_cache import ScoreCache
+
+def entries(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+def test_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "scores.db")
+    cache = ScoreCache(path, max_entries=3)
+    cache.put_many({"a": 1, "b": 2, "c": 3})
+    cache.put("a", 10)
+    assert cache.get("b") == 2
+    cache.put_many({"d": 4, "e": 5})
+    assert cache.get_many(["a", "b", "c", "d", "e"]) == {"b": 2, "d": 4, "e": 5}
+    assert cache.stats()['entries'] == entries(path) == 3
+    assert cache.evictions == 2
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+    cache.close()
+
+def test_hits_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "scores.db")
+    cache = ScoreCache(path)
+    cache.put("a", 1)
+    with sqlite3.connect(path) as conn:
+        before = conn.execute("SELECT last_used FROM scores").fetchone()[0]
+    cache.get("a")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT last_used FROM scores").fetchone()[0] == before
+    cache.close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT last_used FROM scores").fetchone()[0] > before
+
+def test_count_shared_between_connections(tmp_path):
+    path = str(tmp_path / "scores.db")
+    # A file from before the entry count existed is counted once when opened
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE scores (key TEXT PRIMARY KEY, result TEXT, last_used REAL)")
+        conn.executemany("INSERT INTO scores VALUES (?, '1', 0)", [(str(i),) for i in range(5)])
+    first, second = ScoreCache(path, max_entries=6), ScoreCache(path, max_entries=6)
+    first.put_many({"a": 1, "b": 2})
+    second.put_many({"c": 3, "a": 4})
+    assert first.stats()['entries'] == second.stats()['entries'] == entries(path) == 6
+    assert second.get("a") == 4
+    first.close()
+    second.close()
+
+def test_tokenizers_do_not_share_entries(tmp_path):
+    from review_analyzer import ReviewAnalyzer
+    cache = ScoreCache(str(tmp_path / "scores.db"))
+    nltk_analyzer = ReviewAnalyzer(score_cache=cache, with_lemmas=False)
+    regex_analyzer = ReviewAnalyzer(score_cache=cache, with_lemmas=False, tokenizer="regex")
+    nltk_analyzer.analyze_batch(["Great staff!"])
+    regex_analyzer.analyze_batch(["Great staff!"])
+    assert (cache.hits, cache.misses) == (0, 2)
+    regex_analyzer.analyze_batch(["Great staff!"])
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
@@ -0,0 +1,26 @@
+import asyncio
+import pytest
+from scoring_service import read_http_request
+
+def read(raw):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_http_request(reader)
+    return asyncio.run(run())
+
+def test_reads_request():
+    raw = b'POST /review HTTP/1.1\r\nContent-Length: 16\r\nConnection: close\r\n\r\n{"text": "good"}'
+    assert read(raw) == ('POST', '/review', {'content-length': '16', 'connection': 'close'}, b'{"text": "good"}')
+    assert read(b"") is None
+
+@pytest.mark.parametrize("raw", [
+    b"GARBAGE\r\n\r\n",
+    b"POST /review\r\n\r\n",
+    b"POST /review HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+    b"POST /review HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+])
+def test_malformed_request_raises_value_error(raw):
+    with pytest.raises(ValueError):
+        read(raw)
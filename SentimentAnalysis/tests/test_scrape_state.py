@@ -0,0 +1,69 @@
+import json
+from hotel_extraction import IncrementalExtractor
+from hotel_output import open_sink
+from scrape_state import DONE, FAILED, ScrapeState, scrape_checkpointed
+from fake_pages import FakeResultsPage, raw_card
+
+SEARCH = {'city': "Alexandria", 'country': "Egypt", 'indate': "2025-2-24", 'outdate': "2025-2-27",
+          'nadult': 2, 'nchild': 0, 'nroom': 1}
+
+def scrape(state, job, rows_path, pages, fail=False):
+    """
+    Run the checkpointed extraction of hotels_scraper.py on lists of raw cards instead of a page.
+    """
+    with open_sink(rows_path, append=job['resume']) as sink:
+        extractor = IncrementalExtractor(None, sink, seen=state.keys(job['job']),
+                                         on_extract=lambda keys, hotels, cards: state.record(job['job'], keys, hotels, cards))
+        for raws in pages:
+            extractor.add(raws)
+    state.finish(job['job'], "timeout" if fail else None)
+    return extractor
+
+def names(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)['Hotel'] for line in f]
+
+def test_resume_finds_hotels_ranked_above_the_old_depth(tmp_path):
+    rows_path = str(tmp_path / "hotels.jsonl")
+    with ScrapeState(str(tmp_path / "scrapes.db")) as state:
+        job = state.start(SEARCH)
+        scrape(state, job, rows_path, [[raw_card("a"), raw_card("b")], [raw_card("c")]], fail=True)
+
+        # The rerun finds a new hotel at the top and the old ones shifted down
+        job = state.start(SEARCH)
+        assert job['resume'] and not job['skip']
+        extractor = scrape(state, job, rows_path, [[raw_card("new"), raw_card("a"), raw_card("b")], [raw_card("c"), raw_card("d")]])
+        assert (extractor.count, extractor.duplicates) == (2, 3)
+        assert [hotel['Hotel'] for hotel in state.hotels(job['job'])] == ["a", "b", "c", "new", "d"]
+        assert names(rows_path) == ["a", "b", "c", "new", "d"]
+        assert state.start(SEARCH)['skip']
+
+def test_refresh_replaces_the_hotels_and_rows(tmp_path):
+    rows_path = str(tmp_path / "hotels.jsonl")
+    with ScrapeState(str(tmp_path / "scrapes.db")) as state:
+        scrape(state, state.start(SEARCH), rows_path, [[raw_card("a"), raw_card("b")]])
+
+        job = state.start(SEARCH, refresh=True)
+        assert not job['resume'] and not job['skip'] and job['cards'] == 0
+        extractor = scrape(state, job, rows_path, [[raw_card("b"), raw_card("c")]])
+        assert (extractor.count, extractor.duplicates) == (2, 0)
+        assert [hotel['Hotel'] for hotel in state.hotels(job['job'])] == ["b", "c"]
+        assert names(rows_path) == ["b", "c"]
+
+def test_stalled_paging_fails_the_job_and_the_rerun_resumes(tmp_path):
+    rows_path = str(tmp_path / "hotels.jsonl")
+    batches = [[raw_card("a"), raw_card("b")], [raw_card("c")], [raw_card("d"), raw_card("e")]]
+    with ScrapeState(str(tmp_path / "scrapes.db")) as state:
+        # The second "Load more results" click never adds cards
+        job = state.start(SEARCH)
+        hotels = scrape_checkpointed(FakeResultsPage(batches, stall_at=1), state, job, rows_path=rows_path, log=lambda message: None)
+        assert [hotel['Hotel'] for hotel in hotels] == ["a", "b", "c"]
+        assert [(j['status'], j['cards']) for j in state.jobs()] == [(FAILED, 3)]
+
+        job = state.start(SEARCH)
+        assert job['resume'] and not job['skip']
+        hotels = scrape_checkpointed(FakeResultsPage(batches), state, job, rows_path=rows_path, log=lambda message: None)
+        assert [hotel['Hotel'] for hotel in hotels] == ["a", "b", "c", "d", "e"]
+        assert names(rows_path) == ["a", "b", "c", "d", "e"]
+        assert [(j['status'], j['cards'], j['runs']) for j in state.jobs()] == [(DONE, 5, 2)]
+        assert state.start(SEARCH)['skip']
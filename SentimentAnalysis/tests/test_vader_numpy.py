@@ -0,0 +1,51 @@
+import random
+import pytest
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from vader_numpy import VectorizedVader
+
+@pytest.fixture(scope="module")
+def sia():
+    return SentimentIntensityAnalyzer()
+
+def mismatches(vader, sia, texts):
+    return [(text, fast, sia.polarity_scores(text))
+            for text, fast in zip(texts, vader.polarity_scores_batch(texts)) if fast != sia.polarity_scores(text)]
+
+def test_presentation_reviews_match_nltk(sia, presentation_texts):
+    assert mismatches(VectorizedVader(sia), sia, presentation_texts) == []
+
+def test_single_review_matches_nltk(sia, presentation_texts):
+    vader = VectorizedVader(sia)
+    for text in presentation_texts:
+        assert vader.polarity_scores(text) == sia.polarity_scores(text)
+
+def test_adversarial_corpus_matches_nltk(sia, adversarial_texts):
+    assert mismatches(VectorizedVader(sia), sia, adversarial_texts) == []
+
+@pytest.mark.parametrize("texts", [
+    # negation
+    ["not good", "isn't bad at all", "never so happy", "never this bad", "without doubt good", "nor nice"],
+    # capitalisation
+    ["GREAT room", "the room was GREAT", "GREAT BAD", "REALLY good staff", "VERY bad"],
+    # "but" and "least"
+    ["good but bad", "bad but good", "good BUT bad", "good but but bad", "at least good", "least good", "very least bad"],
+    # punctuation
+    ["good!", "good!!!!!!", "good??", "good????", "good?!", "(good)", "'good'", "good,", ",good", "-good-", "good..."],
+    # emoticons and emoji
+    [":)", ":-(", ":D <3", "😀 good", "good 😡", "👍"],
+    # repeated tokens, scored at their first position
+    ["good good good", "bad good bad good", "GOOD good GOOD", "not good not good", "kind of kind of nice"],
+], ids=["negation", "caps", "but", "punctuation", "emoji", "repeats"])
+def test_rules_match_nltk(sia, texts):
+    assert mismatches(VectorizedVader(sia), sia, texts) == []
+
+def test_batches_with_growing_vocabulary_match_nltk(sia, adversarial_texts):
+    # Many new tokens per batch make the feature arrays grow and the caches
+    # get cleared between batches; scores must not change
+    rng = random.Random(1)
+    vader = VectorizedVader(sia, max_tokens=300, max_rows=600)
+    for start in range(0, 400, 50):
+        texts = [f"{text} word{rng.randint(0, 10**6)} Word{rng.randint(0, 10**6)}" for text in adversarial_texts[start:start + 50]]
+        assert mismatches(vader, sia, texts) == []
+    assert len(vader._token_ids) <= 300 + 50 * 30
+    assert vader._n_rows <= 600 + 50 * 30
@@ -0,0 +1,340 @@
+import string
+import numpy as np
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+PUNCTUATION = frozenset(string.punctuation)
+
+# Names and dtypes of the per-token feature arrays, in the order _features() returns them
+FEATURES = (
+    ('in_lex', bool), ('valence', np.float64), ('is_booster', bool), ('booster', np.float64), ('upper', bool),
+    ('negated', bool), ('least', bool), ('at_very', bool), ('kind', bool), ('of', bool), ('but', bool),
+    ('never', bool), ('so_this', bool), ('idiom_word', np.int64),
+)
+
+# Default limits of the token caches; past them the caches are cleared between batches
+MAX_TOKENS = 200000
+MAX_ROWS = 500000
+
+class VectorizedVader:
+    """
+    Batch VADER scorer that reproduces SentimentIntensityAnalyzer.polarity_scores with NumPy.
+
+    Every distinct token is compiled once into a row of feature arrays (lexicon
+    valence, booster scalar, negation, capitalisation, ...). A batch of reviews is
+    turned into one flat array of token ids and the booster/negation windows,
+    idioms, "but" and "least" rules and the score normalisation are applied to
+    the whole batch with array operations instead of token by token.
+    """
+
+    def __init__(self, sia=None, max_tokens=MAX_TOKENS, max_rows=MAX_ROWS):
+        sia = sia or SentimentIntensityAnalyzer()
+        self.lexicon = sia.lexicon
+        self.constants = sia.constants
+        self.punc_list = frozenset(self.constants.PUNC_LIST)
+
+        # Words that take part in the multi-word idioms and booster bi-grams,
+        # matched case sensitively like NLTK does
+        self.idioms = {tuple(key.split()): value for key, value in self.constants.SPECIAL_CASE_IDIOMS.items()}
+        self.booster_bigrams = {tuple(key.split()) for key in self.constants.BOOSTER_DICT if ' ' in key}
+        idiom_words = sorted({word for key in list(self.idioms) + list(self.booster_bigrams) for word in key})
+        self.idiom_word_index = {word: i + 1 for i, word in enumerate(idiom_words)}
+        self._build_idiom_tables(len(idiom_words) + 1)
+
+        # Raw whitespace token -> feature row id (-1 for tokens VADER drops),
+        # cleared once it holds more than max_tokens entries
+        self.max_tokens = max_tokens
+        self._token_ids = {}
+        # Feature rows, one per distinct token after VADER's punctuation stripping,
+        # stored in arrays whose capacity doubles; all cleared past max_rows rows
+        self.max_rows = max_rows
+        self._row_ids = {}
+        self._n_rows = 0
+        self._arrays = {name: np.zeros(1024, dtype=dtype) for name, dtype in FEATURES}
+
+    def _build_idiom_tables(self, base):
+        self.idiom_base = base
+        self.idiom_bigram = np.full(base ** 2, np.nan)
+        self.idiom_trigram = np.full(base ** 3, np.nan)
+        self.booster_bigram = np.zeros(base ** 2, dtype=bool)
+        for key, value in self.idioms.items():
+            code = 0
+            for word in key:
+                code = code * base + self.idiom_word_index[word]
+            if len(key) == 2:
+                self.idiom_bigram[code] = value
+            else:
+                self.idiom_trigram[code] = value
+        for first, second in self.booster_bigrams:
+            self.booster_bigram[self.idiom_word_index[first] * base + self.idiom_word_index[second]] = True
+
+    def _strip_punctuation(self, token):
+        """
+        Strip leading or trailing punctuation the way SentiText does.
+
+        SentiText maps 'cat,' and ',cat' back to 'cat' when the punctuation is one
+        of its PUNC_LIST entries and the remaining word has more than one character.
+        """
+        if token[0] in PUNCTUATION:
+            head = 0
+            while head < len(token) and token[head] in PUNCTUATION:
+                head += 1
+            word = token[head:]
+            if len(word) > 1 and token[:head] in self.punc_list and not any(c in PUNCTUATION for c in word):
+                return word
+        elif token[-1] in PUNCTUATION:
+            tail = len(token)
+            while token[tail - 1] in PUNCTUATION:
+                tail -= 1
+            word = token[:tail]
+            if len(word) > 1 and token[tail:] in self.punc_list and not any(c in PUNCTUATION for c in word):
+                return word
+        return token
+
+    def _add_token(self, token):
+        if len(token) <= 1:
+            self._token_ids[token] = -1
+            return -1
+        word = self._strip_punctuation(token)
+        row_id = self._row_ids.get(word)
+        if row_id is None:
+            row_id = self._n_rows
+            if row_id == len(self._arrays['valence']):
+                self._grow()
+            for (name, _), value in zip(FEATURES, self._features(word)):
+                self._arrays[name][row_id] = value
+            self._row_ids[word] = row_id
+            self._n_rows += 1
+        self._token_ids[token] = row_id
+        return row_id
+
+    def _grow(self):
+        for name, values in self._arrays.items():
+            grown = np.zeros(2 * len(values), dtype=values.dtype)
+            grown[:len(values)] = values
+            self._arrays[name] = grown
+
+    def _trim_caches(self):
+        """
+        Keep memory flat on a stream of batches: forget raw tokens past max_tokens
+        and every feature row past max_rows. Only called between batches, when
+        no token ids are in use.
+        """
+        if self._n_rows > self.max_rows:
+            self._row_ids.clear()
+            self._n_rows = 0
+            self._token_ids.clear()
+        elif len(self._token_ids) > self.max_tokens:
+            self._token_ids.clear()
+
+    def _features(self, word):
+        lower = word.lower()
+        constants = self.constants
+        return (
+            lower in self.lexicon,
+            self.lexicon.get(lower, 0.0),
+            lower in constants.BOOSTER_DICT,
+            constants.BOOSTER_DICT.get(lower, 0.0),
+            word.isupper(),
+            constants.negated([word]),
+            lower == "least",
+            lower in ("at", "very"),
+            lower == "kind",
+            lower == "of",
+            lower == "but",
+            word == "never",
+            word in ("so", "this"),
+            self.idiom_word_index.get(word, 0),
+        )
+
+    def tokenize(self, text):
+        """
+        Turn a review into VADER's token feature ids.
+        """
+        token_ids = self._token_ids
+        ids = [token_ids[token] if token in token_ids else self._add_token(token) for token in text.split()]
+        return [i for i in ids if i >= 0]
+
+    def score_arrays(self, texts):
+        """
+        Score a batch of reviews, returning unrounded 'neg', 'neu', 'pos' and 'compound' arrays.
+        """
+        texts = list(texts)
+        self._trim_caches()
+        token_lists = [self.tokenize(text) for text in texts]
+        n_docs = len(texts)
+        lengths = np.fromiter((len(ids) for ids in token_lists), dtype=np.int64, count=n_docs)
+        ids = np.fromiter((i for ids in token_lists for i in ids), dtype=np.int64, count=int(lengths.sum()))
+        f = self._arrays
+        c = self.constants
+
+        starts = np.zeros(n_docs, dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        doc = np.repeat(np.arange(n_docs), lengths)
+        # Position of every token within its own review
+        pos_in_doc = np.arange(len(ids)) - starts[doc]
+        doc_len = lengths[doc]
+
+        upper = f['upper'][ids]
+        allcaps = np.bincount(doc, weights=upper, minlength=n_docs)
+        is_cap_diff = ((allcaps > 0) & (allcaps < lengths))[doc]
+
+        def shifted(values, k, fill):
+            # values[p - k] for every token, `fill` where p - k leaves the review
+            out = np.full(len(values), fill, dtype=values.dtype)
+            if k > 0:
+                out[k:] = values[:-k]
+                out[pos_in_doc < k] = fill
+            else:
+                out[:k] = values[-k:]
+                out[pos_in_doc >= doc_len + k] = fill
+            return out
+
+        token_in_lex = f['in_lex'][ids]
+
+        # Tokens that are skipped outright: boosters and the "kind" of "kind of"
+        skipped = f['is_booster'][ids] | (f['kind'][ids] & shifted(f['of'][ids], -1, False))
+        active = token_in_lex & ~skipped
+
+        valence = np.where(token_in_lex, f['valence'][ids], 0.0)
+        caps = active & upper & is_cap_diff
+        valence[caps] = np.where(valence[caps] > 0, valence[caps] + c.C_INCR, valence[caps] - c.C_INCR)
+
+        booster = f['booster'][ids]
+        negated = f['negated'][ids]
+        never = f['never'][ids]
+        so_this = f['so_this'][ids]
+        idiom_word = f['idiom_word'][ids]
+        base = self.idiom_base
+
+        for start_i in range(3):
+            k = start_i + 1
+            window = active & (pos_in_doc > start_i) & ~shifted(token_in_lex, k, True)
+
+            # Booster/dampener scalar of the preceding word
+            prev_booster = shifted(booster, k, 0.0)
+            scalar = np.where(valence < 0, -prev_booster, prev_booster)
+            boost_caps = (prev_booster != 0) & shifted(upper, k, False) & is_cap_diff
+            scalar = np.where(boost_caps, np.where(valence > 0, scalar + c.C_INCR, scalar - c.C_INCR), scalar)
+            if start_i == 1:
+                scalar = np.where(scalar != 0, scalar * 0.95, scalar)
+            elif start_i == 2:
+                scalar = np.where(scalar != 0, scalar * 0.9, scalar)
+            valence = np.where(window, valence + scalar, valence)
+
+            # Negation and the "never so/this" cases
+            if start_i == 0:
+                factor = np.where(shifted(negated, 1, False), c.N_SCALAR, 1.0)
+            elif start_i == 1:
+                never_so = shifted(never, 2, False) & shifted(so_this, 1, False)
+                factor = np.where(never_so, 1.5, np.where(shifted(negated, 2, False), c.N_SCALAR, 1.0))
+            else:
+                never_so = (shifted(never, 3, False) & shifted(so_this, 2, False)) | shifted(so_this, 1, False)
+                factor = np.where(never_so, 1.25, np.where(shifted(negated, 3, False), c.N_SCALAR, 1.0))
+            valence = np.where(window & (factor != 1.0), valence * factor, valence)
+
+            if start_i == 2:
+                valence = self._apply_idioms(valence, window, idiom_word, shifted, base)
+
+        # Negation with "least" (but not "at least" or "very least")
+        prev_least = shifted(f['least'][ids], 1, False) & ~shifted(token_in_lex, 1, True)
+        least_two = prev_least & (pos_in_doc > 1) & ~shifted(f['at_very'][ids], 2, False)
+        least_one = prev_least & (pos_in_doc == 1)
+        valence = np.where(active & (least_two | least_one), valence * c.N_SCALAR, valence)
+        valence = np.where(active, valence, 0.0)
+
+        # NLTK scores every repeat of a token at its first position in the review
+        keys = doc * (self._n_rows + 1) + ids
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        sentiments = valence[first[inverse.ravel()]]
+
+        # Sentiment before the first "but" is halved, after it is boosted by half
+        is_but = f['but'][ids]
+        but_pos = np.full(n_docs, -1, dtype=np.int64)
+        but_tokens = np.flatnonzero(is_but)
+        but_docs, first_but = np.unique(doc[but_tokens], return_index=True)
+        but_pos[but_docs] = pos_in_doc[but_tokens[first_but]]
+        token_but = but_pos[doc]
+        has_but = token_but >= 0
+        sentiments = np.where(has_but & (pos_in_doc < token_but), sentiments * 0.5, sentiments)
+        sentiments = np.where(has_but & (pos_in_doc > token_but), sentiments * 1.5, sentiments)
+
+        return self._score_valence(texts, doc, lengths, sentiments)
+
+    def _apply_idioms(self, valence, window, idiom_word, shifted, base):
+        w0 = idiom_word
+        w1 = shifted(idiom_word, 1, 0)
+        w2 = shifted(idiom_word, 2, 0)
+        w3 = shifted(idiom_word, 3, 0)
+        a1 = shifted(idiom_word, -1, 0)
+        a2 = shifted(idiom_word, -2, 0)
+
+        def bigram(a, b):
+            return self.idiom_bigram[a * base + b]
+
+        def trigram(a, b, c):
+            return self.idiom_trigram[(a * base + b) * base + c]
+
+        # The first matching preceding sequence wins, then following sequences override
+        idiom = np.full(len(valence), np.nan)
+        for candidate in (bigram(w1, w0), trigram(w2, w1, w0), bigram(w2, w1), trigram(w3, w2, w1), bigram(w3, w2)):
+            idiom = np.where(np.isnan(idiom), candidate, idiom)
+        for candidate in (bigram(w0, a1), trigram(w0, a1, a2)):
+            idiom = np.where(np.isnan(candidate), idiom, candidate)
+        valence = np.where(window & ~np.isnan(idiom), idiom, valence)
+
+        # Booster/dampener bi-grams such as 'sort of' or 'kind of'
+        dampened = self.booster_bigram[w3 * base + w2] | self.booster_bigram[w2 * base + w1]
+        return np.where(window & dampened, valence + self.constants.B_DECR, valence)
+
+    def _score_valence(self, texts, doc, lengths, sentiments):
+        n_docs = len(texts)
+        sum_s = np.bincount(doc, weights=sentiments, minlength=n_docs)
+        pos_sum = np.bincount(doc, weights=np.where(sentiments > 0, sentiments + 1, 0.0), minlength=n_docs)
+        neg_sum = np.bincount(doc, weights=np.where(sentiments < 0, sentiments - 1, 0.0), minlength=n_docs)
+        neu_count = np.bincount(doc, weights=sentiments == 0, minlength=n_docs)
+
+        # Emphasis from exclamation points (up to 4) and question marks (2 or more)
+        ep_count = np.minimum(np.fromiter((text.count("!") for text in texts), dtype=np.float64, count=n_docs), 4)
+        qm_count = np.fromiter((text.count("?") for text in texts), dtype=np.float64, count=n_docs)
+        qm_amplifier = np.where(qm_count > 1, np.where(qm_count <= 3, qm_count * 0.18, 0.96), 0.0)
+        amplifier = ep_count * 0.292 + qm_amplifier
+
+        sum_s = np.where(sum_s > 0, sum_s + amplifier, np.where(sum_s < 0, sum_s - amplifier, sum_s))
+        compound = sum_s / np.sqrt(sum_s * sum_s + 15)
+
+        pos_larger = pos_sum > np.abs(neg_sum)
+        neg_larger = pos_sum < np.abs(neg_sum)
+        pos_sum = np.where(pos_larger, pos_sum + amplifier, pos_sum)
+        neg_sum = np.where(neg_larger, neg_sum - amplifier, neg_sum)
+
+        total = pos_sum + np.abs(neg_sum) + neu_count
+        empty = lengths == 0
+        total[empty] = 1.0
+        scores = {
+            'neg': np.abs(neg_sum / total),
+            'neu': np.abs(neu_count / total),
+            'pos': np.abs(pos_sum / total),
+            'compound': compound,
+        }
+        for values in scores.values():
+            values[empty] = 0.0
+        return scores
+
+    def polarity_scores_batch(self, texts):
+        """
+        Score a batch of reviews, returning one polarity_scores style dictionary per review.
+        """
+        scores = self.score_arrays(texts)
+        # Python's round() is used so the rounding matches NLTK exactly
+        return [
+            {'neg': round(neg, 3), 'neu': round(neu, 3), 'pos': round(pos, 3), 'compound': round(compound, 4)}
+            for neg, neu, pos, compound in zip(
+                scores['neg'].tolist(), scores['neu'].tolist(), scores['pos'].tolist(), scores['compound'].tolist()
+            )
+        ]
+
+    def polarity_scores(self, text):
+        """
+        Score a single review, same as SentimentIntensityAnalyzer.polarity_scores.
+        """
+        return self.polarity_scores_batch([text])[0]